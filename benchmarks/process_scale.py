@@ -0,0 +1,345 @@
+"""
+Benchmark de enumeração e amostragem de processos em escala
+
+Cria uma quantidade controlada de processos ociosos (100 -> 10k), mede a
+latência e as alocações das principais consultas do ProcessManager e do
+SystemMonitor e o custo de cada atributo do psutil por processo. O
+resultado é JSON, para comparar versões.
+
+Uso:
+    python benchmarks/process_scale.py --scales 100,1000,10000 -o resultado.json
+"""
+
+import gc
+import json
+import os
+import platform
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import click
+import psutil
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, 'modules'))
+sys.path.append(os.path.join(ROOT, 'utils'))
+
+# atributos lidos pelo aplicativo, do mais barato ao mais caro
+ATTRIBUTES = (
+    'name', 'ppid', 'status', 'create_time', 'cpu_times', 'cpu_percent', 'memory_info',
+    'memory_percent', 'num_threads', 'username', 'exe', 'cmdline', 'cwd', 'io_counters',
+    'memory_full_info', 'open_files', 'net_connections'
+)
+
+# nome com o qual os processos "vítimas" aparecem para optimize_processes
+VICTIM_NAME = 'chrome.exe'
+
+
+class DummyProcesses:
+    """Processos ociosos criados para o benchmark e encerrados ao final"""
+
+    def __init__(self, method=None):
+        self.method = method or ('fork' if hasattr(os, 'fork') else 'exec')
+        self.pids = []
+        self._popen = []
+        self._tempdir = None
+
+    def _fork(self):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                signal.signal(signal.SIGINT, signal.SIG_IGN)
+                while True:
+                    signal.pause()
+            finally:
+                os._exit(0)
+        return pid
+
+    def _exec(self, args):
+        popen = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                 stderr=subprocess.DEVNULL)
+        self._popen.append(popen)
+        return popen.pid
+
+    def grow(self, count):
+        """
+        Completa até `count` processos
+
+        Returns:
+            int: Quantidade efetivamente em execução (limitada por ulimit/memória)
+        """
+        args = [sys.executable, '-S', '-c', 'import time; time.sleep(10 ** 6)']
+        while len(self.pids) < count:
+            try:
+                self.pids.append(self._fork() if self.method == 'fork' else self._exec(args))
+            except OSError:
+                break
+        return len(self.pids)
+
+    def spawn_victims(self, count):
+        """
+        Cria processos com o nome de um navegador para exercitar optimize_processes
+
+        Disponível apenas onde o binário `sleep` existe.
+        """
+        sleep = shutil.which('sleep')
+        if not sleep or count <= 0:
+            return []
+        self._tempdir = self._tempdir or tempfile.mkdtemp(prefix='ioptimizer-bench-')
+        binary = os.path.join(self._tempdir, VICTIM_NAME)
+        if not os.path.exists(binary):
+            shutil.copy2(sleep, binary)
+        return [self._exec([binary, '1000000']) for _ in range(count)]
+
+    def own_pids(self):
+        return set(self.pids) | {popen.pid for popen in self._popen}
+
+    def close(self):
+        procs = []
+        for pid in self.own_pids():
+            try:
+                procs.append(psutil.Process(pid))
+            except psutil.NoSuchProcess:
+                continue
+        for proc in procs:
+            try:
+                proc.kill()
+            except psutil.Error:
+                pass
+        psutil.wait_procs(procs, timeout=10)
+        for popen in self._popen:
+            popen.poll()
+        self.pids = []
+        self._popen = []
+        if self._tempdir:
+            shutil.rmtree(self._tempdir, ignore_errors=True)
+            self._tempdir = None
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def measure(func, repeats):
+    """
+    Latência (sem tracemalloc) e alocações (com tracemalloc) de uma chamada
+
+    Returns:
+        dict: latency_ms (min/median/p95/max), alloc_peak_kb, alloc_net_kb e result_size
+    """
+    latencies = []
+    result = None
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    kept = func()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+
+    return {
+        'latency_ms': {
+            'min': min(latencies),
+            'median': statistics.median(latencies),
+            'p95': _percentile(latencies, 0.95),
+            'max': max(latencies),
+        },
+        'alloc_peak_kb': (peak - before) / 1024,
+        'alloc_net_kb': (current - before) / 1024,
+        'result_size': len(result) if hasattr(result, '__len__') else None,
+    }
+
+
+def attribute_costs(pids, attributes=ATTRIBUTES):
+    """
+    Custo de cada atributo do psutil, lido isoladamente em handles novos
+
+    Returns:
+        dict: atributo -> us_per_process, errors (AccessDenied etc.) e supported
+    """
+    handles = []
+    for pid in pids:
+        try:
+            handles.append(psutil.Process(pid))
+        except psutil.Error:
+            continue
+
+    costs = {}
+    for attribute in attributes:
+        if not hasattr(psutil.Process, attribute):
+            costs[attribute] = {'supported': False}
+            continue
+        errors = 0
+        start = time.perf_counter()
+        for proc in handles:
+            try:
+                getattr(proc, attribute)()
+            except psutil.Error:
+                errors += 1
+        elapsed = time.perf_counter() - start
+        costs[attribute] = {
+            'supported': True,
+            'us_per_process': elapsed / max(1, len(handles)) * 1e6,
+            'errors': errors,
+        }
+
+    # referência: o mesmo conjunto lido pelo ProcessRegistry dentro de um único oneshot
+    start = time.perf_counter()
+    for proc in handles:
+        try:
+            with proc.oneshot():
+                proc.cpu_percent(None)
+                proc.memory_info()
+                proc.memory_percent()
+                proc.status()
+        except psutil.Error:
+            continue
+    costs['registry_oneshot'] = {
+        'supported': True,
+        'us_per_process': (time.perf_counter() - start) / max(1, len(handles)) * 1e6,
+        'errors': 0,
+    }
+    return costs
+
+
+def foreign_victims(own_pids):
+    """Processos reais com nomes que optimize_processes encerraria"""
+    from process_manager import RESOURCE_WASTERS
+
+    # optimize_processes compara nomes sem diferenciar maiúsculas (Spotify.exe, Teams.exe...)
+    wasters = {name.lower() for name in RESOURCE_WASTERS}
+    return [
+        p.pid for p in psutil.process_iter(['name'])
+        if (p.info['name'] or '').lower() in wasters and p.pid not in own_pids
+    ]
+
+
+def run_scale(dummies, target, repeats, victims, destructive, with_attributes):
+    from process_manager import ProcessManager
+    from process_registry import ProcessRegistry
+    from system_monitor import SystemMonitor
+
+    start = time.perf_counter()
+    running = dummies.grow(target)
+    spawn_seconds = time.perf_counter() - start
+
+    scale = {
+        'requested': target,
+        'dummies': running,
+        'total_processes': len(psutil.pids()),
+        'spawn_seconds': spawn_seconds,
+        'functions': {},
+    }
+
+    # primeira consulta com um registro novo: inclui anexar todos os pids
+    cold = ProcessManager(registry=ProcessRegistry(prime_interval=0))
+    start = time.perf_counter()
+    cold.get_all_processes()
+    scale['cold_registry_ms'] = (time.perf_counter() - start) * 1000
+
+    # max_age=0: cada chamada faz uma atualização incremental completa, como em um timer
+    registry = ProcessRegistry(prime_interval=0, max_age=0)
+    manager = ProcessManager(registry=registry)
+    monitor = SystemMonitor(registry=registry)
+    registry.ensure_fresh()
+
+    functions = {
+        'ProcessManager.get_all_processes': manager.get_all_processes,
+        'ProcessManager.get_resource_heavy_processes': manager.get_resource_heavy_processes,
+        'SystemMonitor.get_top_processes': monitor.get_top_processes,
+        'SystemMonitor.get_real_time_stats': monitor.get_real_time_stats,
+    }
+    for name, func in functions.items():
+        # get_real_time_stats bloqueia ~2 s medindo CPU; poucas repetições bastam
+        count = min(repeats, 2) if name.endswith('get_real_time_stats') else repeats
+        scale['functions'][name] = measure(func, count)
+
+    foreign = foreign_victims(dummies.own_pids())
+    if foreign and not destructive:
+        scale['functions']['ProcessManager.optimize_processes'] = {
+            'skipped': f"{len(foreign)} processos reais seriam encerrados (use --destructive)"
+        }
+    else:
+        spawned = dummies.spawn_victims(victims)
+        registry.ensure_fresh()
+        start = time.perf_counter()
+        result = manager.optimize_processes()
+        scale['functions']['ProcessManager.optimize_processes'] = {
+            'latency_ms': {'single': (time.perf_counter() - start) * 1000},
+            'victims_spawned': len(spawned),
+            'processes_killed': result.get('processes_killed'),
+        }
+
+    if with_attributes:
+        scale['attributes'] = attribute_costs(psutil.pids())
+
+    return scale
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=ROOT, capture_output=True,
+                              text=True, check=False).stdout.strip() or None
+    except OSError:
+        return None
+
+
+@click.command()
+@click.option('--scales', default='100,1000,10000', help="Quantidades de processos, separadas por vírgula")
+@click.option('--repeats', default=5, help="Repetições por função")
+@click.option('--victims', default=20, help="Processos com nome de navegador para optimize_processes")
+@click.option('--method', type=click.Choice(['fork', 'exec']), help="Como criar os processos")
+@click.option('--no-attributes', is_flag=True, help="Não mede o custo por atributo")
+@click.option('--destructive', is_flag=True, help="Roda optimize_processes mesmo com navegadores reais abertos")
+@click.option('--output', '-o', default='-', help="Arquivo JSON de saída ('-' para stdout)")
+def main(scales, repeats, victims, method, no_attributes, destructive, output):
+    """Benchmark de escala das consultas de processos"""
+    targets = sorted(int(s) for s in scales.split(',') if s.strip())
+    dummies = DummyProcesses(method)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+            'psutil': psutil.__version__,
+            'platform': platform.platform(),
+            'cpu_count': psutil.cpu_count(),
+            'memory_total': psutil.virtual_memory().total,
+            'method': dummies.method,
+            'repeats': repeats,
+        },
+        'scales': [],
+    }
+
+    try:
+        for target in targets:
+            click.echo(f"{target} processos...", err=True)
+            report['scales'].append(run_scale(dummies, target, repeats, victims, destructive, not no_attributes))
+    finally:
+        dummies.close()
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if output == '-':
+        click.echo(text)
+    else:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
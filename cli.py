@@ -0,0 +1,224 @@
+"""
+Interface de linha de comando não interativa do iOptimizer
+
+Cada subcomando imprime JSON (ou NDJSON com --ndjson) e carrega apenas os
+módulos de que precisa, sem banner nem coleta de informações do sistema.
+"""
+
+import json
+import os
+import sys
+
+import click
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'modules'))
+sys.path.append(os.path.join(os.path.dirname(__file__), 'utils'))
+
+
+def emit(data, ndjson=False):
+    """Escreve o resultado em JSON (ou uma linha por item em NDJSON)"""
+    if ndjson and isinstance(data, list):
+        for item in data:
+            click.echo(json.dumps(item, ensure_ascii=False, default=str))
+    else:
+        click.echo(json.dumps(data, ensure_ascii=False, default=str, indent=None if ndjson else 2))
+
+
+@click.group()
+@click.option('--timings', is_flag=True, help="Exibe a tabela de tempos por etapa no stderr")
+@click.option('--trace', type=click.Path(dir_okay=False), help="Salva os spans em JSON (Trace Event)")
+@click.option('--profile', type=click.Path(dir_okay=False), help="Salva um perfil cProfile do comando")
+@click.pass_context
+def cli(ctx, timings, trace, profile):
+    """iOptimizer - comandos não interativos com saída JSON"""
+    if not (timings or trace or profile):
+        return
+
+    from profiler import tracer
+
+    def finish():
+        if trace:
+            tracer.export_trace(trace)
+        if timings:
+            click.echo(tracer.format_summary(), err=True)
+
+    # os recursos são fechados em ordem inversa: perfil, span raiz e depois a saída
+    ctx.call_on_close(finish)
+    tracer.enable()
+    ctx.with_resource(tracer.span(f"command.{ctx.invoked_subcommand}"))
+    if profile:
+        ctx.with_resource(tracer.profile(profile))
+
+
+@cli.command()
+@click.option('--count', default=1, help="Quantidade de amostras (NDJSON quando > 1)")
+@click.option('--interval', default=0.0, help="Pausa extra entre amostras em segundos")
+@click.option('--shared/--no-shared', default=True, help="Usa o snapshot de um amostrador compartilhado, se houver")
+def stats(count, interval, shared):
+    """Estatísticas do sistema em tempo real"""
+    import time
+    from system_monitor import SystemMonitor
+
+    snapshot = None
+    if shared:
+        from shared_snapshot import SnapshotReader
+        snapshot = SnapshotReader.open_existing()
+
+    monitor = SystemMonitor(snapshot=snapshot)
+    for i in range(count):
+        emit(monitor.get_real_time_stats(), ndjson=count > 1)
+        if interval and i < count - 1:
+            time.sleep(interval)
+
+
+@cli.command()
+@click.option('--limit', default=10, help="Quantidade de processos")
+@click.option('--sort', 'sort_by', type=click.Choice(['cpu', 'memory', 'io']), default='cpu')
+@click.option('--ndjson', is_flag=True, help="Um processo por linha")
+@click.option('--shared/--no-shared', default=True, help="Usa o snapshot de um amostrador compartilhado, se houver")
+def top(limit, sort_by, ndjson, shared):
+    """Processos que mais consomem recursos"""
+    if sort_by == 'io':
+        from process_manager import ProcessManager
+        processes = ProcessManager().get_io_heavy_processes(limit=limit)
+    else:
+        from system_monitor import SystemMonitor
+        snapshot = None
+        if shared:
+            from shared_snapshot import SnapshotReader
+            snapshot = SnapshotReader.open_existing()
+        processes = SystemMonitor(snapshot=snapshot).get_top_processes(limit=limit, sort_by=sort_by)
+
+    for proc in processes:
+        memory_info = proc.pop('memory_info', None)
+        if memory_info is not None:
+            proc['memory_info'] = memory_info._asdict()
+
+    emit(processes, ndjson)
+
+
+@cli.command()
+@click.option('--dry-run', is_flag=True, help="Apenas calcula o espaço que seria liberado")
+@click.option('--quarantine', is_flag=True, help="Move os arquivos para a quarentena em vez de apagar")
+def clean(dry_run, quarantine):
+    """Limpeza do sistema"""
+    from system_cleaner import SystemCleaner
+
+    store = None
+    if quarantine:
+        from backup_manager import QuarantineStore
+        store = QuarantineStore()
+
+    emit(SystemCleaner(quarantine=store).full_cleanup(dry_run=dry_run, verbose=False))
+
+
+@cli.command()
+@click.option('--run', 'run_id', help="Restaura todos os arquivos de uma execução")
+@click.option('--path', help="Restaura a versão mais recente de um arquivo")
+@click.option('--since', type=float, help="Restaura itens desde este timestamp")
+@click.option('--list', 'list_runs', is_flag=True, help="Lista as execuções em quarentena")
+@click.option('--overwrite', is_flag=True, help="Substitui arquivos existentes")
+def restore(run_id, path, since, list_runs, overwrite):
+    """Restaura arquivos da quarentena"""
+    from backup_manager import QuarantineStore
+
+    store = QuarantineStore()
+    if list_runs or not (run_id or path or since):
+        emit({'runs': store.runs(), 'stats': store.stats()})
+        return
+
+    result = store.restore(path=path, run=run_id, since=since, overwrite=overwrite)
+    emit(result)
+    sys.exit(0 if not result['failed'] else 1)
+
+
+@cli.command()
+@click.argument('targets', nargs=-1, required=True)
+@click.option('--force', is_flag=True, help="Envia SIGKILL direto")
+@click.option('--timeout', default=7.0, help="Prazo total em segundos")
+def kill(targets, force, timeout):
+    """Encerra processos por PID ou nome"""
+    from process_manager import ProcessManager
+
+    manager = ProcessManager()
+    pids = [int(t) for t in targets if t.isdigit()]
+    names = {t.lower() for t in targets if not t.isdigit()}
+
+    if names:
+        # tabela recém-amostrada: o alvo pode ter iniciado depois da última leitura
+        table = manager.registry.table(max_age=0)
+        # com create_time: um pid reutilizado depois da leitura da tabela não é encerrado
+        pids.extend((table.pid[i], table.create_time[i]) for i in range(len(table)) if table.name[i].lower() in names)
+
+    result = manager.terminate_processes(pids, timeout=timeout, force=force)
+    emit(result)
+    # processos protegidos recusados também contam como falha
+    sys.exit(0 if not (result['failed'] or result['blocked']) else 1)
+
+
+@cli.command()
+@click.option('--output', '-o', default='-', help="Arquivo de saída ('-' para stdout)")
+def report(output):
+    """Relatório completo do sistema"""
+    from system_monitor import SystemMonitor
+
+    monitor = SystemMonitor()
+    if output == '-':
+        emit(monitor.build_report())
+    else:
+        emit({'file': monitor.export_report(output)})
+
+
+@cli.command()
+@click.option('--interval', default=2.0, help="Pausa entre publicações em segundos")
+@click.option('--top', default=20, help="Processos publicados")
+@click.option('--path', help="Arquivo do segmento compartilhado")
+def publish(interval, top, path):
+    """Amostrador compartilhado: publica o último snapshot para leitores locais"""
+    import time
+    from shared_snapshot import SnapshotPublisher
+
+    try:
+        publisher = SnapshotPublisher(path=path, top=top, interval=interval)
+    except (OSError, RuntimeError, ValueError) as e:
+        click.echo(f"Erro: {e}", err=True)
+        sys.exit(1)
+    click.echo(f"Publicando em {publisher.path} (Ctrl+C para parar)", err=True)
+    publisher.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # o segmento fica: leitores abertos continuam nele e um novo amostrador
+        # retoma a mesma sequência
+        publisher.close(unlink=False)
+
+
+@cli.command()
+@click.option('--metric', default='memory', help="Métrica consultada (ex.: cpu, memory, swap)")
+@click.option('--hours', default=24.0, help="Janela em horas")
+@click.option('--threshold', type=float, help="Informa quando a métrica passou a ficar acima deste valor")
+@click.option('--min-duration', default=300.0, help="Duração mínima acima do limite em segundos")
+@click.option('--series', is_flag=True, help="Inclui a série completa (NDJSON)")
+def history(metric, hours, threshold, min_duration, series):
+    """Consulta o histórico de métricas gravado"""
+    import time
+    from metrics_history import HistoryStore
+
+    store = HistoryStore()
+    since = time.time() - hours * 3600
+
+    if series:
+        emit(store.query(metric, since), ndjson=True)
+        return
+
+    result = {'metric': metric, 'hours': hours, 'summary': store.summary(metric, since)}
+    if threshold is not None:
+        result['crossing'] = store.first_crossing(metric, threshold, since, min_duration=min_duration)
+    emit(result)
+
+
+if __name__ == "__main__":
+    cli()
@@ -1,30 +1,43 @@
+import asyncio
 import os
 import sys
 import time
+from datetime import datetime
 from colorama import init, Fore, Back, Style
-import click
 
 init(autoreset=True)
 
 sys.path.append(os.path.join(os.path.dirname(__file__), 'modules'))
 sys.path.append(os.path.join(os.path.dirname(__file__), 'utils'))
 
-try:
-    from system_monitor import SystemMonitor
-    from system_cleaner import SystemCleaner
-    from process_manager import ProcessManager
-    from startup_manager import StartupManager
-    from system_tweaks import SystemTweaks
-    from admin_check import is_admin, request_admin
-except ImportError as e:
-    print(f"{Fore.RED}Erro ao importar módulos: {e}")
-    print("Certifique-se de que todos os arquivos estão no diretório correto.")
-    sys.exit(1)
+from admin_check import is_admin, request_admin
+from profiler import tracer
 
 class iOptimizer:
     def __init__(self):
-        self.monitor = SystemMonitor()
-        self.cleaner = SystemCleaner()
+        # os módulos só são carregados no modo interativo; os subcomandos do
+        # cli.py importam apenas o que cada um usa
+        try:
+            from system_monitor import SystemMonitor
+            from system_cleaner import SystemCleaner
+            from process_manager import ProcessManager
+            from startup_manager import StartupManager
+            from system_tweaks import SystemTweaks
+            from metrics_history import HistoryStore
+            from shared_snapshot import SnapshotReader
+        except ImportError as e:
+            print(f"{Fore.RED}Erro ao importar módulos: {e}")
+            print("Certifique-se de que todos os arquivos estão no diretório correto.")
+            sys.exit(1)
+        
+        self.history = HistoryStore()
+        # se um amostrador compartilhado (cli.py publish) estiver rodando, o monitor
+        # lê as amostras dele em vez de bloquear 2 s a cada atualização
+        self.monitor = SystemMonitor(history=self.history, snapshot=SnapshotReader.open_existing())
+        # a quarentena é opcional: com ela a limpeza pode ser desfeita, mas o
+        # espaço só é liberado quando os itens expiram
+        self.cleaner = SystemCleaner(history=self.history)
+        self.quarantine = None
         self.process_mgr = ProcessManager()
         self.startup_mgr = StartupManager()
         self.tweaks = SystemTweaks()
@@ -84,6 +97,15 @@ class iOptimizer:
                     temp_color = Fore.GREEN if stats['temperature'] < 70 else Fore.YELLOW if stats['temperature'] < 85 else Fore.RED
                     print(f"{Fore.CYAN}Temperatura: {temp_color}{stats['temperature']:.1f}°C")
                 
+                history = self.monitor.get_history_summary(hours=24)
+                if history.get('cpu') and history.get('memory'):
+                    print(f"\n{Fore.CYAN}Últimas 24h: {Fore.WHITE}CPU média {history['cpu']['avg']:.1f}% "
+                          f"(máx {history['cpu']['max']:.1f}%), RAM média {history['memory']['avg']:.1f}% "
+                          f"(máx {history['memory']['max']:.1f}%)")
+                if history.get('memory_pressure'):
+                    started = datetime.fromtimestamp(history['memory_pressure']['start'])
+                    print(f"{Fore.YELLOW}Pressão de memória desde {started:%d/%m %H:%M}")
+                
                 time.sleep(2)
                 
         except KeyboardInterrupt:
@@ -100,12 +122,33 @@ class iOptimizer:
             if input(f"{Fore.CYAN}Continuar mesmo assim? (s/n): ").lower() != 's':
                 return
         
+        keep = input(f"{Fore.CYAN}Manter os arquivos em quarentena para poder desfazer? (s/n): ").lower() == 's'
+        if keep and self.quarantine is None:
+            from backup_manager import QuarantineStore
+            self.quarantine = QuarantineStore()
+        
         print(f"{Fore.CYAN}Iniciando limpeza...")
-        results = self.cleaner.full_cleanup()
+        self.cleaner.quarantine = self.quarantine if keep else None
+        try:
+            results = self.cleaner.full_cleanup()
+        finally:
+            self.cleaner.quarantine = None
+        
+        if tracer.enabled:
+            print(f"\n{Fore.CYAN}{tracer.format_summary()}")
         
         print(f"\n{Fore.GREEN}✅ Limpeza concluída!")
         for category, size in results.items():
             print(f"{Fore.CYAN}{category}: {Fore.WHITE}{size}")
+        
+        if results.get('quarantine_run'):
+            print(f"\n{Fore.YELLOW}Arquivos mantidos em quarentena (execução {results['quarantine_run']}).")
+            print(f"{Fore.YELLOW}O espaço informado só é liberado quando a quarentena expira "
+                  f"(idade ou orçamento de {self.quarantine.budget_bytes / 1024 ** 3:.0f} GB).")
+            if input(f"{Fore.CYAN}Desfazer esta limpeza? (s/n): ").lower() == 's':
+                restored = self.quarantine.restore(run=results['quarantine_run'])
+                print(f"{Fore.GREEN}{len(restored['restored'])} arquivos restaurados, "
+                      f"{len(restored['failed'])} falhas.")
     
     def manage_processes(self):
         """Gerencia processos do sistema"""
@@ -125,7 +168,7 @@ class iOptimizer:
         choice = input(f"\n{Fore.CYAN}Digite o número do processo para encerrar (0 para voltar): ")
         if choice.isdigit() and 1 <= int(choice) <= len(processes):
             proc = processes[int(choice) - 1]
-            if self.process_mgr.kill_process(proc['pid']):
+            if self.process_mgr.kill_process(proc['pid'], create_time=proc.get('create_time')):
                 print(f"{Fore.GREEN}✅ Processo {proc['name']} encerrado com sucesso.")
             else:
                 print(f"{Fore.RED}❌ Erro ao encerrar o processo.")
@@ -147,9 +190,28 @@ class iOptimizer:
         
         print(f"{Fore.CYAN}Programas na inicialização:")
         for i, item in enumerate(startup_items, 1):
+            if 'error' in item:
+                print(f"{Fore.RED}{i}. Erro ao ler {item.get('source', '')}: {item['error']}")
+                continue
             status = "✅ Ativo" if item['enabled'] else "❌ Desabilitado"
             print(f"{Fore.WHITE}{i}. {item['name']} - {status}")
         
+        if input(f"\n{Fore.CYAN}Medir o impacto de cada programa na inicialização? (s/n): ").lower() == 's':
+            print(f"{Fore.YELLOW}Executando cada programa isoladamente...")
+            profile = self.startup_mgr.profile_startup()
+            
+            print(f"\n{Fore.CYAN}{'Programa':<30} {'Impacto':<8} {'Até ocioso':>11} {'CPU (s)':>8} {'Pico (MB)':>10} {'I/O (MB)':>9}")
+            for result in profile['results']:
+                if 'error' in result:
+                    print(f"{Fore.RED}{result['name'][:30]:<30} {result['error']}")
+                    continue
+                idle = f"{result['time_to_idle']:.1f}s" if result['time_to_idle'] is not None else "timeout"
+                print(f"{Fore.WHITE}{result['name'][:30]:<30} {result['impact']:<8} {idle:>11} "
+                      f"{result['cpu_seconds']:>8.2f} {result['peak_memory_mb']:>10.1f} "
+                      f"{result['io_bytes'] / (1024 * 1024):>9.1f}")
+            
+            print(f"\n{Fore.GREEN}Economia estimada adiando todos: {profile['total_estimated_savings']:.1f}s")
+        
         # lógica para habilitar/desabilitar
         pass
         
@@ -163,12 +225,18 @@ class iOptimizer:
             print(f"{Fore.RED}⚠️  Privilégios de administrador necessários.")
             return
         
-        print(f"{Fore.CYAN}Aplicando tweaks de performance...")
-        results = self.tweaks.apply_performance_tweaks()
+        print(f"{Fore.CYAN}Aplicando tweaks (cada um é medido e revertido se não trouxer ganho)...")
+        
+        def show(result):
+            if 'error' in result:
+                print(f"{Fore.WHITE}➖ {result['name']}: {result['error']}")
+            elif result['kept']:
+                print(f"{Fore.GREEN}✅ {result['name']}: +{result['gain'] * 100:.1f}% em {result['benchmark']}")
+            else:
+                print(f"{Fore.YELLOW}↩️  {result['name']}: revertido ({result['gain'] * 100:+.1f}% em {result['benchmark']})")
         
-        for tweak, success in results.items():
-            status = "✅" if success else "❌"
-            print(f"{status} {tweak}")
+        results = self.tweaks.apply_performance_tweaks(on_result=show)
+        print(f"\n{Fore.CYAN}{sum(results.values())} de {len(results)} tweaks mantidos.")
     
     def full_optimization(self):
         """Executa otimização completa"""
@@ -182,16 +250,26 @@ class iOptimizer:
         
         print(f"{Fore.CYAN}Iniciando otimização completa...")
         
-        print(f"{Fore.YELLOW}1/3 Limpeza do sistema...")
-        self.cleaner.full_cleanup()
+        labels = {'cleanup': 'Limpeza do sistema', 'tweaks': 'Tweaks aplicados'}
         
-        print(f"{Fore.YELLOW}2/3 Aplicando tweaks...")
-        self.tweaks.apply_performance_tweaks()
+        def on_phase(name, result):
+            print(f"{Fore.GREEN}✓ {labels.get(name, name)}")
         
-        print(f"{Fore.YELLOW}3/3 Finalizando...")
-        time.sleep(2)
+        from async_core import AsyncOptimizer
+        
+        optimizer = AsyncOptimizer(self.monitor, self.cleaner, self.process_mgr, self.tweaks)
+        try:
+            asyncio.run(optimizer.full_optimization(on_phase=on_phase))
+        except KeyboardInterrupt:
+            print(f"{Fore.YELLOW}Otimização interrompida.")
+            return
+        finally:
+            optimizer.close()
         
         print(f"{Fore.GREEN}🎉 Otimização completa finalizada!")
+        
+        if tracer.enabled:
+            print(f"\n{Fore.CYAN}{tracer.format_summary()}")
     
     def run(self):
         """Executa a aplicação principal"""
@@ -237,7 +315,14 @@ class iOptimizer:
             except Exception as e:
                 print(f"{Fore.RED}❌ Erro: {e}")
                 input(f"{Fore.CYAN}Pressione Enter para continuar...")
+        
+        # grava as amostras que ainda estão na fila do histórico
+        self.history.close()
 
 if __name__ == "__main__":
-    app = iOptimizer()
-    app.run()
\ No newline at end of file
+    if len(sys.argv) > 1:
+        from cli import cli
+        cli()
+    else:
+        app = iOptimizer()
+        app.run()
\ No newline at end of file
@@ -0,0 +1,225 @@
+"""
+Fachada assíncrona sobre SystemMonitor, SystemCleaner e ProcessManager
+
+As chamadas bloqueantes (psutil e sistema de arquivos) rodam em executores
+limitados, separados por tipo de trabalho, para que o monitoramento continue
+atualizando enquanto uma limpeza ou operação de processos está em andamento.
+Fases independentes da otimização completa são executadas em paralelo e
+podem ser canceladas.
+"""
+
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from profiler import tracer
+
+
+class AsyncOptimizer:
+    def __init__(self, monitor=None, cleaner=None, process_mgr=None, tweaks=None,
+                 psutil_workers=4, fs_workers=4):
+        """
+        Args:
+            monitor (SystemMonitor): Monitor a usar (padrão: um novo)
+            cleaner (SystemCleaner): Limpador (padrão: criado sob demanda)
+            process_mgr (ProcessManager): Gerenciador de processos (padrão: um novo)
+            tweaks (SystemTweaks): Tweaks aplicados na otimização completa (opcional)
+            psutil_workers (int): Threads para chamadas psutil
+            fs_workers (int): Threads para operações de sistema de arquivos
+        """
+        if monitor is None:
+            from system_monitor import SystemMonitor
+            monitor = SystemMonitor()
+        if process_mgr is None:
+            from process_manager import ProcessManager
+            process_mgr = ProcessManager()
+
+        self.monitor = monitor
+        self.process_mgr = process_mgr
+        self.tweaks = tweaks
+        self._cleaner = cleaner
+
+        self._psutil_executor = ThreadPoolExecutor(psutil_workers, thread_name_prefix='ioptimizer-psutil')
+        self._fs_executor = ThreadPoolExecutor(fs_workers, thread_name_prefix='ioptimizer-fs')
+
+    @property
+    def cleaner(self):
+        if self._cleaner is None:
+            from system_cleaner import SystemCleaner
+            self._cleaner = SystemCleaner()
+        return self._cleaner
+
+    async def _run(self, executor, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # run_in_executor não propaga o contexto: sem a cópia, spans abertos na
+        # thread perderiam o span pai da tarefa (asyncio.to_thread faz o mesmo)
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(executor, functools.partial(context.run, func, *args, **kwargs))
+
+    def _psutil(self, func, *args, **kwargs):
+        return self._run(self._psutil_executor, func, *args, **kwargs)
+
+    def _fs(self, func, *args, **kwargs):
+        return self._run(self._fs_executor, func, *args, **kwargs)
+
+    # monitoramento
+
+    async def real_time_stats(self):
+        return await self._psutil(self.monitor.get_real_time_stats)
+
+    async def top_processes(self, limit=10, sort_by='cpu'):
+        return await self._psutil(self.monitor.get_top_processes, limit, sort_by)
+
+    async def disk_usage(self):
+        return await self._psutil(self.monitor.get_disk_usage_by_drive)
+
+    async def build_report(self):
+        """Coleta as seções do relatório em paralelo"""
+        stats, top_cpu, top_memory, disk, network, info = await asyncio.gather(
+            self.real_time_stats(),
+            self.top_processes(sort_by='cpu'),
+            self.top_processes(sort_by='memory'),
+            self.disk_usage(),
+            self._psutil(self.monitor.get_network_info),
+            self._psutil(self.monitor.get_system_info),
+        )
+
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'system_info': info,
+            'real_time_stats': stats,
+            'top_processes_cpu': top_cpu,
+            'top_processes_memory': top_memory,
+            'disk_usage': disk,
+            'network_info': network
+        }
+
+    async def monitor(self, interval=2.0):
+        """
+        Gera estatísticas continuamente (iterador assíncrono)
+
+        Args:
+            interval (float): Pausa entre amostras em segundos
+        """
+        while True:
+            yield await self.real_time_stats()
+            await asyncio.sleep(interval)
+
+    # limpeza
+
+    async def full_cleanup(self, dry_run=False):
+        """
+        Executa as etapas de limpeza em paralelo no executor de arquivos
+
+        Etapas que percorrem diretórios sobrepostos formam um grupo e rodam em
+        sequência; os grupos rodam ao mesmo tempo.
+
+        Returns:
+            dict: Mesmo formato de SystemCleaner.full_cleanup
+        """
+        steps = self.cleaner.cleanup_steps()
+        if not dry_run:
+            self.cleaner.begin_run()
+
+        async def run_group(group):
+            results = []
+            for key, _, step in group:
+                with tracer.span(f"cleanup.{key}"):
+                    results.append((key, await self._fs(step, dry_run)))
+            return results
+
+        groups = await asyncio.gather(*(run_group(group) for group in self.cleaner.cleanup_groups()))
+        results = dict(item for group in groups for item in group)
+        ordered = {key: results[key] for key, _, _ in steps}
+        return self.cleaner.summarize_cleanup(ordered, dry_run)
+
+    # processos
+
+    async def terminate_processes(self, pids, timeout=7, force=False):
+        return await self._psutil(self.process_mgr.terminate_processes, pids, timeout=timeout, force=force)
+
+    async def kill_processes_by_name(self, process_name):
+        return await self._psutil(self.process_mgr.kill_processes_by_name, process_name)
+
+    async def optimize_processes(self):
+        return await self._psutil(self.process_mgr.optimize_processes)
+
+    def process_performance(self, duration=60, interval=2, limit=10):
+        """Iterador assíncrono de amostras de desempenho de processos"""
+        return self.process_mgr.aiter_process_performance(duration, interval, limit)
+
+    # otimização completa
+
+    async def full_optimization(self, dry_run=False, include_processes=False, on_phase=None):
+        """
+        Executa as fases da otimização completa
+
+        Limpeza e (opcionalmente) otimização de processos são independentes e
+        rodam ao mesmo tempo. Os tweaks são verificados com benchmarks, então
+        rodam depois, sem disputar CPU e disco com as outras fases. Cancelar a
+        tarefa cancela as fases pendentes; chamadas já em andamento no
+        executor terminam, mas seus resultados são descartados.
+
+        Args:
+            dry_run (bool): Limpeza apenas simulada
+            include_processes (bool): Também encerra instâncias excedentes
+            on_phase (callable): Chamado com (fase, resultado) ao fim de cada fase
+
+        Returns:
+            dict: Resultado de cada fase
+        """
+        async def phase(name, start):
+            with tracer.span(f"optimization.{name}"):
+                result = await start()
+            if on_phase:
+                on_phase(name, result)
+            return name, result
+
+        # as corrotinas só são criadas dentro da fase, então um cancelamento
+        # antes do início não deixa corrotinas órfãs
+        phases = [phase('cleanup', lambda: self.full_cleanup(dry_run))]
+        if include_processes:
+            phases.append(phase('processes', self.optimize_processes))
+
+        with tracer.span('optimization'):
+            results = dict(await asyncio.gather(*phases))
+            if self.tweaks is not None:
+                name, result = await phase('tweaks', lambda: self._psutil(self.tweaks.apply_performance_tweaks))
+                results[name] = result
+            return results
+
+    async def run_with_monitor(self, coroutine, on_stats, interval=2.0):
+        """
+        Executa uma operação enquanto as estatísticas continuam sendo atualizadas
+
+        Args:
+            coroutine: Operação a executar (ex.: self.full_cleanup())
+            on_stats (callable): Chamado com cada amostra de estatísticas
+            interval (float): Intervalo entre amostras
+
+        Returns:
+            Resultado da operação
+        """
+        async def watch():
+            async for stats in self.monitor(interval):
+                on_stats(stats)
+
+        watcher = asyncio.create_task(watch())
+        try:
+            return await coroutine
+        finally:
+            watcher.cancel()
+            await asyncio.gather(watcher, return_exceptions=True)
+
+    def close(self):
+        self._psutil_executor.shutdown(wait=False, cancel_futures=True)
+        self._fs_executor.shutdown(wait=False, cancel_futures=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+        return False
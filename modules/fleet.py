@@ -0,0 +1,456 @@
+"""
+Módulo de agente/coletor para agregar vários hosts
+
+O agente roda sem interface e publica snapshots do SystemMonitor/ProcessManager
+via TCP ou Unix socket. O coletor (asyncio) mantém uma conexão persistente por
+agente e monta uma visão da frota inteira.
+
+Protocolo: cada frame é um cabeçalho `!IB` (tamanho do payload, flags) seguido
+de JSON compacto, opcionalmente comprimido com zlib (flag 0x01).
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+import socket
+import struct
+import time
+import zlib
+
+from process_manager import ProcessManager
+from system_monitor import SystemMonitor
+
+FRAME_HEADER = struct.Struct('!IB')
+FLAG_COMPRESSED = 0x01
+COMPRESS_MIN_SIZE = 512
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+DEFAULT_PORT = 8765
+
+logger = logging.getLogger(__name__)
+
+
+def encode_frame(message):
+    """
+    Serializa uma mensagem em um frame do protocolo
+
+    Args:
+        message (dict): Mensagem a enviar
+
+    Returns:
+        bytes: Frame pronto para escrita no socket
+    """
+    payload = json.dumps(message, separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8')
+    flags = 0
+
+    if len(payload) >= COMPRESS_MIN_SIZE:
+        compressed = zlib.compress(payload, 1)
+        if len(compressed) < len(payload):
+            payload = compressed
+            flags |= FLAG_COMPRESSED
+
+    return FRAME_HEADER.pack(len(payload), flags) + payload
+
+
+def decode_payload(payload, flags):
+    """Decodifica o payload de um frame"""
+    if flags & FLAG_COMPRESSED:
+        payload = zlib.decompress(payload)
+    return json.loads(payload)
+
+
+async def read_frame(reader):
+    """
+    Lê um frame completo de um StreamReader
+
+    Returns:
+        dict: Mensagem decodificada
+    """
+    header = await reader.readexactly(FRAME_HEADER.size)
+    size, flags = FRAME_HEADER.unpack(header)
+
+    if size > MAX_FRAME_SIZE:
+        raise ValueError(f"Frame muito grande: {size} bytes")
+
+    payload = await reader.readexactly(size)
+    return decode_payload(payload, flags)
+
+
+def parse_address(address):
+    """
+    Converte 'host:porta', 'porta' ou caminho de Unix socket em tupla de endereço
+
+    Returns:
+        tuple: ('unix', caminho) ou ('tcp', host, porta)
+    """
+    if isinstance(address, (tuple, list)):
+        return ('tcp', address[0], int(address[1]))
+
+    if address.startswith('unix:'):
+        return ('unix', address[5:])
+    if os.sep in address and ':' not in address:
+        return ('unix', address)
+
+    host, _, port = address.rpartition(':')
+    return ('tcp', host or '127.0.0.1', int(port or DEFAULT_PORT))
+
+
+def format_address(parsed):
+    """Representação textual de um endereço já convertido"""
+    if parsed[0] == 'unix':
+        return f"unix:{parsed[1]}"
+    return f"{parsed[1]}:{parsed[2]}"
+
+
+class FleetAgent:
+    def __init__(self, address=None, interval=2.0, top_limit=5, monitor=None, manager=None):
+        self.address = parse_address(address or f"127.0.0.1:{DEFAULT_PORT}")
+        self.interval = interval
+        self.top_limit = top_limit
+        self.monitor = monitor or SystemMonitor()
+        # o ProcessManager compartilha o registro do monitor: uma única varredura por amostra
+        self.manager = manager or ProcessManager(registry=getattr(self.monitor, 'registry', None))
+        self.hostname = socket.gethostname()
+
+        self._snapshot = None
+        self._frame = None
+        self._updated = None
+        self._server = None
+        self._sampler = None
+
+    def take_snapshot(self):
+        """
+        Coleta um snapshot compacto do host (bloqueante)
+
+        Returns:
+            dict: Estatísticas, top processos por CPU/memória e processos pesados
+        """
+        stats = self.monitor.get_real_time_stats()
+        stats.pop('cpu_cores', None)
+        heavy = self._compact_processes(self.manager.get_resource_heavy_processes())
+
+        return {
+            'op': 'snapshot',
+            'host': self.hostname,
+            'ts': time.time(),
+            'stats': stats,
+            'top_cpu': self._compact_processes(self.monitor.get_top_processes(self.top_limit, 'cpu')),
+            'top_memory': self._compact_processes(self.monitor.get_top_processes(self.top_limit, 'memory')),
+            'heavy_count': len(heavy),
+            'heavy': heavy[:self.top_limit],
+        }
+
+    def _compact_processes(self, processes):
+        """Reduz a lista de processos a [pid, nome, cpu, memória MB]"""
+        compact = []
+        for proc in processes:
+            if 'error' in proc:
+                continue
+            compact.append([
+                proc['pid'],
+                proc['name'],
+                round(proc.get('cpu_percent') or 0.0, 1),
+                round(proc.get('memory_mb') or 0.0, 1),
+            ])
+        return compact
+
+    async def _sample_loop(self):
+        """Atualiza o snapshot em segundo plano, fora do event loop"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            try:
+                snapshot = await loop.run_in_executor(None, self.take_snapshot)
+                self._snapshot = snapshot
+                self._publish(snapshot)
+            except Exception as e:
+                logger.exception("Falha ao coletar o snapshot do agente")
+                # os clientes recebem o erro em vez de esperarem por um snapshot que não vem
+                self._publish({'op': 'error', 'host': self.hostname, 'ts': time.time(),
+                               'error': str(e) or e.__class__.__name__})
+            await asyncio.sleep(self.interval)
+
+    def _publish(self, message):
+        # o frame é codificado uma vez e reaproveitado por todos os clientes
+        self._frame = encode_frame(message)
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    async def _wait_frame(self):
+        """Aguarda o primeiro snapshot disponível"""
+        while self._frame is None:
+            await self._updated.wait()
+        return self._frame
+
+    async def _handle_client(self, reader, writer):
+        try:
+            while True:
+                request = await read_frame(reader)
+                op = request.get('op')
+
+                if op == 'snapshot':
+                    writer.write(await self._wait_frame())
+                    await writer.drain()
+                elif op == 'subscribe':
+                    await self._stream(writer)
+                    return
+                elif op == 'ping':
+                    writer.write(encode_frame({'op': 'pong', 'host': self.hostname, 'ts': time.time()}))
+                    await writer.drain()
+                else:
+                    writer.write(encode_frame({'op': 'error', 'error': f"Operação desconhecida: {op}"}))
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _stream(self, writer):
+        """Envia cada novo snapshot ao assinante até a conexão cair"""
+        writer.write(await self._wait_frame())
+        await writer.drain()
+
+        while True:
+            await self._updated.wait()
+            writer.write(self._frame)
+            await writer.drain()
+
+    async def start(self):
+        """Inicia o servidor e o amostrador"""
+        self._updated = asyncio.Event()
+        self._sampler = asyncio.create_task(self._sample_loop())
+
+        if self.address[0] == 'unix':
+            if os.path.exists(self.address[1]):
+                os.unlink(self.address[1])
+            self._server = await asyncio.start_unix_server(self._handle_client, path=self.address[1])
+        else:
+            self._server = await asyncio.start_server(self._handle_client, self.address[1], self.address[2])
+
+        return self._server
+
+    async def stop(self):
+        if self._sampler:
+            self._sampler.cancel()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    def run(self):
+        """Executa o agente até Ctrl+C"""
+        try:
+            asyncio.run(self.serve_forever())
+        except KeyboardInterrupt:
+            pass
+
+
+class FleetCollector:
+    def __init__(self, agents, interval=2.0, mode='subscribe', timeout=5.0, max_backoff=30.0):
+        self.agents = [parse_address(agent) for agent in agents]
+        self.interval = interval
+        self.mode = mode
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.hosts = {}
+        self._tasks = []
+
+    async def _open(self, address):
+        if address[0] == 'unix':
+            connect = asyncio.open_unix_connection(address[1])
+        else:
+            connect = asyncio.open_connection(address[1], address[2])
+        return await asyncio.wait_for(connect, self.timeout)
+
+    def _update(self, key, snapshot):
+        if snapshot.get('op') == 'error':
+            # agente alcançável, mas sem conseguir amostrar o host
+            self._mark_offline(key, snapshot.get('error') or 'erro no agente')
+            return
+        snapshot['online'] = True
+        snapshot['last_seen'] = time.time()
+        self.hosts[key] = snapshot
+
+    def _mark_offline(self, key, error):
+        entry = self.hosts.setdefault(key, {'host': key})
+        entry['online'] = False
+        entry['error'] = error
+
+    async def _follow(self, address):
+        """Mantém a conexão com um agente, reconectando com backoff"""
+        key = format_address(address)
+        backoff = 1.0
+
+        while True:
+            writer = None
+            try:
+                reader, writer = await self._open(address)
+                backoff = 1.0
+
+                if self.mode == 'subscribe':
+                    writer.write(encode_frame({'op': 'subscribe'}))
+                    await writer.drain()
+                    while True:
+                        # sem frame por várias rodadas o agente é considerado travado
+                        snapshot = await asyncio.wait_for(read_frame(reader), self.timeout + self.interval * 3)
+                        self._update(key, snapshot)
+                else:
+                    request = encode_frame({'op': 'snapshot'})
+                    while True:
+                        writer.write(request)
+                        await writer.drain()
+                        snapshot = await asyncio.wait_for(read_frame(reader), self.timeout + self.interval * 3)
+                        self._update(key, snapshot)
+                        await asyncio.sleep(self.interval)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._mark_offline(key, str(e) or e.__class__.__name__)
+            finally:
+                if writer is not None:
+                    writer.close()
+
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    async def start(self):
+        self._tasks = [asyncio.create_task(self._follow(address)) for address in self.agents]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def run(self, duration=None, on_update=None):
+        """
+        Coleta os agentes por um período (ou indefinidamente)
+
+        Args:
+            duration (float): Tempo em segundos (None para sempre)
+            on_update (callable): Chamado com fleet_view() a cada intervalo
+
+        Returns:
+            dict: Última visão da frota
+        """
+        await self.start()
+        try:
+            end_time = time.time() + duration if duration is not None else None
+            while end_time is None or time.time() < end_time:
+                await asyncio.sleep(self.interval)
+                if on_update:
+                    on_update(self.fleet_view())
+        finally:
+            await self.stop()
+
+        return self.fleet_view()
+
+    def fleet_view(self, limit=10):
+        """
+        Monta a visão agregada da frota
+
+        Args:
+            limit (int): Número de maiores consumidores da frota
+
+        Returns:
+            dict: Hosts, médias e maiores consumidores
+        """
+        online = [h for h in self.hosts.values() if h.get('online')]
+
+        def average(key):
+            values = [h['stats'][key] for h in online if key in h.get('stats', {})]
+            return sum(values) / len(values) if values else 0.0
+
+        def top(field, index):
+            candidates = (
+                (proc[index], h['host'], proc)
+                for h in online for proc in h.get(field, [])
+            )
+            return [
+                {'host': host, 'pid': proc[0], 'name': proc[1], 'cpu_percent': proc[2], 'memory_mb': proc[3]}
+                for _, host, proc in heapq.nlargest(limit, candidates, key=lambda c: c[0])
+            ]
+
+        return {
+            'hosts_total': len(self.agents),
+            'hosts_online': len(online),
+            'avg_cpu': average('cpu'),
+            'avg_memory': average('memory'),
+            'top_cpu': top('top_cpu', 2),
+            'top_memory': top('top_memory', 3),
+            'hosts': {
+                key: {
+                    'host': h.get('host', key),
+                    'online': h.get('online', False),
+                    'cpu': h.get('stats', {}).get('cpu'),
+                    'memory': h.get('stats', {}).get('memory'),
+                    'top_cpu': h.get('top_cpu', [])[:3],
+                    'heavy_count': h.get('heavy_count', 0),
+                    'heavy': h.get('heavy', []),
+                    'error': h.get('error') or h.get('stats', {}).get('error'),
+                }
+                for key, h in self.hosts.items()
+            }
+        }
+
+
+def print_fleet_view(view):
+    """Exibe a visão da frota no terminal"""
+    from colorama import Fore
+
+    print(f"\n{Fore.YELLOW}🌐 Frota: {view['hosts_online']}/{view['hosts_total']} hosts online")
+    print(f"{Fore.CYAN}CPU média: {Fore.WHITE}{view['avg_cpu']:.1f}%  "
+          f"{Fore.CYAN}RAM média: {Fore.WHITE}{view['avg_memory']:.1f}%")
+    print("=" * 60)
+
+    for key, host in sorted(view['hosts'].items()):
+        if not host['online']:
+            print(f"{Fore.RED}{key} - offline ({host['error']})")
+            continue
+        if host['cpu'] is None or host['memory'] is None:
+            # agente conectado, mas a coleta do host falhou
+            print(f"{Fore.RED}{host['host']} ({key}) - indisponível ({host['error']})")
+            continue
+        consumers = ', '.join(f"{p[1]} {p[2]:.0f}%" for p in host['top_cpu'])
+        print(f"{Fore.CYAN}{host['host']} ({key}): {Fore.WHITE}CPU {host['cpu']:.1f}% RAM {host['memory']:.1f}% "
+              f"| {host['heavy_count']} pesados | {consumers}")
+
+    print(f"\n{Fore.GREEN}Maiores consumidores de CPU da frota:")
+    for proc in view['top_cpu']:
+        print(f"{Fore.WHITE}{proc['host']}: {proc['name']} (PID {proc['pid']}) - {proc['cpu_percent']:.1f}%")
+
+
+if __name__ == "__main__":
+    import click
+
+    @click.group()
+    def cli():
+        """Agente e coletor da frota do iOptimizer"""
+
+    @cli.command()
+    @click.option('--listen', default=f"127.0.0.1:{DEFAULT_PORT}", help="host:porta ou unix:/caminho")
+    @click.option('--interval', default=2.0, help="Intervalo de amostragem em segundos")
+    def agent(listen, interval):
+        FleetAgent(listen, interval=interval).run()
+
+    @cli.command()
+    @click.argument('agents', nargs=-1, required=True)
+    @click.option('--interval', default=2.0, help="Intervalo de atualização em segundos")
+    @click.option('--mode', type=click.Choice(['subscribe', 'poll']), default='subscribe')
+    def collector(agents, interval, mode):
+        collector = FleetCollector(agents, interval=interval, mode=mode)
+        try:
+            asyncio.run(collector.run(on_update=print_fleet_view))
+        except KeyboardInterrupt:
+            pass
+
+    cli()
@@ -0,0 +1,135 @@
+"""
+Taxas de I/O por processo
+
+Calcula leituras/escritas em disco por segundo a partir da diferença de
+io_counters() entre duas amostras, usando os handles persistentes do
+ProcessRegistry. As conexões de rede vêm de uma única chamada
+psutil.net_connections() mapeada de volta para os pids.
+"""
+
+import threading
+import time
+from collections import Counter
+
+import psutil
+
+from process_registry import get_default_registry
+
+MB = 1024 * 1024
+
+
+class IoRateTracker:
+    def __init__(self, registry=None):
+        self.registry = registry if registry is not None else get_default_registry()
+        # (pid, create_time) -> (instante, read_bytes, write_bytes, read_count, write_count)
+        self._previous = {}
+        self._lock = threading.Lock()
+
+    def _read_counters(self, table):
+        counters = {}
+        for i in range(len(table)):
+            pid = table.pid[i]
+            proc = self.registry.handle(pid)
+            if proc is None:
+                continue
+            try:
+                io = proc.io_counters()
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess, AttributeError):
+                continue
+            counters[(pid, table.create_time[i])] = (
+                time.monotonic(), io.read_bytes, io.write_bytes, io.read_count, io.write_count, table.name[i]
+            )
+        return counters
+
+    def connection_counts(self):
+        """
+        Conexões de rede por pid a partir de uma única consulta ao sistema
+
+        Returns:
+            dict: pid -> {'connections', 'established', 'listening'} (vazio sem permissão)
+        """
+        try:
+            connections = psutil.net_connections(kind='inet')
+        except (psutil.AccessDenied, OSError):
+            return {}
+
+        total = Counter()
+        established = Counter()
+        listening = Counter()
+        for conn in connections:
+            if conn.pid is None:
+                continue
+            total[conn.pid] += 1
+            if conn.status == psutil.CONN_ESTABLISHED:
+                established[conn.pid] += 1
+            elif conn.status == psutil.CONN_LISTEN:
+                listening[conn.pid] += 1
+
+        return {
+            pid: {'connections': count, 'established': established[pid], 'listening': listening[pid]}
+            for pid, count in total.items()
+        }
+
+    def rates(self, interval=1.0):
+        """
+        Taxas de I/O de todos os processos desde a última chamada
+
+        Na primeira chamada (ou para processos novos) aguarda `interval`
+        segundos entre duas leituras.
+
+        Returns:
+            list: Dicts com pid, name, read/write em bytes/s e operações/s
+        """
+        with self._lock:
+            table = self.registry.table()
+            current = self._read_counters(table)
+
+            if not any(key in self._previous for key in current):
+                self._previous = current
+                time.sleep(interval)
+                table = self.registry.table()
+                current = self._read_counters(table)
+
+            results = []
+            for key, (now, read_bytes, write_bytes, read_count, write_count, name) in current.items():
+                previous = self._previous.get(key)
+                if previous is None:
+                    continue
+                elapsed = now - previous[0]
+                if elapsed <= 0:
+                    continue
+                results.append({
+                    'pid': key[0],
+                    'name': name,
+                    'read_bytes_per_sec': max(0, read_bytes - previous[1]) / elapsed,
+                    'write_bytes_per_sec': max(0, write_bytes - previous[2]) / elapsed,
+                    'read_ops_per_sec': max(0, read_count - previous[3]) / elapsed,
+                    'write_ops_per_sec': max(0, write_count - previous[4]) / elapsed,
+                })
+
+            self._previous = current
+            return results
+
+    def top_io_processes(self, limit=10, interval=1.0, include_network=True):
+        """
+        Maiores consumidores de I/O ("I/O hogs")
+
+        Args:
+            limit (int): Quantidade de processos
+            interval (float): Janela de medição na primeira chamada
+            include_network (bool): Inclui contagem de conexões por processo
+
+        Returns:
+            list: Processos ordenados por bytes/s de disco (e conexões)
+        """
+        rates = self.rates(interval)
+        network = self.connection_counts() if include_network else {}
+
+        for item in rates:
+            item['disk_mb_per_sec'] = (item['read_bytes_per_sec'] + item['write_bytes_per_sec']) / MB
+            net = network.get(item['pid'], {})
+            item['connections'] = net.get('connections', 0)
+            item['established'] = net.get('established', 0)
+
+        rates.sort(key=lambda x: (x['disk_mb_per_sec'], x['established'], x['connections']), reverse=True)
+        return rates[:limit]
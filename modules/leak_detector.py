@@ -0,0 +1,218 @@
+"""
+Detector de vazamento de memória
+
+Amostra o RSS (ou USS) de todos os processos ao longo do tempo e mantém, por
+processo, uma regressão linear sobre uma janela deslizante. Processos com
+inclinação positiva sustentada (MB/hora) e bom ajuste (R²) são reportados.
+
+As amostras ficam em arrays compactos indexados por slot: cada processo
+ocupa um slot com um buffer circular de (tempo, MB) e as somas da regressão
+(Σx, Σy, Σxy, Σx², Σy²), atualizadas em O(1) a cada amostra.
+"""
+
+import threading
+import time
+from array import array
+
+from memory_accounting import MemoryAccountant
+from process_registry import get_default_registry
+
+MB = 1024 * 1024
+
+
+class LeakDetector:
+    def __init__(self, registry=None, window=120, min_samples=10, min_slope_mb_h=5.0,
+                 min_r2=0.8, metric='rss', interval=60.0):
+        """
+        Args:
+            registry (ProcessRegistry): Registro de processos (padrão: o compartilhado)
+            window (int): Amostras mantidas por processo
+            min_samples (int): Amostras mínimas para avaliar a tendência
+            min_slope_mb_h (float): Crescimento mínimo em MB/hora
+            min_r2 (float): Coeficiente de determinação mínimo
+            metric (str): 'rss' ou 'uss' (USS é mais preciso, porém mais caro)
+            interval (float): Intervalo entre amostras no modo em segundo plano
+        """
+        self.registry = registry if registry is not None else get_default_registry()
+        self.window = window
+        self.min_samples = min_samples
+        self.min_slope_mb_h = min_slope_mb_h
+        self.min_r2 = min_r2
+        self.metric = metric
+        self.interval = interval
+        self._accountant = MemoryAccountant(self.registry, cache_ttl=0) if metric == 'uss' else None
+
+        self._t0 = time.time()
+        self._slots = {}  # (pid, create_time) -> slot
+        self._names = []
+        self._free = []
+
+        # colunas por slot
+        self._count = array('l')
+        self._next = array('l')
+        self._sx = array('d')
+        self._sy = array('d')
+        self._sxx = array('d')
+        self._sxy = array('d')
+        self._syy = array('d')
+        # buffers circulares: slot * window
+        self._xs = array('d')
+        self._ys = array('d')
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _allocate(self, key, name):
+        if self._free:
+            slot = self._free.pop()
+            self._names[slot] = name
+        else:
+            slot = len(self._names)
+            self._names.append(name)
+            for column in (self._count, self._next):
+                column.append(0)
+            for column in (self._sx, self._sy, self._sxx, self._sxy, self._syy):
+                column.append(0.0)
+            self._xs.extend(array('d', [0.0]) * self.window)
+            self._ys.extend(array('d', [0.0]) * self.window)
+
+        self._count[slot] = 0
+        self._next[slot] = 0
+        for column in (self._sx, self._sy, self._sxx, self._sxy, self._syy):
+            column[slot] = 0.0
+        self._slots[key] = slot
+        return slot
+
+    def _push(self, slot, x, y):
+        position = slot * self.window + self._next[slot]
+
+        if self._count[slot] == self.window:
+            # remove a amostra mais antiga da janela
+            old_x, old_y = self._xs[position], self._ys[position]
+            self._sx[slot] -= old_x
+            self._sy[slot] -= old_y
+            self._sxx[slot] -= old_x * old_x
+            self._sxy[slot] -= old_x * old_y
+            self._syy[slot] -= old_y * old_y
+        else:
+            self._count[slot] += 1
+
+        self._xs[position] = x
+        self._ys[position] = y
+        self._sx[slot] += x
+        self._sy[slot] += y
+        self._sxx[slot] += x * x
+        self._sxy[slot] += x * y
+        self._syy[slot] += y * y
+        self._next[slot] = (self._next[slot] + 1) % self.window
+
+    def sample(self):
+        """
+        Registra uma amostra de memória de todos os processos
+
+        Returns:
+            int: Quantidade de processos acompanhados
+        """
+        table = self.registry.table(max_age=0)
+        x = (time.time() - self._t0) / 3600
+        keys = [(table.pid[i], table.create_time[i]) for i in range(len(table))]
+
+        if self._accountant is not None:
+            full = self._accountant.full_info(keys)
+            values = [
+                full[key]['uss'] / MB if full.get(key) and full[key]['uss'] is not None else None
+                for key in keys
+            ]
+        else:
+            values = [rss / MB for rss in table.rss]
+
+        with self._lock:
+            live = set()
+            for i, key in enumerate(keys):
+                if values[i] is None:
+                    continue
+                slot = self._slots.get(key)
+                if slot is None:
+                    slot = self._allocate(key, table.name[i])
+                self._push(slot, x, values[i])
+                live.add(key)
+
+            for key in [k for k in self._slots if k not in live]:
+                self._free.append(self._slots.pop(key))
+
+            return len(self._slots)
+
+    def trends(self):
+        """
+        Tendência linear de todos os processos com amostras suficientes
+
+        Returns:
+            list: Dicts com pid, name, slope_mb_h, r2, samples e current_mb
+        """
+        results = []
+        with self._lock:
+            for (pid, create_time), slot in self._slots.items():
+                n = self._count[slot]
+                if n < self.min_samples:
+                    continue
+
+                sx, sy = self._sx[slot], self._sy[slot]
+                var_x = n * self._sxx[slot] - sx * sx
+                var_y = n * self._syy[slot] - sy * sy
+                cov = n * self._sxy[slot] - sx * sy
+                if var_x <= 0:
+                    continue
+
+                slope = cov / var_x
+                r2 = (cov * cov) / (var_x * var_y) if var_y > 0 else 0.0
+                last = slot * self.window + (self._next[slot] - 1) % self.window
+                first = slot * self.window + (self._next[slot] - n) % self.window
+
+                results.append({
+                    'pid': pid,
+                    'name': self._names[slot],
+                    'create_time': create_time,
+                    'slope_mb_h': slope,
+                    'r2': r2,
+                    'samples': n,
+                    'span_h': self._xs[last] - self._xs[first],
+                    'current_mb': self._ys[last],
+                })
+        return results
+
+    def report(self):
+        """
+        Processos com crescimento de memória sustentado
+
+        Returns:
+            list: Suspeitos de vazamento, do maior crescimento para o menor
+        """
+        suspects = [
+            trend for trend in self.trends()
+            if trend['slope_mb_h'] >= self.min_slope_mb_h and trend['r2'] >= self.min_r2
+        ]
+        suspects.sort(key=lambda x: x['slope_mb_h'], reverse=True)
+        return suspects
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception:
+                pass
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Inicia a amostragem em uma thread de fundo"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='leak-detector', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
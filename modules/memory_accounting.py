@@ -0,0 +1,205 @@
+"""
+Contabilização de memória por aplicação
+
+Agrupa processos pela árvore (ex.: todas as instâncias do Chrome abaixo do
+processo principal) e soma a memória única (USS) e proporcional (PSS) de cada
+grupo. Diferente do RSS, o USS é o que realmente volta ao sistema quando a
+árvore é encerrada, pois não conta páginas compartilhadas.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import psutil
+
+from process_registry import get_default_registry
+
+MB = 1024 * 1024
+
+
+class MemoryAccountant:
+    def __init__(self, registry=None, max_workers=8, cache_ttl=30):
+        self.registry = registry if registry is not None else get_default_registry()
+        self.max_workers = max_workers
+        self.cache_ttl = cache_ttl
+        # (pid, create_time) -> (instante da leitura, dict com uss/pss/swap ou None)
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _read_full_info(self, key):
+        """Lê memory_full_info de um processo (chamado nas threads do pool)"""
+        pid, create_time = key
+        try:
+            proc = psutil.Process(pid)
+            if proc.create_time() != create_time:
+                return None
+            full = proc.memory_full_info()
+            return {
+                'uss': getattr(full, 'uss', None),
+                'pss': getattr(full, 'pss', None),
+                'swap': getattr(full, 'swap', None),
+            }
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return None
+
+    def full_info(self, keys):
+        """
+        Obtém USS/PSS de vários processos, em paralelo e com cache
+
+        Args:
+            keys (iterable): Chaves (pid, create_time)
+
+        Returns:
+            dict: chave -> {'uss', 'pss', 'swap'} (None se inacessível)
+        """
+        now = time.monotonic()
+        results = {}
+        missing = []
+
+        with self._lock:
+            for key in keys:
+                cached = self._cache.get(key)
+                if cached and now - cached[0] < self.cache_ttl:
+                    results[key] = cached[1]
+                else:
+                    missing.append(key)
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as pool:
+                fetched = dict(zip(missing, pool.map(self._read_full_info, missing)))
+
+            with self._lock:
+                for key, info in fetched.items():
+                    self._cache[key] = (now, info)
+            results.update(fetched)
+
+        return results
+
+    def prune(self, live_keys):
+        """Remove do cache processos que não existem mais"""
+        live_keys = set(live_keys)
+        with self._lock:
+            for key in [k for k in self._cache if k not in live_keys]:
+                del self._cache[key]
+
+    def application_groups(self, table=None):
+        """
+        Agrupa os processos por aplicação ao longo da árvore de processos
+
+        A raiz de um grupo é o ancestral mais alto com o mesmo nome do
+        processo; filhos com o mesmo nome entram no grupo da raiz.
+
+        Returns:
+            dict: (pid, create_time) da raiz -> {'name', 'indices'}
+        """
+        if table is None:
+            table = self.registry.table()
+        index_by_pid = {pid: i for i, pid in enumerate(table.pid)}
+        roots = {}
+
+        def find_root(i):
+            path = []
+            # ppids inconsistentes (pids reutilizados) podem formar ciclos
+            visited = set()
+            name = table.name[i].lower()
+            while True:
+                if i in roots:
+                    root = roots[i]
+                    break
+                path.append(i)
+                visited.add(i)
+                parent = index_by_pid.get(table.ppid[i])
+                if parent is None or parent in visited or table.name[parent].lower() != name \
+                        or table.create_time[parent] > table.create_time[i]:
+                    root = i
+                    break
+                i = parent
+            for j in path:
+                roots[j] = root
+            return root
+
+        groups = {}
+        for i in range(len(table)):
+            root = find_root(i)
+            key = (table.pid[root], table.create_time[root])
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = {'name': table.name[root], 'indices': []}
+            group['indices'].append(i)
+
+        return groups
+
+    def application_memory(self, table=None, names=None, limit=None):
+        """
+        Memória real por aplicação (árvore de processos)
+
+        Args:
+            table (ProcessTable): Snapshot a usar (padrão: o do registro)
+            names (iterable): Restringe a estes nomes de processo (opcional)
+            limit (int): Quantidade máxima de aplicações (pelo maior RSS)
+
+        Returns:
+            list: Um dict por aplicação com pids, rss_mb, uss_mb, pss_mb (None
+            se a plataforma não informa PSS) e 'accurate' (False se algum
+            processo não permitiu ler o USS)
+        """
+        if table is None:
+            table = self.registry.table()
+        groups = self.application_groups(table)
+
+        if names is not None:
+            names = {name.lower() for name in names}
+            groups = {k: g for k, g in groups.items() if g['name'].lower() in names}
+
+        ranked = sorted(
+            groups.items(),
+            key=lambda item: sum(table.rss[i] for i in item[1]['indices']),
+            reverse=True
+        )
+        if limit is not None:
+            ranked = ranked[:limit]
+
+        keys = [(table.pid[i], table.create_time[i]) for _, g in ranked for i in g['indices']]
+        full = self.full_info(keys)
+        self.prune((table.pid[i], table.create_time[i]) for i in range(len(table)))
+
+        applications = []
+        for (root_pid, _), group in ranked:
+            rss = uss = 0
+            pss = None
+            accurate = True
+            for i in group['indices']:
+                rss += table.rss[i]
+                info = full.get((table.pid[i], table.create_time[i]))
+                if info and info['uss'] is not None:
+                    uss += info['uss']
+                    if info['pss'] is not None:
+                        pss = (pss or 0) + info['pss']
+                else:
+                    accurate = False
+
+            applications.append({
+                'name': group['name'],
+                'root_pid': root_pid,
+                'pids': [table.pid[i] for i in group['indices']],
+                'process_count': len(group['indices']),
+                'rss_mb': rss / MB,
+                'uss_mb': uss / MB,
+                'pss_mb': pss / MB if pss is not None else None,
+                'accurate': accurate,
+            })
+
+        return applications
+
+    def unique_memory_mb(self, keys):
+        """
+        USS (em MB) de cada processo indicado, ou None para os inacessíveis
+
+        Returns:
+            dict: chave -> MB (ou None)
+        """
+        return {
+            key: (info['uss'] / MB if info and info['uss'] is not None else None)
+            for key, info in self.full_info(keys).items()
+        }
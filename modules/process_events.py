@@ -0,0 +1,216 @@
+"""
+Fluxo de eventos de início/fim de processos
+
+Compara os processos entre leituras pela chave (pid, create_time), para que
+um pid reutilizado entre duas leituras apareça como um fim e um início. A
+cada leitura só o conjunto barato de psutil.pids() é comparado; create_time
+e nome são resolvidos apenas para os pids novos. A reutilização de pids já
+conhecidos é detectada relendo o create_time deles a cada `verify_every`
+leituras. Os eventos podem ser consumidos por callbacks ou por um iterador
+assíncrono.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+
+import psutil
+
+
+def boot_time_correction():
+    """
+    Diferença entre o boot time real e o usado pelo psutil
+
+    No Linux o psutil soma ao início do processo (em ticks desde o boot) o
+    btime de /proc/stat, que é truncado para segundos inteiros; sem esta
+    correção create_time fica até 1 s antes do instante real e a duração de
+    processos curtos sai inflada.
+    """
+    if not sys.platform.startswith('linux') or not hasattr(time, 'CLOCK_BOOTTIME'):
+        return 0.0
+    correction = time.time() - time.clock_gettime(time.CLOCK_BOOTTIME) - psutil.boot_time()
+    return correction if 0.0 <= correction < 1.0 else 0.0
+
+
+class ProcessEventStream:
+    def __init__(self, interval=0.25, verify_every=8):
+        """
+        Args:
+            interval (float): Intervalo entre leituras da thread de fundo
+            verify_every (int): A cada quantas leituras o create_time dos pids
+                já conhecidos é relido para detectar reutilização
+        """
+        self.interval = interval
+        self.verify_every = max(1, verify_every)
+        # (pid, create_time) -> nome
+        self._known = {}
+        # pid -> chave (pid, create_time) atualmente associada
+        self._by_pid = {}
+        self._poll_count = 0
+        self._callbacks = []
+        self._primed = False
+        self._clock_correction = boot_time_correction()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.started_count = 0
+        self.exited_count = 0
+        # processos que terminaram antes de serem resolvidos
+        self.transient_count = 0
+
+    def subscribe(self, callback):
+        """Registra uma função chamada com cada evento (dict)"""
+        self._callbacks.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        if callback in self._callbacks:
+            self._callbacks.remove(callback)
+
+    def _key(self, pid):
+        """Chave (pid, create_time); create_time é None se o acesso for negado"""
+        try:
+            return (pid, psutil.Process(pid).create_time())
+        except psutil.AccessDenied:
+            return (pid, None)
+
+    def _name(self, pid):
+        try:
+            return psutil.Process(pid).name()
+        except psutil.AccessDenied:
+            return None
+
+    def poll(self):
+        """
+        Compara os processos atuais com os da leitura anterior
+
+        A primeira chamada apenas registra os processos existentes.
+
+        Returns:
+            list: Eventos 'started' e 'exited' desde a última leitura
+        """
+        with self._lock:
+            now = time.time()
+            pids = set(psutil.pids())
+            verify = self._poll_count % self.verify_every == 0
+            self._poll_count += 1
+            events = []
+            new_pids = pids - self._by_pid.keys()
+            gone = [self._by_pid[pid] for pid in self._by_pid.keys() - pids]
+
+            if verify:
+                for pid in pids & self._by_pid.keys():
+                    try:
+                        key = self._key(pid)
+                    except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                        gone.append(self._by_pid[pid])
+                        continue
+                    if key != self._by_pid[pid]:
+                        # pid reutilizado desde a última verificação
+                        gone.append(self._by_pid[pid])
+                        new_pids.add(pid)
+
+            for key in gone:
+                pid, create_time = key
+                name = self._known.pop(key)
+                del self._by_pid[pid]
+                self.exited_count += 1
+                events.append({
+                    'type': 'exited',
+                    'pid': pid,
+                    'name': name,
+                    'create_time': create_time,
+                    'exit_time': now,
+                    # o fim só é notado na leitura seguinte: a duração pode exceder a real em até `interval`
+                    'lifetime': max(0.0, now - create_time - self._clock_correction) if create_time else None,
+                    'time': now,
+                })
+
+            for pid in new_pids:
+                try:
+                    key = self._key(pid)
+                    name = self._name(pid)
+                except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                    self.transient_count += 1
+                    continue
+
+                self._known[key] = name
+                self._by_pid[pid] = key
+                if not self._primed:
+                    continue
+                self.started_count += 1
+                events.append({
+                    'type': 'started',
+                    'pid': pid,
+                    'name': name,
+                    'create_time': key[1],
+                    'time': now,
+                })
+
+            self._primed = True
+
+        for event in events:
+            for callback in list(self._callbacks):
+                try:
+                    callback(event)
+                except Exception:
+                    continue
+
+        return events
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception:
+                pass
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Inicia a observação em uma thread de fundo"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='process-events', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    async def events(self):
+        """
+        Iterador assíncrono de eventos
+
+        Se a thread de observação estiver ativa, os eventos dela são
+        repassados; caso contrário, o próprio iterador faz as leituras.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        def forward(event):
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+        if self.running:
+            self.subscribe(forward)
+            try:
+                while True:
+                    yield await queue.get()
+            finally:
+                self.unsubscribe(forward)
+        else:
+            while True:
+                for event in await asyncio.to_thread(self.poll):
+                    yield event
+                await asyncio.sleep(self.interval)
+
+    def __aiter__(self):
+        return self.events()
@@ -0,0 +1,330 @@
+"""
+Governador de processos
+
+Em vez de encerrar processos, aplica políticas de prioridade (nice, afinidade
+de CPU e prioridade de I/O) a processos selecionados por nome, usuário ou uso
+de recursos, e restaura os valores originais quando o uso volta ao normal.
+
+O casamento por nome/usuário é feito apenas quando um processo aparece; a
+cada ciclo só são avaliados os limites de recursos sobre a tabela colunar.
+O governador mantém seu próprio conjunto de chaves (pid, create_time) já
+vistas e o compara com a tabela do registro, então inícios e fins não se
+perdem quando outro consumidor atualiza o registro compartilhado antes.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+import psutil
+
+from process_registry import get_default_registry
+
+if os.name == 'nt':
+    LOWER_PRIORITY = psutil.BELOW_NORMAL_PRIORITY_CLASS
+    IDLE_IO_PRIORITY = psutil.IOPRIO_VERYLOW
+else:
+    LOWER_PRIORITY = 10
+    IDLE_IO_PRIORITY = getattr(psutil, 'IOPRIO_CLASS_IDLE', None)
+
+
+class GovernorPolicy:
+    def __init__(self, name, match_names=None, match_users=None, cpu_above=None, rss_above_mb=None,
+                 nice=LOWER_PRIORITY, cpu_affinity=None, ionice=None, calm_below=None, calm_ticks=3):
+        """
+        Args:
+            name (str): Nome da política
+            match_names (iterable): Nomes de processo (sem diferenciar maiúsculas)
+            match_users (iterable): Usuários donos dos processos
+            cpu_above (float): Aplica quando CPU % passar deste limite
+            rss_above_mb (float): Aplica quando o RSS passar deste limite
+            nice (int): Novo nice/classe de prioridade (None para não alterar)
+            cpu_affinity (list): CPUs permitidas (None para não alterar)
+            ionice (int): Classe de prioridade de I/O (None para não alterar)
+            calm_below (float): CPU % considerada calma (padrão: metade de cpu_above)
+            calm_ticks (int): Ciclos calmos seguidos antes de restaurar
+        """
+        self.name = name
+        self.match_names = {n.lower() for n in match_names} if match_names else None
+        self.match_users = set(match_users) if match_users else None
+        self.cpu_above = cpu_above
+        self.rss_above_mb = rss_above_mb
+        self.nice = nice
+        self.cpu_affinity = cpu_affinity
+        self.ionice = ionice
+        self.calm_below = calm_below if calm_below is not None else (cpu_above / 2 if cpu_above else None)
+        self.calm_ticks = calm_ticks
+
+    @property
+    def has_limits(self):
+        return self.cpu_above is not None or self.rss_above_mb is not None
+
+    def matches(self, info):
+        """Critérios estáticos (nome/usuário), avaliados quando o processo surge"""
+        if self.match_names is not None and (info.get('name') or '').lower() not in self.match_names:
+            return False
+        if self.match_users is not None and info.get('username') not in self.match_users:
+            return False
+        return True
+
+    def is_hot(self, table, i):
+        if self.cpu_above is not None and table.cpu_percent[i] > self.cpu_above:
+            return True
+        if self.rss_above_mb is not None and table.rss[i] > self.rss_above_mb * 1024 * 1024:
+            return True
+        return False
+
+    def is_calm(self, table, i):
+        if self.cpu_above is not None and table.cpu_percent[i] >= self.calm_below:
+            return False
+        if self.rss_above_mb is not None and table.rss[i] > self.rss_above_mb * 1024 * 1024:
+            return False
+        return True
+
+
+class ProcessGovernor:
+    def __init__(self, policies, registry=None, interval=2.0, exclude_names=None):
+        self.policies = list(policies)
+        self.registry = registry if registry is not None else get_default_registry()
+        self.interval = interval
+        self.exclude_names = {n.lower() for n in (exclude_names or [])}
+
+        # índice da política -> chaves (pid, create_time) que casam com nome/usuário
+        self._candidates = [set() for _ in self.policies]
+        # chave -> {'policy', 'name', 'original', 'calm'}
+        self._applied = {}
+        # chave -> entrada cuja restauração falhou (com 'error' e 'unrestored')
+        self._unrestored = {}
+        # chaves (pid, create_time) presentes na última tabela observada
+        self._known = set()
+        self.actions = deque(maxlen=500)
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _on_started(self, info):
+        if (info.get('name') or '').lower() in self.exclude_names:
+            return
+        key = (info['pid'], info['create_time'])
+        for index, policy in enumerate(self.policies):
+            if policy.matches(info):
+                self._candidates[index].add(key)
+
+    def _on_exited(self, key):
+        for candidates in self._candidates:
+            candidates.discard(key)
+        self._applied.pop(key, None)
+        self._unrestored.pop(key, None)
+
+    def _diff(self, table):
+        """
+        Compara a tabela com as chaves já vistas e trata inícios e fins
+
+        Returns:
+            dict: chave (pid, create_time) -> índice da linha na tabela
+        """
+        index_by_key = {}
+        for i in range(len(table)):
+            index_by_key[(table.pid[i], table.create_time[i])] = i
+
+        for key in self._known - index_by_key.keys():
+            self._on_exited(key)
+
+        for key in index_by_key.keys() - self._known:
+            info = self.registry.get(key[0])
+            if info is None or info['create_time'] != key[1]:
+                # o registro já trocou o processo deste pid: usa a linha da tabela
+                info = table.row(index_by_key[key])
+            self._on_started(info)
+
+        self._known = set(index_by_key)
+        return index_by_key
+
+    def _log(self, action, key, name, policy, detail=None):
+        self.actions.append({
+            'time': time.time(),
+            'action': action,
+            'pid': key[0],
+            'name': name,
+            'policy': policy.name,
+            'detail': detail,
+        })
+
+    def _apply(self, key, name, policy):
+        try:
+            proc = psutil.Process(key[0])
+            if proc.create_time() != key[1]:
+                return
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            return
+        # cada valor original só é guardado depois que a alteração foi aceita
+        original = {}
+
+        try:
+            if policy.nice is not None:
+                current = proc.nice()
+                proc.nice(policy.nice)
+                original['nice'] = current
+            if policy.cpu_affinity is not None and hasattr(proc, 'cpu_affinity'):
+                current = proc.cpu_affinity()
+                proc.cpu_affinity(policy.cpu_affinity)
+                original['cpu_affinity'] = current
+            if policy.ionice is not None and hasattr(proc, 'ionice'):
+                current = proc.ionice()
+                proc.ionice(policy.ionice)
+                original['ionice'] = tuple(current) if isinstance(current, tuple) else current
+
+        except psutil.AccessDenied as e:
+            self._log('denied', key, name, policy, str(e))
+            if not original:
+                return
+        except (ValueError, TypeError) as e:
+            # valor inválido na política (ex.: CPU inexistente): o que já mudou
+            # continua registrado para ser restaurado depois
+            self._log('error', key, name, policy, str(e))
+            if not original:
+                return
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            return
+
+        self._applied[key] = {'policy': policy, 'name': name, 'original': original, 'calm': 0}
+        self._log('applied', key, name, policy, original)
+
+    def _restore(self, key):
+        """
+        Restaura os valores originais de um processo
+
+        Cada atributo é restaurado separadamente; os que falharem ficam em
+        unrestored() em vez de serem descartados.
+
+        Returns:
+            bool: True se tudo foi restaurado (ou o processo já saiu)
+        """
+        entry = self._applied.pop(key, None) or self._unrestored.pop(key, None)
+        if not entry:
+            return True
+        original = entry['original']
+        failed = {}
+
+        try:
+            proc = psutil.Process(key[0])
+            if proc.create_time() != key[1]:
+                return True
+
+            for attribute, value in original.items():
+                try:
+                    if attribute == 'nice':
+                        proc.nice(value)
+                    elif attribute == 'cpu_affinity':
+                        proc.cpu_affinity(value)
+                    elif isinstance(value, tuple):
+                        proc.ionice(*value)
+                    else:
+                        proc.ionice(value)
+                except psutil.AccessDenied as e:
+                    # em Linux, reduzir o nice de volta exige CAP_SYS_NICE (ou RLIMIT_NICE)
+                    failed[attribute] = str(e)
+
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            return True
+
+        if failed:
+            entry['unrestored'] = {attribute: original[attribute] for attribute in failed}
+            entry['error'] = '; '.join(f"{attribute}: {error}" for attribute, error in failed.items())
+            self._unrestored[key] = entry
+            self._log('restore_denied', key, entry['name'], entry['policy'], entry['error'])
+            return False
+
+        self._log('restored', key, entry['name'], entry['policy'], original)
+        return True
+
+    def tick(self):
+        """
+        Executa um ciclo do governador
+
+        Returns:
+            dict: Processos com política aplicada e com restauração pendente
+        """
+        with self._lock:
+            table = self.registry.table()
+            index_by_key = self._diff(table)
+
+            for index, policy in enumerate(self.policies):
+                for key in self._candidates[index]:
+                    i = index_by_key.get(key)
+                    if i is None or key in self._unrestored:
+                        # restauração negada: continua com a política, sem reaplicar
+                        continue
+
+                    entry = self._applied.get(key)
+                    if entry is None:
+                        if not policy.has_limits or policy.is_hot(table, i):
+                            self._apply(key, table.name[i], policy)
+                    elif entry['policy'] is policy and policy.has_limits:
+                        if policy.is_calm(table, i):
+                            entry['calm'] += 1
+                            if entry['calm'] >= policy.calm_ticks:
+                                self._restore(key)
+                        else:
+                            entry['calm'] = 0
+
+            return {'governed': len(self._applied), 'restore_failed': len(self._unrestored)}
+
+    def governed(self):
+        """Processos com política aplicada no momento"""
+        with self._lock:
+            return [
+                {'pid': key[0], 'name': entry['name'], 'policy': entry['policy'].name, 'original': entry['original']}
+                for key, entry in self._applied.items()
+            ]
+
+    def unrestored(self):
+        """Processos cujos valores originais não puderam ser restaurados"""
+        with self._lock:
+            return [
+                {'pid': key[0], 'name': entry['name'], 'policy': entry['policy'].name,
+                 'original': entry['unrestored'], 'error': entry['error']}
+                for key, entry in self._unrestored.items()
+            ]
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                self.actions.append({
+                    'time': time.time(),
+                    'action': 'error',
+                    'pid': None,
+                    'name': None,
+                    'policy': None,
+                    'detail': f"{type(e).__name__}: {e}",
+                })
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Inicia o governador em uma thread de fundo"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='process-governor', daemon=True)
+        self._thread.start()
+
+    def stop(self, restore=True):
+        """
+        Para o governador e, por padrão, restaura todos os processos
+
+        Returns:
+            list: Processos que não puderam ser restaurados (ver unrestored())
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if restore:
+            with self._lock:
+                for key in list(self._applied) + list(self._unrestored):
+                    self._restore(key)
+        return self.unrestored()
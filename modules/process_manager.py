@@ -3,34 +3,58 @@ Módulo para gerenciamento de processos do sistema
 """
 
 import psutil
+import threading
 import time
 import os
 from datetime import datetime
-from collections import defaultdict
+from collections import defaultdict, deque
+
+from io_monitor import IoRateTracker
+from leak_detector import LeakDetector
+from memory_accounting import MemoryAccountant
+from process_events import ProcessEventStream
+from process_governor import ProcessGovernor
+from process_registry import get_default_registry
+from streaming_stats import SeriesTracker
+
+CHEAP_DETAIL_FIELDS = (
+    'name', 'status', 'create_time', 'cpu_percent', 'memory_percent', 'memory_info',
+    'num_threads', 'username', 'cwd', 'exe', 'cmdline'
+)
+EXPENSIVE_DETAIL_FIELDS = ('connections', 'open_files')
+DETAIL_FIELDS = frozenset(CHEAP_DETAIL_FIELDS + EXPENSIVE_DETAIL_FIELDS)
+
+# aplicativos cujas instâncias excedentes optimize_processes encerra
+RESOURCE_WASTERS = (
+    'chrome.exe', 'firefox.exe', 'msedge.exe',
+    'spotify.exe', 'discord.exe', 'steam.exe',
+    'skype.exe', 'teams.exe'
+)
 
 class ProcessManager:
-    def __init__(self):
+    def __init__(self, registry=None):
+        self.registry = registry if registry is not None else get_default_registry()
+        self.memory = MemoryAccountant(self.registry)
+        self.io = IoRateTracker(self.registry)
         self.blocked_processes = [
             'System', 'Registry', 'smss.exe', 'csrss.exe', 'wininit.exe',
             'winlogon.exe', 'services.exe', 'lsass.exe', 'svchost.exe',
             'dwm.exe', 'explorer.exe'
         ]
-        self.process_history = defaultdict(list)
+        # nome -> últimos eventos de início/fim (preenchido por watch_process_events)
+        self.process_history = defaultdict(lambda: deque(maxlen=200))
+        self.events = None
+        # pid -> consulta de detalhes em andamento (thread possivelmente travada)
+        self._pending_details = {}
+        self._detail_lock = threading.Lock()
     
     def get_all_processes(self):
         
         try:
-            processes = []
+            processes = self.registry.processes()
             
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent', 
-                                           'memory_info', 'create_time', 'status', 'username']):
-                try:
-                    pinfo = proc.info
-                    pinfo['memory_mb'] = pinfo['memory_info'].rss / 1024 / 1024
-                    pinfo['create_time_str'] = datetime.fromtimestamp(pinfo['create_time']).strftime('%H:%M:%S')
-                    processes.append(pinfo)
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue
+            for pinfo in processes:
+                pinfo['create_time_str'] = datetime.fromtimestamp(pinfo['create_time']).strftime('%H:%M:%S')
             
             return processes
             
@@ -40,54 +64,171 @@ class ProcessManager:
     def get_resource_heavy_processes(self, cpu_threshold=5.0, memory_threshold=100):
         
         try:
-            heavy_processes = []
+            table = self.registry.table()
+            indices = table.filter(cpu_above=cpu_threshold, rss_above=memory_threshold * 1024 * 1024, any_of=True)
+            indices = table.top_k('cpu', len(indices), indices)
             
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent', 'memory_info']):
-                try:
-                    pinfo = proc.info
-                    memory_mb = pinfo['memory_info'].rss / 1024 / 1024
-                    
-                    if (pinfo['cpu_percent'] > cpu_threshold or memory_mb > memory_threshold):
-                        pinfo['memory_mb'] = memory_mb
-                        pinfo['cpu'] = pinfo['cpu_percent']
-                        pinfo['memory'] = pinfo['memory_percent']
-                        heavy_processes.append(pinfo)
-                        
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue
+            heavy_processes = self.registry.materialize(table, indices)
+            for pinfo in heavy_processes:
+                pinfo['cpu'] = pinfo['cpu_percent']
+                pinfo['memory'] = pinfo['memory_percent']
             
-            heavy_processes.sort(key=lambda x: x['cpu'], reverse=True)
             return heavy_processes
             
         except Exception as e:
             return [{'error': str(e)}]
     
-    def get_process_details(self, pid):
+    def get_application_memory(self, limit=10, names=None):
+        """
+        Memória por aplicação, agrupando a árvore de processos
+        
+        Args:
+            limit (int): Quantidade de aplicações (maiores primeiro)
+            names (iterable): Restringe a estes nomes de processo (opcional)
+            
+        Returns:
+            list: Aplicações com rss_mb, uss_mb (memória liberada ao encerrar)
+            e pss_mb, ordenadas por USS
+        """
+        try:
+            applications = self.memory.application_memory(names=names, limit=limit)
+            applications.sort(key=lambda x: x['uss_mb'], reverse=True)
+            return applications
             
+        except Exception as e:
+            return [{'error': str(e)}]
+    
+    def create_governor(self, policies, interval=2.0):
+        """
+        Cria um governador que reprioriza processos em vez de encerrá-los
+        
+        Processos em blocked_processes nunca são alterados.
+        
+        Args:
+            policies (list): Lista de GovernorPolicy
+            interval (float): Intervalo entre ciclos em segundos
+            
+        Returns:
+            ProcessGovernor: Governador (use start()/stop())
+        """
+        return ProcessGovernor(policies, registry=self.registry, interval=interval,
+                               exclude_names=self.blocked_processes)
+    
+    def create_leak_detector(self, **options):
+        """
+        Cria um detector de vazamento de memória sobre o registro de processos
+        
+        Args:
+            **options: Parâmetros de LeakDetector (window, min_slope_mb_h, metric...)
+            
+        Returns:
+            LeakDetector: Detector (use sample()/report() ou start()/stop())
+        """
+        return LeakDetector(registry=self.registry, **options)
+    
+    def get_io_heavy_processes(self, limit=10, interval=1.0):
+        """
+        Processos com maior I/O de disco, com contagem de conexões de rede
+        
+        Args:
+            limit (int): Quantidade de processos
+            interval (float): Janela de medição quando não há amostra anterior
+            
+        Returns:
+            list: Processos com read/write bytes/s, disk_mb_per_sec e conexões
+        """
         try:
-            proc = psutil.Process(pid)
+            return self.io.top_io_processes(limit=limit, interval=interval)
             
+        except Exception as e:
+            return [{'error': str(e)}]
+    
+    def watch_process_events(self, interval=0.25, callback=None):
+        """
+        Passa a registrar inícios/fins de processos em process_history
+        
+        Args:
+            interval (float): Intervalo entre leituras de pids
+            callback (callable): Função adicional chamada com cada evento
+            
+        Returns:
+            ProcessEventStream: Fluxo de eventos em execução
+        """
+        if self.events is None:
+            self.events = ProcessEventStream(interval=interval)
+            self.events.subscribe(self._record_event)
+        if callback:
+            self.events.subscribe(callback)
+        self.events.start()
+        return self.events
+    
+    def _record_event(self, event):
+        self.process_history[(event['name'] or '?').lower()].append(event)
+    
+    def get_process_churn(self, window=60):
+        """
+        Processos que mais iniciaram/terminaram na janela recente
+        
+        Args:
+            window (float): Janela em segundos
+            
+        Returns:
+            list: Dicts com name, started, exited e lifetime médio
+        """
+        since = time.time() - window
+        churn = []
+        
+        for name, events in list(self.process_history.items()):
+            recent = [e for e in list(events) if e['time'] >= since]
+            if not recent:
+                continue
+            lifetimes = [e['lifetime'] for e in recent if e['type'] == 'exited' and e.get('lifetime') is not None]
+            churn.append({
+                'name': name,
+                'started': sum(1 for e in recent if e['type'] == 'started'),
+                'exited': len([e for e in recent if e['type'] == 'exited']),
+                'avg_lifetime': sum(lifetimes) / len(lifetimes) if lifetimes else None
+            })
+        
+        churn.sort(key=lambda x: x['started'] + x['exited'], reverse=True)
+        return churn
+    
+    def get_process_details(self, pid, fields=None):
+        """
+        Obtém detalhes de um processo, lendo apenas os campos pedidos
+        
+        Os campos baratos são lidos dentro de um único Process.oneshot();
+        os caros (EXPENSIVE_DETAIL_FIELDS) só são consultados se pedidos.
+        
+        Args:
+            pid (int): PID do processo
+            fields (iterable): Campos desejados (padrão: DETAIL_FIELDS completos)
+            
+        Returns:
+            dict: Detalhes do processo (campos sem permissão são omitidos)
+        """
+        fields = DETAIL_FIELDS if fields is None else set(fields)
+        
+        try:
+            proc = psutil.Process(pid)
+            details = {'pid': proc.pid}
             
-            details = {
-                'pid': proc.pid,
-                'name': proc.name(),
-                'status': proc.status(),
-                'create_time': datetime.fromtimestamp(proc.create_time()).strftime('%Y-%m-%d %H:%M:%S'),
-                'cpu_percent': proc.cpu_percent(),
-                'memory_percent': proc.memory_percent(),
-                'memory_info': proc.memory_info()._asdict(),
-                'num_threads': proc.num_threads(),
-            }
+            with proc.oneshot():
+                for field in CHEAP_DETAIL_FIELDS:
+                    if field not in fields:
+                        continue
+                    try:
+                        details[field] = self._read_detail(proc, field)
+                    except psutil.AccessDenied:
+                        continue
             
-            try:
-                details['username'] = proc.username()
-                details['cwd'] = proc.cwd()
-                details['exe'] = proc.exe()
-                details['cmdline'] = ' '.join(proc.cmdline())
-                details['connections'] = len(proc.connections())
-                details['open_files'] = len(proc.open_files())
-            except (psutil.AccessDenied, psutil.NoSuchProcess):
-                pass
+            for field in EXPENSIVE_DETAIL_FIELDS:
+                if field not in fields:
+                    continue
+                try:
+                    details[field] = self._read_detail(proc, field)
+                except psutil.AccessDenied:
+                    continue
             
             return details
             
@@ -96,50 +237,202 @@ class ProcessManager:
         except Exception as e:
             return {'error': str(e)}
     
-    def kill_process(self, pid, force=False):
-       
-        try:
-            proc = psutil.Process(pid)
-            
-            if proc.name() in self.blocked_processes:
-                return False
+    def _read_detail(self, proc, field):
+        if field == 'create_time':
+            return datetime.fromtimestamp(proc.create_time()).strftime('%Y-%m-%d %H:%M:%S')
+        if field == 'cpu_percent':
+            # o registro mantém o contador de CPU aquecido; um handle novo sempre daria 0.0
+            info = self.registry.get(proc.pid)
+            return info['cpu_percent'] if info and 'cpu_percent' in info else proc.cpu_percent()
+        if field == 'memory_info':
+            return proc.memory_info()._asdict()
+        if field == 'cmdline':
+            return ' '.join(proc.cmdline())
+        if field == 'connections':
+            connections = getattr(proc, 'net_connections', None) or proc.connections
+            return len(connections())
+        if field == 'open_files':
+            return len(proc.open_files())
+        return getattr(proc, field)()
+    
+    def get_processes_details(self, pids, fields=None, timeout=2.0, max_workers=8):
+        """
+        Obtém detalhes de vários processos em paralelo
+        
+        Cada pid tem o próprio prazo de `timeout` segundos, contado a partir
+        do início da sua consulta. Uma thread presa em uma chamada que não
+        retorna é abandonada e substituída, sem segurar os pids seguintes nem
+        os próximos lotes; um pid cuja consulta anterior ainda não voltou não
+        recebe outra thread.
+        
+        Args:
+            pids (iterable): PIDs a consultar
+            fields (iterable): Campos desejados (ver get_process_details)
+            timeout (float): Tempo máximo por pid em segundos
+            max_workers (int): Consultas simultâneas
+            
+        Returns:
+            dict: pid -> detalhes
+        """
+        results = {}
+        jobs = []
+        
+        with self._detail_lock:
+            for pid in dict.fromkeys(pids):
+                if pid in self._pending_details:
+                    results[pid] = {'pid': pid, 'error': 'Tempo esgotado'}
+                    continue
+                job = {'pid': pid, 'done': threading.Event(), 'started': None, 'result': None, 'abandoned': False}
+                self._pending_details[pid] = job
+                jobs.append(job)
+        
+        queue = deque(jobs)
+        for _ in range(min(max_workers, len(jobs))):
+            self._start_detail_worker(queue, fields)
+        
+        # os workers pegam os pids em ordem: ao esperar por um pid, todos os
+        # anteriores já terminaram ou tiveram a thread substituída
+        for job in jobs:
+            while not job['done'].is_set():
+                started = job['started']
+                if started is None:
+                    job['done'].wait(0.01)
+                    continue
+                remaining = started + timeout - time.monotonic()
+                if remaining <= 0 or not job['done'].wait(remaining):
+                    break
             
-            if force:
-                proc.kill()  # SIGKILL
+            if job['done'].is_set():
+                results[job['pid']] = job['result']
             else:
-                proc.terminate()  # SIGTERM
-                
+                job['abandoned'] = True
+                self._start_detail_worker(queue, fields)
+                results[job['pid']] = {'pid': job['pid'], 'error': 'Tempo esgotado'}
+        
+        return results
+    
+    def _start_detail_worker(self, queue, fields):
+        threading.Thread(target=self._detail_worker, args=(queue, fields),
+                         name='process-details', daemon=True).start()
+    
+    def _detail_worker(self, queue, fields):
+        """Consulta os pids da fila até esvaziá-la ou ser abandonado"""
+        while True:
+            with self._detail_lock:
+                if not queue:
+                    return
+                job = queue.popleft()
+                job['started'] = time.monotonic()
+            
             try:
-                proc.wait(timeout=5)
-            except psutil.TimeoutExpired:
-                if not force:
+                job['result'] = self.get_process_details(job['pid'], fields)
+            finally:
+                with self._detail_lock:
+                    if self._pending_details.get(job['pid']) is job:
+                        del self._pending_details[job['pid']]
+                job['done'].set()
+            
+            if job['abandoned']:
+                # já foi substituída por outra thread
+                return
+    
+    def kill_process(self, pid, force=False, create_time=None):
+       
+        target = (pid, create_time) if create_time is not None else pid
+        result = self.terminate_processes([target], force=force)
+        return pid in result['terminated']
+    
+    def _signal_handle(self, target):
+        """
+        Handle para sinalizar um alvo de terminate_processes
+        
+        Prefere o handle mantido pelo registro, cujo kill()/terminate() já
+        recusam um pid reutilizado. Um handle novo só é aceito se o
+        create_time bater com o informado pelo chamador.
+        """
+        pid, create_time = target if isinstance(target, tuple) else (target, None)
+        proc = self.registry.handle(pid) or psutil.Process(pid)
+        if create_time is not None and abs(proc.create_time() - create_time) > 0.01:
+            # o processo do snapshot já saiu e o pid pertence a outro
+            raise psutil.NoSuchProcess(pid)
+        return pid, proc
+    
+    def terminate_processes(self, pids, timeout=7, force=False, grace=5):
+        """
+        Encerra vários processos de uma vez, com um único prazo total
+        
+        Todos recebem o sinal primeiro e depois são aguardados juntos com
+        psutil.wait_procs; somente os que não saírem em `grace` segundos
+        recebem SIGKILL.
+        
+        Args:
+            pids (iterable): PIDs ou tuplas (pid, create_time) a encerrar; com
+                create_time, um pid reutilizado por outro processo não é tocado
+            timeout (float): Prazo total da operação em segundos
+            force (bool): Envia SIGKILL direto em vez de SIGTERM
+            grace (float): Tempo de espera antes de escalar para SIGKILL
+            
+        Returns:
+            dict: Listas de pids 'terminated', 'failed' e 'blocked'
+        """
+        deadline = time.monotonic() + timeout
+        results = {'terminated': [], 'failed': [], 'blocked': []}
+        signaled = []
+        
+        for target in pids:
+            pid = target[0] if isinstance(target, tuple) else target
+            try:
+                pid, proc = self._signal_handle(target)
+                
+                if proc.name() in self.blocked_processes:
+                    results['blocked'].append(pid)
+                    continue
+                
+                if force:
+                    proc.kill()  # SIGKILL
+                else:
+                    proc.terminate()  # SIGTERM
+                signaled.append(proc)
+                
+            except psutil.NoSuchProcess:
+                results['terminated'].append(pid)
+            except Exception:
+                results['failed'].append(pid)
+        
+        if force:
+            # SIGKILL não pode ser ignorado: aguarda o restante do prazo pela saída
+            gone, alive = psutil.wait_procs(signaled, timeout=max(0, deadline - time.monotonic()))
+        else:
+            gone, alive = psutil.wait_procs(signaled, timeout=min(grace, timeout))
+        
+        if alive and not force:
+            for proc in alive:
+                try:
                     proc.kill()
-                    proc.wait(timeout=2)
-            
-            return True
+                except psutil.NoSuchProcess:
+                    pass
+                except Exception:
+                    continue
             
-        except psutil.NoSuchProcess:
-            return True  
-        except psutil.AccessDenied:
-            return False  
-        except Exception:
-            return False
+            escalated_gone, alive = psutil.wait_procs(alive, timeout=max(0, deadline - time.monotonic()))
+            gone.extend(escalated_gone)
+        
+        results['terminated'].extend(proc.pid for proc in gone)
+        results['failed'].extend(proc.pid for proc in alive)
+        
+        return results
     
     def kill_processes_by_name(self, process_name):
        
-        killed_count = 0
-        failed_count = 0
-        
         try:
-            for proc in psutil.process_iter(['pid', 'name']):
-                try:
-                    if proc.info['name'].lower() == process_name.lower():
-                        if self.kill_process(proc.info['pid']):
-                            killed_count += 1
-                        else:
-                            failed_count += 1
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    failed_count += 1
+            targets = [
+                (pinfo['pid'], pinfo['create_time']) for pinfo in self.registry.processes()
+                if pinfo['name'].lower() == process_name.lower()
+            ]
+            
+            result = self.terminate_processes(targets)
+            killed_count = len(result['terminated'])
+            failed_count = len(result['failed']) + len(result['blocked'])
                     
             return {
                 'killed': killed_count,
@@ -152,43 +445,81 @@ class ProcessManager:
     
     def get_startup_processes(self):
         try:
-            import winreg
-            startup_processes = []
-            
-            startup_keys = [
-                (winreg.HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\Run"),
-                (winreg.HKEY_LOCAL_MACHINE, r"Software\Microsoft\Windows\CurrentVersion\Run"),
-                (winreg.HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\RunOnce"),
-                (winreg.HKEY_LOCAL_MACHINE, r"Software\Microsoft\Windows\CurrentVersion\RunOnce"),
-            ]
-            
-            for hkey, subkey in startup_keys:
-                try:
-                    with winreg.OpenKey(hkey, subkey) as key:
-                        i = 0
-                        while True:
-                            try:
-                                name, value, _ = winreg.EnumValue(key, i)
-                                startup_processes.append({
-                                    'name': name,
-                                    'command': value,
-                                    'location': f"{hkey}\\{subkey}",
-                                    'enabled': True
-                                })
-                                i += 1
-                            except OSError:
-                                break
-                except FileNotFoundError:
-                    continue
-                except Exception:
-                    continue
-            
-            return startup_processes
+            from startup_manager import RegistryStartupSource
+            return RegistryStartupSource().entries()
             
         except Exception as e:
             return [{'error': str(e)}]
     
-    def monitor_process_performance(self, duration=60, interval=2):
+    def iter_process_performance(self, duration=60, interval=2, limit=10, cpu_threshold=1.0, tracker=None):
+        """
+        Monitora os processos em fluxo, gerando cada amostra assim que é coletada
+
+        Args:
+            duration (float): Duração em segundos (None para indefinido)
+            interval (float): Intervalo entre amostras
+            limit (int): Processos por amostra
+            cpu_threshold (float): CPU % mínima para entrar na amostra
+            tracker (SeriesTracker): Acumula séries e resumos por processo (opcional)
+
+        Yields:
+            dict: {'timestamp', 'processes'} com os maiores consumidores de CPU
+        """
+        end_time = time.time() + duration if duration is not None else None
+        
+        while end_time is None or time.time() < end_time:
+            yield self._performance_sample(limit, cpu_threshold, tracker)
+            time.sleep(interval)
+    
+    async def aiter_process_performance(self, duration=60, interval=2, limit=10, cpu_threshold=1.0, tracker=None):
+        """Versão assíncrona de iter_process_performance (coleta em thread)"""
+        import asyncio
+        
+        end_time = time.time() + duration if duration is not None else None
+        
+        while end_time is None or time.time() < end_time:
+            yield await asyncio.to_thread(self._performance_sample, limit, cpu_threshold, tracker)
+            await asyncio.sleep(interval)
+    
+    def _performance_sample(self, limit, cpu_threshold, tracker):
+        table = self.registry.table(max_age=0)
+        now = time.time()
+        top = table.top_k('cpu', limit, table.filter(cpu_above=cpu_threshold))
+        
+        sample = {
+            'timestamp': datetime.now().isoformat(),
+            'processes': [
+                {
+                    'pid': table.pid[i],
+                    'name': table.name[i],
+                    'cpu_percent': table.cpu_percent[i],
+                    'memory_percent': table.memory_percent[i]
+                }
+                for i in top
+            ]
+        }
+        
+        if tracker is not None:
+            # acompanha os maiores consumidores de CPU e de memória, e continua
+            # acompanhando quem já entrou no tracker enquanto estiver vivo
+            selected = set(top)
+            selected.update(table.top_k('memory', limit))
+            seen = set()
+            
+            for i in range(len(table)):
+                key = (table.pid[i], table.create_time[i])
+                if i in selected or key in tracker:
+                    tracker.update(key, table.name[i], now, {
+                        'cpu': table.cpu_percent[i],
+                        'rss_mb': table.rss[i] / 1024 / 1024
+                    })
+                    seen.add(key)
+            
+            tracker.mark_inactive([key for key in tracker.entries if key not in seen])
+        
+        return sample
+    
+    def monitor_process_performance(self, duration=60, interval=2, max_samples=100, max_tracked=100):
         try:
             monitoring_data = {
                 'start_time': datetime.now().isoformat(),
@@ -197,28 +528,14 @@ class ProcessManager:
                 'samples': []
             }
             
-            end_time = time.time() + duration
+            tracker = SeriesTracker(('cpu', 'rss_mb'), history=max_samples, max_keys=max_tracked)
+            samples = deque(maxlen=max_samples)
             
-            while time.time() < end_time:
-                sample = {
-                    'timestamp': datetime.now().isoformat(),
-                    'processes': []
-                }
-                
-                for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
-                    try:
-                        pinfo = proc.info
-                        if pinfo['cpu_percent'] > 1.0:  
-                            sample['processes'].append(pinfo)
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        continue
-                
-                sample['processes'].sort(key=lambda x: x['cpu_percent'], reverse=True)
-                sample['processes'] = sample['processes'][:10]
-                
-                monitoring_data['samples'].append(sample)
-                time.sleep(interval)
+            for sample in self.iter_process_performance(duration, interval, tracker=tracker):
+                samples.append(sample)
             
+            monitoring_data['samples'] = list(samples)
+            monitoring_data['summary'] = sorted(tracker.summary(), key=lambda x: x['cpu']['mean'], reverse=True)
             monitoring_data['end_time'] = datetime.now().isoformat()
             return monitoring_data
             
@@ -258,38 +575,30 @@ class ProcessManager:
                 'actions': []
             }
             
-            resource_wasters = [
-                'chrome.exe', 'firefox.exe', 'msedge.exe',  
-                'spotify.exe', 'discord.exe', 'steam.exe',  
-                'skype.exe', 'teams.exe'
-            ]
+            table = self.registry.table()
+            groups = table.group_by_name()
+            victims = {}
             
-            process_count = defaultdict(int)
-            process_memory = defaultdict(float)
-            
-            for proc in psutil.process_iter(['pid', 'name', 'memory_info']):
-                try:
-                    name = proc.info['name'].lower()
-                    memory_mb = proc.info['memory_info'].rss / 1024 / 1024
+            for process_name in RESOURCE_WASTERS:
+                group = groups.get(process_name)
+                if group and group['count'] > 3: 
+                    indices = table.filter(name=process_name)
+                    indices.sort(key=table.create_time.__getitem__)
                     
-                    process_count[name] += 1
-                    process_memory[name] += memory_mb
-                    
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
+                    for i in indices[:-2]:
+                        victims[table.pid[i]] = (process_name, (table.pid[i], table.create_time[i]), table.rss[i])
             
-            for process_name in resource_wasters:
-                if process_count[process_name] > 3: 
-                    procs = [p for p in psutil.process_iter(['pid', 'name', 'create_time']) 
-                            if p.info['name'].lower() == process_name]
-                    
-                    procs.sort(key=lambda x: x.info['create_time'])
-                    
-                    for proc in procs[:-2]:
-                        if self.kill_process(proc.info['pid']):
-                            results['processes_killed'] += 1
-                            results['memory_freed'] += process_memory[process_name] / process_count[process_name]
-                            results['actions'].append(f"Encerrou instância antiga de {process_name}")
+            if victims:
+                # o USS é lido antes de encerrar: é a memória que realmente volta ao sistema
+                unique_mb = self.memory.unique_memory_mb(key for _, key, _ in victims.values())
+                terminated = self.terminate_processes([key for _, key, _ in victims.values()])['terminated']
+                
+                for pid in terminated:
+                    process_name, key, rss = victims[pid]
+                    freed = unique_mb.get(key)
+                    results['processes_killed'] += 1
+                    results['memory_freed'] += freed if freed is not None else rss / 1024 / 1024
+                    results['actions'].append(f"Encerrou instância antiga de {process_name}")
             
             return results
             
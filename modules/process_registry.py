@@ -0,0 +1,240 @@
+"""
+Registro persistente de processos
+
+Mantém handles `psutil.Process` vivos entre consultas, indexados por pid.
+Como os contadores de CPU ficam "aquecidos", o `cpu_percent` passa a
+refletir o uso real desde a última atualização em vez de sempre retornar
+0.0 como acontece em handles recém-criados.
+
+A tabela colunar (ProcessTable) é o armazenamento principal: cada
+atualização só acrescenta valores a arrays, e dicts por processo são
+montados sob demanda em `materialize`, `get` e `processes`. Os dados fixos
+de cada processo (nome, create_time, ppid, usuário) são lidos uma única vez.
+A reutilização de um pid é verificada a cada `verify_every` atualizações,
+comparando o create_time atual com o registrado.
+"""
+
+import sys
+import threading
+import time
+
+import psutil
+
+from process_table import ProcessTable
+from profiler import tracer
+
+
+class ProcessRegistry:
+    def __init__(self, prime_interval=0.5, max_age=1.0, verify_every=5):
+        """
+        Args:
+            prime_interval (float): Pausa entre as duas primeiras leituras
+            max_age (float): Idade máxima da tabela antes de uma nova leitura
+            verify_every (int): Atualizações entre verificações de pid reutilizado
+        """
+        self.prime_interval = prime_interval
+        self.max_age = max_age
+        self.verify_every = max(1, verify_every)
+
+        self._procs = {}  # pid -> psutil.Process
+        self._static = {}  # pid -> (nome, create_time, ppid, usuário)
+        self._table = ProcessTable()
+        self._total_memory = psutil.virtual_memory().total
+        self._lock = threading.RLock()
+
+        self.last_refresh = None
+        self.refresh_count = 0
+
+    def _attach(self, pid):
+        """Cria e prepara o handle de um novo pid"""
+        proc = psutil.Process(pid)
+        with proc.oneshot():
+            name = sys.intern(proc.name())
+            create_time = proc.create_time()
+            ppid = proc.ppid()
+            username = None
+            try:
+                username = proc.username()
+            except (psutil.AccessDenied, KeyError):
+                pass
+            try:
+                # a primeira leitura só serve para iniciar o contador
+                proc.cpu_percent(None)
+            except psutil.AccessDenied:
+                pass
+
+        self._procs[pid] = proc
+        self._static[pid] = (name, create_time, ppid, username)
+        return self._static_info(pid)
+
+    def _static_info(self, pid):
+        name, create_time, ppid, username = self._static[pid]
+        return {'pid': pid, 'name': name, 'create_time': create_time, 'ppid': ppid, 'username': username}
+
+    def _detach(self, pid):
+        self._procs.pop(pid, None)
+        if pid not in self._static:
+            return None
+        info = self._static_info(pid)
+        del self._static[pid]
+        return info
+
+    def _sample(self, pid, proc, table, verify):
+        """Lê os contadores do processo em um único oneshot e os acrescenta à tabela"""
+        name, create_time, ppid, _ = self._static[pid]
+
+        if verify:
+            try:
+                reused = psutil.Process(pid).create_time() != create_time
+            except psutil.AccessDenied:
+                reused = False
+            if reused:
+                # pid reutilizado por outro processo
+                raise psutil.NoSuchProcess(pid)
+
+        with proc.oneshot():
+            try:
+                cpu_percent = proc.cpu_percent(None)
+            except psutil.AccessDenied:
+                cpu_percent = 0.0
+
+            try:
+                rss = proc.memory_info().rss
+            except psutil.AccessDenied:
+                rss = 0
+
+            try:
+                status = proc.status()
+            except psutil.AccessDenied:
+                status = None
+
+        table.append(pid, name, cpu_percent, rss, rss / self._total_memory * 100, create_time, ppid, status)
+
+    def refresh(self):
+        """
+        Atualiza o registro de forma incremental
+
+        Apenas pids novos são anexados e pids mortos removidos; os demais
+        recebem uma única leitura de contadores.
+
+        Returns:
+            dict: {'started': [info, ...], 'exited': [info, ...]}
+        """
+        with self._lock, tracer.span('processes.refresh'):
+            pids = set(psutil.pids())
+            started = []
+            exited = []
+
+            for pid in self._procs.keys() - pids:
+                info = self._detach(pid)
+                if info:
+                    exited.append(info)
+
+            for pid in pids - self._procs.keys():
+                try:
+                    started.append(self._attach(pid))
+                except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                    continue
+                except psutil.AccessDenied:
+                    continue
+
+            verify = self.refresh_count % self.verify_every == 0
+            table = ProcessTable()
+            for pid, proc in list(self._procs.items()):
+                try:
+                    self._sample(pid, proc, table, verify)
+                except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                    info = self._detach(pid)
+                    if info:
+                        exited.append(info)
+                except psutil.AccessDenied:
+                    continue
+
+            tracer.count('processes.attached', len(started))
+            tracer.count('processes.sampled', len(table))
+            self._table = table
+            self.last_refresh = time.monotonic()
+            self.refresh_count += 1
+
+            return {'started': started, 'exited': exited}
+
+    def ensure_fresh(self, max_age=None):
+        """
+        Garante que o registro foi atualizado há no máximo `max_age` segundos
+
+        Na primeira chamada faz duas leituras separadas por `prime_interval`,
+        para que os percentuais de CPU já sejam significativos.
+        """
+        max_age = self.max_age if max_age is None else max_age
+
+        with self._lock:
+            if self.last_refresh is None:
+                self.refresh()
+                time.sleep(self.prime_interval)
+                self.refresh()
+            elif time.monotonic() - self.last_refresh > max_age:
+                self.refresh()
+
+    def _row(self, table, i):
+        row = table.row(i)
+        static = self._static.get(row['pid'])
+        row['username'] = static[3] if static and static[1] == row['create_time'] else None
+        return row
+
+    def processes(self, max_age=None):
+        """
+        Retorna o snapshot atual de todos os processos como dicts
+
+        Returns:
+            list: Lista de dicts com pid, ppid, name, cpu_percent, memory_percent,
+            memory_mb, create_time, status e username
+        """
+        self.ensure_fresh(max_age)
+        with self._lock:
+            table = self._table
+            return [self._row(table, i) for i in range(len(table))]
+
+    def table(self, max_age=None):
+        """
+        Retorna o snapshot colunar atual (ProcessTable)
+
+        A tabela é substituída a cada atualização e não deve ser alterada.
+        """
+        self.ensure_fresh(max_age)
+        return self._table
+
+    def materialize(self, table, indices):
+        """Converte linhas selecionadas da tabela em dicts (mesmas chaves de `processes`)"""
+        with self._lock:
+            return [self._row(table, i) for i in indices]
+
+    def get(self, pid):
+        """Retorna o snapshot de um pid na tabela atual (ou None)"""
+        with self._lock:
+            table = self._table
+            try:
+                i = table.pid.index(pid)
+            except ValueError:
+                return None
+            return self._row(table, i)
+
+    def handle(self, pid):
+        """Retorna o handle psutil mantido pelo registro (ou None)"""
+        with self._lock:
+            return self._procs.get(pid)
+
+    def __len__(self):
+        return len(self._procs)
+
+
+_default_registry = None
+_default_lock = threading.Lock()
+
+
+def get_default_registry():
+    """Registro compartilhado pelos módulos da aplicação"""
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = ProcessRegistry()
+        return _default_registry
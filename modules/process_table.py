@@ -0,0 +1,139 @@
+"""
+Tabela colunar de processos
+
+Guarda um snapshot de todos os processos em arrays paralelos (pid, ppid, cpu, rss,
+memória %, create_time) com nomes internados, evitando criar um dict por
+processo a cada atualização. As consultas trabalham sobre índices e só
+materializam dicts para as linhas selecionadas.
+"""
+
+import heapq
+import sys
+from array import array
+
+
+class ProcessTable:
+    COLUMNS = ('pid', 'ppid', 'cpu_percent', 'rss', 'memory_percent', 'create_time')
+
+    def __init__(self):
+        self.pid = array('l')
+        self.ppid = array('l')
+        self.cpu_percent = array('d')
+        self.rss = array('Q')
+        self.memory_percent = array('d')
+        self.create_time = array('d')
+        self.name = []
+        # constantes de status do psutil (strings compartilhadas) ou None
+        self.status = []
+
+    def append(self, pid, name, cpu_percent, rss, memory_percent, create_time, ppid=0, status=None):
+        self.pid.append(pid)
+        self.ppid.append(ppid)
+        self.name.append(sys.intern(name) if name else '')
+        self.cpu_percent.append(cpu_percent)
+        self.rss.append(rss)
+        self.memory_percent.append(memory_percent)
+        self.create_time.append(create_time)
+        self.status.append(status)
+
+    def __len__(self):
+        return len(self.pid)
+
+    def _column(self, column):
+        if column == 'cpu':
+            column = 'cpu_percent'
+        elif column == 'memory':
+            column = 'rss'
+        if column not in self.COLUMNS:
+            raise ValueError(f"Coluna inválida: {column}")
+        return getattr(self, column)
+
+    def top_k(self, column, k, indices=None):
+        """
+        Seleciona os k maiores valores de uma coluna sem ordenar a tabela toda
+
+        Args:
+            column (str): 'cpu', 'memory' ou o nome de uma coluna
+            k (int): Quantidade de linhas
+            indices (iterable): Restringe a busca a estas linhas (opcional)
+
+        Returns:
+            list: Índices das linhas, do maior para o menor
+        """
+        values = self._column(column)
+        if indices is None:
+            indices = range(len(values))
+        return heapq.nlargest(k, indices, key=values.__getitem__)
+
+    def filter(self, cpu_above=None, rss_above=None, memory_percent_above=None, name=None, any_of=False):
+        """
+        Filtra linhas por limites
+
+        Args:
+            cpu_above (float): CPU % mínima (exclusiva)
+            rss_above (int): RSS mínimo em bytes (exclusivo)
+            memory_percent_above (float): Memória % mínima (exclusiva)
+            name (str): Nome exato (sem diferenciar maiúsculas)
+            any_of (bool): Combina os limites com OU em vez de E
+
+        Returns:
+            list: Índices das linhas que passam no filtro
+        """
+        tests = []
+        if cpu_above is not None:
+            tests.append((self.cpu_percent, cpu_above))
+        if rss_above is not None:
+            tests.append((self.rss, rss_above))
+        if memory_percent_above is not None:
+            tests.append((self.memory_percent, memory_percent_above))
+
+        indices = range(len(self.pid))
+        if name is not None:
+            name = name.lower()
+            indices = [i for i in indices if self.name[i].lower() == name]
+
+        if not tests:
+            return list(indices)
+
+        if len(tests) == 1:
+            column, limit = tests[0]
+            return [i for i in indices if column[i] > limit]
+
+        combine = any if any_of else all
+        return [i for i in indices if combine(column[i] > limit for column, limit in tests)]
+
+    def group_by_name(self, lower=True):
+        """
+        Agrega as linhas por nome de processo
+
+        Returns:
+            dict: nome -> {'count', 'cpu_percent', 'rss', 'memory_percent', 'pids'}
+        """
+        groups = {}
+        for i, name in enumerate(self.name):
+            key = name.lower() if lower else name
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = {'count': 0, 'cpu_percent': 0.0, 'rss': 0, 'memory_percent': 0.0, 'pids': []}
+            group['count'] += 1
+            group['cpu_percent'] += self.cpu_percent[i]
+            group['rss'] += self.rss[i]
+            group['memory_percent'] += self.memory_percent[i]
+            group['pids'].append(self.pid[i])
+        return groups
+
+    def row(self, i):
+        """Materializa uma linha como dict"""
+        return {
+            'pid': self.pid[i],
+            'ppid': self.ppid[i],
+            'name': self.name[i],
+            'cpu_percent': self.cpu_percent[i],
+            'memory_percent': self.memory_percent[i],
+            'memory_mb': self.rss[i] / 1024 / 1024,
+            'create_time': self.create_time[i],
+            'status': self.status[i],
+        }
+
+    def rows(self, indices):
+        return [self.row(i) for i in indices]
@@ -0,0 +1,352 @@
+"""
+Publicação do último snapshot do sistema em memória compartilhada
+
+Um único processo amostrador grava as estatísticas e os processos mais
+pesados em um segmento mmap de layout fixo. Qualquer quantidade de leitores
+locais mapeia o segmento uma vez e lê o snapshot sem chamadas ao sistema e
+sem reamostrar o psutil, então o custo do monitoramento não cresce com o
+número de ferramentas.
+
+A consistência usa um seqlock: o escritor torna o contador de sequência
+ímpar antes de gravar e par ao terminar; o leitor copia o segmento e só
+aceita a cópia se a sequência era par e não mudou durante a leitura. O
+seqlock supõe um único escritor, então o publicador mantém um lock
+exclusivo do arquivo enquanto existir.
+"""
+
+import math
+import mmap
+import os
+import stat
+import struct
+import tempfile
+import threading
+import time
+
+MAGIC = b'IOPT'
+LAYOUT_VERSION = 2
+
+MAX_CORES = 256
+MAX_PROCESSES = 64
+NAME_SIZE = 32
+
+# magic, versão do layout, processos garantidos por critério, sequência, timestamp, núcleos, processos
+HEADER = struct.Struct('<4sHHQdII')
+SEQ_OFFSET = 8
+
+STATS_FIELDS = (
+    'cpu', 'memory', 'memory_used', 'memory_available', 'swap', 'disk', 'disk_used',
+    'disk_free', 'processes', 'network_sent', 'network_recv', 'temperature', 'disk_degraded'
+)
+STATS = struct.Struct('<%dd' % len(STATS_FIELDS))
+CORES = struct.Struct('<%dd' % MAX_CORES)
+# pid, ppid, cpu_percent, memory_percent, rss, create_time, nome
+PROCESS = struct.Struct('<IIddQd%ds' % NAME_SIZE)
+
+STATS_OFFSET = HEADER.size
+CORES_OFFSET = STATS_OFFSET + STATS.size
+PROCESSES_OFFSET = CORES_OFFSET + CORES.size
+SEGMENT_SIZE = PROCESSES_OFFSET + PROCESS.size * MAX_PROCESSES
+
+
+def default_snapshot_path():
+    """Segmento do usuário atual; o nome inclui o uid porque /dev/shm é compartilhado"""
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    if hasattr(os, 'geteuid'):
+        return os.path.join(base, f"ioptimizer-snapshot-{os.geteuid()}")
+    return os.path.join(base, 'ioptimizer-snapshot')
+
+
+def _lock_writer(fd, path):
+    """Lock exclusivo e não bloqueante do segmento; falha se outro publicador o detém"""
+    try:
+        if os.name == 'nt':
+            import msvcrt
+            # um byte além do segmento, que os leitores nunca acessam
+            os.lseek(fd, SEGMENT_SIZE, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        raise RuntimeError(f"Outro publicador já grava em {path}") from None
+
+
+def _check_segment(fd, path):
+    """
+    Recusa segmentos que não sejam arquivos regulares do próprio usuário (ou do root)
+
+    Em um diretório compartilhado outro usuário pode criar o arquivo antes,
+    ou um hardlink para um arquivo alheio, para falsificar as estatísticas ou
+    fazer o amostrador sobrescrever outro arquivo.
+    """
+    st = os.fstat(fd)
+    if not stat.S_ISREG(st.st_mode) or st.st_nlink != 1:
+        raise ValueError(f"Segmento de snapshot inválido: {path}")
+    if hasattr(os, 'geteuid') and st.st_uid not in (os.geteuid(), 0):
+        raise PermissionError(f"Segmento de snapshot pertence a outro usuário: {path}")
+    return st
+
+
+class SnapshotPublisher:
+    def __init__(self, path=None, monitor=None, top=20, interval=2.0):
+        """
+        Args:
+            path (str): Arquivo do segmento (padrão: /dev/shm ou diretório temporário)
+            monitor (SystemMonitor): Fonte das amostras (padrão: um novo)
+            top (int): Processos mais pesados publicados por CPU e por memória
+                (até MAX_PROCESSES / 2 cada)
+            interval (float): Pausa entre publicações, além do tempo de amostragem
+        """
+        if monitor is None:
+            from system_monitor import SystemMonitor
+            monitor = SystemMonitor()
+
+        self.path = path or default_snapshot_path()
+        self.monitor = monitor
+        self.top = min(top, MAX_PROCESSES // 2)
+        self.interval = interval
+        self.seq = 0
+
+        self._stop = threading.Event()
+        self._thread = None
+
+        # o arquivo nunca é truncado: leitores que já o mapearam continuam válidos
+        # quando o amostrador é reiniciado
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_NOFOLLOW', 0), 0o644)
+        try:
+            st = _check_segment(fd, self.path)
+            # liberado ao fechar o arquivo
+            _lock_writer(fd, self.path)
+        except Exception:
+            os.close(fd)
+            raise
+        self._file = os.fdopen(fd, 'r+b')
+        if st.st_size < SEGMENT_SIZE:
+            os.ftruncate(fd, SEGMENT_SIZE)
+        self._map = mmap.mmap(fd, SEGMENT_SIZE, access=mmap.ACCESS_WRITE)
+
+        magic, version, _, seq = HEADER.unpack_from(self._map, 0)[:4]
+        if magic == MAGIC and version == LAYOUT_VERSION:
+            # continua a sequência anterior (sempre par) para que ela só cresça
+            self.seq = seq + (seq & 1)
+        else:
+            HEADER.pack_into(self._map, 0, MAGIC, LAYOUT_VERSION, 0, 0, 0.0, 0, 0)
+
+    def publish(self, stats, processes=(), top=0):
+        """
+        Grava um snapshot no segmento
+
+        Args:
+            stats (dict): Resultado de SystemMonitor.get_real_time_stats
+            processes (list): Processos (dicts com pid, name, cpu_percent, memory_percent...)
+            top (int): Quantos dos mais pesados por CPU e por memória estão
+                garantidamente em processes (0: nenhuma garantia)
+        """
+        values = []
+        for field in STATS_FIELDS:
+            value = stats.get(field)
+            values.append(float(value) if isinstance(value, (int, float)) else math.nan)
+
+        cores = list(stats.get('cpu_cores') or ())[:MAX_CORES]
+        processes = [p for p in processes if 'error' not in p][:MAX_PROCESSES]
+
+        buffer = self._map
+        seq = self.seq
+        # sequência ímpar: gravação em andamento
+        struct.pack_into('<Q', buffer, SEQ_OFFSET, seq + 1)
+
+        STATS.pack_into(buffer, STATS_OFFSET, *values)
+        CORES.pack_into(buffer, CORES_OFFSET, *(cores + [0.0] * (MAX_CORES - len(cores))))
+        for i, proc in enumerate(processes):
+            memory_info = proc.get('memory_info')
+            rss = getattr(memory_info, 'rss', None) or int((proc.get('memory_mb') or 0) * 1024 * 1024)
+            PROCESS.pack_into(
+                buffer, PROCESSES_OFFSET + i * PROCESS.size,
+                proc.get('pid') or 0, proc.get('ppid') or 0,
+                float(proc.get('cpu_percent') or 0.0), float(proc.get('memory_percent') or 0.0),
+                rss, float(proc.get('create_time') or 0.0),
+                (proc.get('name') or '').encode('utf-8')[:NAME_SIZE]
+            )
+
+        HEADER.pack_into(buffer, 0, MAGIC, LAYOUT_VERSION, top, seq + 1, time.time(), len(cores), len(processes))
+        struct.pack_into('<Q', buffer, SEQ_OFFSET, seq + 2)
+        self.seq = seq + 2
+
+    def sample_and_publish(self):
+        stats = self.monitor.get_real_time_stats()
+        if 'error' in stats:
+            return False
+        # a união dos mais pesados por CPU e por memória permite aos leitores
+        # atender as duas ordenações
+        registry = self.monitor.registry
+        table = registry.table()
+        indices = set(table.top_k('cpu', self.top)) | set(table.top_k('memory', self.top))
+        self.publish(stats, registry.materialize(table, sorted(indices)), top=self.top)
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sample_and_publish()
+            except Exception:
+                pass
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Publica continuamente em uma thread de fundo"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='snapshot-publisher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def close(self, unlink=True):
+        self.stop()
+        self._map.close()
+        self._file.close()
+        if unlink:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+class SnapshotReader:
+    def __init__(self, path=None, stale_after=5.0):
+        """
+        Args:
+            path (str): Arquivo do segmento publicado pelo SnapshotPublisher
+            stale_after (float): Idade a partir da qual o leitor verifica se o
+                segmento foi recriado e, nesse caso, passa a mapear o novo
+        """
+        self.path = path or default_snapshot_path()
+        self.stale_after = stale_after
+        self._file, self._map, self._identity = self._open()
+        self.retries = 0
+        self.reopens = 0
+
+    def _open(self):
+        fd = os.open(self.path, os.O_RDONLY | getattr(os, 'O_NOFOLLOW', 0))
+        file = os.fdopen(fd, 'rb')
+        try:
+            st = _check_segment(fd, self.path)
+            buffer = mmap.mmap(fd, SEGMENT_SIZE, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            file.close()
+            raise
+
+        magic, version = struct.unpack_from('<4sH', buffer, 0)
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            buffer.close()
+            file.close()
+            raise ValueError(f"Segmento de snapshot incompatível: {self.path}")
+        return file, buffer, (st.st_dev, st.st_ino)
+
+    def _reopen(self):
+        """Passa a mapear o arquivo atual do caminho se ele não for o já mapeado"""
+        try:
+            st = os.stat(self.path, follow_symlinks=False)
+            if (st.st_dev, st.st_ino) == self._identity:
+                return False
+            opened = self._open()
+        except (OSError, ValueError):
+            return False
+
+        self.close()
+        self._file, self._map, self._identity = opened
+        self.reopens += 1
+        return True
+
+    @classmethod
+    def open_existing(cls, path=None):
+        """Leitor para um segmento já publicado, ou None se não houver"""
+        try:
+            return cls(path)
+        except (OSError, ValueError):
+            return None
+
+    def _copy(self, max_retries):
+        buffer = self._map
+        for _ in range(max_retries):
+            (before,) = struct.unpack_from('<Q', buffer, SEQ_OFFSET)
+            if not before & 1:
+                data = buffer[:SEGMENT_SIZE]
+                (after,) = struct.unpack_from('<Q', buffer, SEQ_OFFSET)
+                if before == after:
+                    return data
+            # escritor no meio de uma gravação: cede a CPU e tenta de novo
+            self.retries += 1
+            time.sleep(0)
+        return None
+
+    def read(self, max_retries=1000):
+        """
+        Lê o snapshot mais recente de forma consistente
+
+        Um snapshot ausente ou mais antigo que stale_after pode indicar que o
+        amostrador foi reiniciado com um arquivo novo; só nesse caso o caminho
+        é consultado (um stat) e o segmento é mapeado de novo se mudou.
+
+        Returns:
+            dict: seq, timestamp, age, stats, top_processes e top (quantos dos mais
+            pesados por critério estão em top_processes); None se ainda não houver snapshot
+            ou se o escritor não liberar a leitura após max_retries tentativas)
+        """
+        snapshot = self._read(max_retries)
+        if (snapshot is None or snapshot['age'] > self.stale_after) and self._reopen():
+            snapshot = self._read(max_retries)
+        return snapshot
+
+    def _read(self, max_retries):
+        data = self._copy(max_retries)
+        if data is None:
+            return None
+
+        _, _, top, seq, timestamp, core_count, process_count = HEADER.unpack_from(data, 0)
+        if seq == 0:
+            return None
+
+        stats = {}
+        for field, value in zip(STATS_FIELDS, STATS.unpack_from(data, STATS_OFFSET)):
+            if not math.isnan(value):
+                stats[field] = value
+        stats['processes'] = int(stats.get('processes', 0))
+        if stats.pop('disk_degraded', 0.0):
+            stats['disk_degraded'] = True
+        stats['cpu_cores'] = list(CORES.unpack_from(data, CORES_OFFSET)[:core_count])
+        stats['timestamp'] = time.strftime('%H:%M:%S', time.localtime(timestamp))
+
+        processes = []
+        for i in range(process_count):
+            pid, ppid, cpu, memory, rss, create_time, name = PROCESS.unpack_from(
+                data, PROCESSES_OFFSET + i * PROCESS.size
+            )
+            processes.append({
+                'pid': pid,
+                'ppid': ppid,
+                'name': name.rstrip(b'\0').decode('utf-8', 'replace'),
+                'cpu_percent': cpu,
+                'memory_percent': memory,
+                'memory_mb': rss / 1024 / 1024,
+                'create_time': create_time or None,
+            })
+
+        return {
+            'seq': seq,
+            'timestamp': timestamp,
+            'age': time.time() - timestamp,
+            'stats': stats,
+            'top': top,
+            'top_processes': processes,
+        }
+
+    def close(self):
+        self._map.close()
+        self._file.close()
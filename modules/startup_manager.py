@@ -0,0 +1,557 @@
+"""
+Módulo para gerenciamento e medição de impacto dos programas de inicialização
+
+Os programas vêm de fontes intercambiáveis (chaves Run do registro no
+Windows, entradas XDG autostart `.desktop` no Linux). O StartupProfiler
+executa cada comando isoladamente e acompanha a árvore de processos até ela
+ficar ociosa, medindo tempo, CPU, memória e I/O.
+"""
+
+import configparser
+import ntpath
+import os
+import shlex
+import shutil
+import subprocess
+import time
+
+import psutil
+
+MB = 1024 * 1024
+
+# limites usados pelo Gerenciador de Tarefas do Windows para o "impacto na inicialização"
+HIGH_IMPACT_CPU = 1.0
+HIGH_IMPACT_IO = 3 * MB
+MEDIUM_IMPACT_CPU = 0.3
+MEDIUM_IMPACT_IO = 300 * 1024
+
+# códigos de campo da especificação Desktop Entry removidos da linha Exec
+_EXEC_FIELD_CODES = {'%f', '%F', '%u', '%U', '%d', '%D', '%n', '%N', '%i', '%c', '%k', '%v', '%m'}
+
+
+def split_command(command, windows=None):
+    """
+    Argumentos para o Popen de um comando de inicialização
+
+    No Windows a string é mantida inteira (com %VAR% expandidas), pois o
+    CreateProcess interpreta as aspas de caminhos como
+    '"C:\\Program Files\\App\\app.exe" --min'; nos demais sistemas o comando
+    é dividido como no shell.
+    """
+    windows = os.name == 'nt' if windows is None else windows
+    if isinstance(command, (list, tuple)):
+        return list(command)
+    if windows:
+        return ntpath.expandvars(command).strip()
+    return shlex.split(command)
+
+
+def command_executable(command, windows=None):
+    """
+    Caminho do executável de um comando, sem aspas e com %VAR% expandidas
+
+    Returns:
+        str: Caminho (ou None se o comando estiver vazio ou malformado)
+    """
+    windows = os.name == 'nt' if windows is None else windows
+    if isinstance(command, (list, tuple)):
+        return command[0] if command else None
+    if not windows:
+        try:
+            args = shlex.split(command)
+        except ValueError:
+            return None
+        return args[0] if args else None
+
+    command = ntpath.expandvars(command).strip()
+    if command.startswith('"'):
+        return command[1:].partition('"')[0] or None
+
+    # sem aspas, como o CreateProcess: o menor prefixo que é um arquivo existente
+    parts = command.split()
+    for i in range(1, len(parts) + 1):
+        candidate = ' '.join(parts[:i])
+        if os.path.isfile(candidate) or os.path.isfile(candidate + '.exe'):
+            return candidate
+    # nenhum existe (ex.: outra máquina): o menor prefixo terminado em .exe
+    for i in range(1, len(parts) + 1):
+        if parts[i - 1].lower().endswith('.exe'):
+            return ' '.join(parts[:i])
+    return parts[0] if parts else None
+
+
+def command_basename(command, windows=None):
+    """Nome do executável em minúsculas, usado para achar o item entre os processos"""
+    windows = os.name == 'nt' if windows is None else windows
+    executable = command_executable(command, windows)
+    if not executable:
+        return None
+    return (ntpath.basename(executable) if windows else os.path.basename(executable)).lower()
+
+
+class RegistryStartupSource:
+    """
+    Chaves Run/RunOnce do registro do Windows
+
+    Itens de RunOnce são comandos de execução única (instaladores, limpezas):
+    são listados, mas marcados como não mensuráveis, já que executá-los para
+    medir repetiria seus efeitos. RunOnceEx não é lido.
+    """
+
+    name = 'registry'
+
+    # (hive, chave, mensurável)
+    KEYS = (
+        ('HKEY_CURRENT_USER', r"Software\Microsoft\Windows\CurrentVersion\Run", True),
+        ('HKEY_LOCAL_MACHINE', r"Software\Microsoft\Windows\CurrentVersion\Run", True),
+        ('HKEY_CURRENT_USER', r"Software\Microsoft\Windows\CurrentVersion\RunOnce", False),
+        ('HKEY_LOCAL_MACHINE', r"Software\Microsoft\Windows\CurrentVersion\RunOnce", False),
+    )
+
+    def available(self):
+        return os.name == 'nt'
+
+    def entries(self):
+        import winreg
+
+        entries = []
+        for hive, subkey, profilable in self.KEYS:
+            try:
+                with winreg.OpenKey(getattr(winreg, hive), subkey) as key:
+                    i = 0
+                    while True:
+                        try:
+                            name, value, _ = winreg.EnumValue(key, i)
+                        except OSError:
+                            break
+                        entries.append({
+                            'name': name,
+                            'command': value,
+                            'location': f"{hive}\\{subkey}",
+                            'enabled': True,
+                            'profilable': profilable,
+                            'source': self.name
+                        })
+                        i += 1
+            except OSError:
+                continue
+
+        return entries
+
+
+class XdgAutostartSource:
+    """
+    Entradas `.desktop` dos diretórios XDG autostart
+
+    Segue as regras da sessão: entradas cujo TryExec não existe são
+    ignoradas, e OnlyShowIn/NotShowIn desabilitam a entrada fora dos
+    ambientes indicados.
+    """
+
+    name = 'xdg'
+
+    def __init__(self, directories=None, desktops=None):
+        """
+        Args:
+            directories (list): Diretórios a ler, do mais para o menos prioritário
+                (padrão: $XDG_CONFIG_HOME/autostart e $XDG_CONFIG_DIRS/*/autostart)
+            desktops (list): Ambientes da sessão atual (padrão: $XDG_CURRENT_DESKTOP)
+        """
+        self.directories = directories
+        if desktops is None:
+            desktops = [d for d in os.environ.get('XDG_CURRENT_DESKTOP', '').split(':') if d]
+        self.desktops = {d.lower() for d in desktops}
+
+    def _default_directories(self):
+        config_home = os.environ.get('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser('~'), '.config')
+        config_dirs = os.environ.get('XDG_CONFIG_DIRS') or '/etc/xdg'
+        return [os.path.join(config_home, 'autostart')] + [
+            os.path.join(directory, 'autostart') for directory in config_dirs.split(':') if directory
+        ]
+
+    def available(self):
+        return os.name != 'nt'
+
+    def _shown_in_session(self, section):
+        only = {d.lower() for d in section.get('OnlyShowIn', '').split(';') if d}
+        hidden = {d.lower() for d in section.get('NotShowIn', '').split(';') if d}
+        if only and not only & self.desktops:
+            return False
+        return not hidden & self.desktops
+
+    def _try_exec(self, section):
+        """Falso se o programa de TryExec não existir (a sessão ignora a entrada)"""
+        program = section.get('TryExec', '').strip()
+        if not program:
+            return True
+        if os.path.isabs(program):
+            return os.access(program, os.X_OK)
+        return shutil.which(program) is not None
+
+    def _parse(self, path):
+        parser = configparser.ConfigParser(interpolation=None, strict=False)
+        parser.optionxform = str
+        parser.read(path, encoding='utf-8')
+        if not parser.has_section('Desktop Entry'):
+            return None
+
+        section = parser['Desktop Entry']
+        command = section.get('Exec', '').strip()
+        if not command or not self._try_exec(section):
+            return None
+
+        try:
+            args = [arg for arg in shlex.split(command) if arg not in _EXEC_FIELD_CODES]
+            command = shlex.join(args)
+        except ValueError:
+            pass
+
+        enabled = (
+            section.get('Hidden', 'false').lower() != 'true'
+            and section.get('X-GNOME-Autostart-enabled', 'true').lower() != 'false'
+            and self._shown_in_session(section)
+        )
+
+        return {
+            'name': section.get('Name', os.path.splitext(os.path.basename(path))[0]),
+            'command': command,
+            'location': path,
+            'enabled': enabled,
+            'source': self.name
+        }
+
+    def entries(self):
+        # um arquivo com o mesmo nome em um diretório mais prioritário sobrepõe os demais
+        seen = set()
+        entries = []
+        for directory in self.directories or self._default_directories():
+            try:
+                filenames = sorted(os.listdir(directory))
+            except OSError:
+                continue
+
+            for filename in filenames:
+                if not filename.endswith('.desktop') or filename in seen:
+                    continue
+                seen.add(filename)
+                try:
+                    entry = self._parse(os.path.join(directory, filename))
+                except (configparser.Error, UnicodeDecodeError, OSError):
+                    continue
+                if entry:
+                    entries.append(entry)
+
+        return entries
+
+
+def classify_impact(cpu_seconds, io_bytes):
+    """Classifica o impacto na inicialização como 'alto', 'médio' ou 'baixo'"""
+    if cpu_seconds > HIGH_IMPACT_CPU or io_bytes > HIGH_IMPACT_IO:
+        return 'alto'
+    if cpu_seconds > MEDIUM_IMPACT_CPU or io_bytes > MEDIUM_IMPACT_IO:
+        return 'médio'
+    return 'baixo'
+
+
+class StartupProfiler:
+    def __init__(self, idle_cpu_percent=2.0, idle_window=1.0, timeout=30.0, interval=0.1,
+                 io_bandwidth=100 * MB):
+        """
+        Args:
+            idle_cpu_percent (float): Uso de CPU da árvore abaixo do qual ela é considerada ociosa
+            idle_window (float): Segundos seguidos abaixo do limite para declarar ociosidade
+            timeout (float): Tempo máximo de observação por comando
+            interval (float): Intervalo entre amostras
+            io_bandwidth (float): Vazão de disco (bytes/s) usada na estimativa de economia
+        """
+        self.idle_cpu_percent = idle_cpu_percent
+        self.idle_window = idle_window
+        self.timeout = timeout
+        self.interval = interval
+        self.io_bandwidth = io_bandwidth
+
+    def _tree(self, root, handles):
+        """Processos vivos da árvore, incluindo descendentes já órfãos"""
+        try:
+            for proc in [root] + root.children(recursive=True):
+                handles.setdefault(proc.pid, proc)
+        except psutil.Error:
+            pass
+
+        tree = []
+        for proc in handles.values():
+            try:
+                if proc.is_running() and proc.status() != psutil.STATUS_ZOMBIE:
+                    tree.append(proc)
+            except psutil.Error:
+                continue
+        return tree
+
+    def _sample(self, proc):
+        """(cpu_s, rss, io_bytes) de um processo, ou None se ele sumiu"""
+        try:
+            with proc.oneshot():
+                cpu = proc.cpu_times()
+                rss = proc.memory_info().rss
+                try:
+                    io = proc.io_counters()
+                    io_bytes = io.read_bytes + io.write_bytes
+                except (psutil.AccessDenied, AttributeError):
+                    io_bytes = 0
+        except (psutil.NoSuchProcess, psutil.ZombieProcess, psutil.AccessDenied):
+            return None
+
+        return cpu.user + cpu.system, rss, io_bytes
+
+    def _stop_tree(self, handles):
+        procs = [proc for proc in handles.values() if proc.is_running()]
+        for proc in procs:
+            try:
+                proc.terminate()
+            except psutil.Error:
+                pass
+        _, alive = psutil.wait_procs(procs, timeout=3)
+        for proc in alive:
+            try:
+                proc.kill()
+            except psutil.Error:
+                pass
+        psutil.wait_procs(alive, timeout=1)
+
+    def profile_command(self, command, name=None, keep_running=False):
+        """
+        Executa um comando e mede o custo até sua árvore de processos ficar ociosa
+
+        Args:
+            command (str|list): Comando de inicialização
+            name (str): Nome exibido no resultado
+            keep_running (bool): Não encerra a árvore ao fim da medição
+
+        Returns:
+            dict: time_to_idle, cpu_seconds, peak/settled memory, io_bytes, impacto e economia estimada
+        """
+        launched = time.monotonic()
+        try:
+            args = split_command(command)
+            popen = subprocess.Popen(
+                args, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                start_new_session=os.name != 'nt'
+            )
+            root = psutil.Process(popen.pid)
+        except (OSError, ValueError, psutil.Error) as e:
+            return {'name': name or str(command), 'command': command, 'error': str(e)}
+
+        handles = {}
+        # últimos valores conhecidos por pid, para que processos encerrados continuem somando
+        last = {}
+        peak_rss = 0
+        settled_rss = 0
+        previous_cpu = 0.0
+        previous_time = launched
+        idle_since = None
+        time_to_idle = None
+        cpu_count = psutil.cpu_count() or 1
+
+        while True:
+            time.sleep(self.interval)
+            popen.poll()
+            now = time.monotonic()
+            tree = self._tree(root, handles)
+
+            rss = 0
+            for proc in tree:
+                sample = self._sample(proc)
+                if sample is None:
+                    continue
+                last[proc.pid] = sample
+                rss += sample[1]
+
+            cpu_total = sum(sample[0] for sample in last.values())
+            peak_rss = max(peak_rss, rss)
+            settled_rss = rss
+
+            # uso de CPU da árvore na última janela, em % de uma CPU
+            cpu_percent = (cpu_total - previous_cpu) / (now - previous_time) * 100
+            previous_cpu, previous_time = cpu_total, now
+
+            if not tree:
+                time_to_idle = now - launched
+                break
+            if cpu_percent < self.idle_cpu_percent:
+                if idle_since is None:
+                    idle_since = now - self.interval
+                if now - idle_since >= self.idle_window:
+                    time_to_idle = idle_since - launched
+                    break
+            else:
+                idle_since = None
+            if now - launched >= self.timeout:
+                break
+
+        if not keep_running:
+            self._stop_tree(handles)
+
+        cpu_seconds = sum(sample[0] for sample in last.values())
+        io_bytes = sum(sample[2] for sample in last.values())
+        result = {
+            'name': name or str(command),
+            'command': command,
+            'time_to_idle': time_to_idle,
+            'timed_out': time_to_idle is None,
+            'cpu_seconds': cpu_seconds,
+            'peak_memory_mb': peak_rss / MB,
+            'settled_memory_mb': settled_rss / MB,
+            'io_bytes': io_bytes,
+            'processes': len(handles),
+            'impact': classify_impact(cpu_seconds, io_bytes),
+        }
+        result['estimated_boot_savings'] = self.estimate_savings(result, cpu_count)
+        return result
+
+    def estimate_savings(self, result, cpu_count=None):
+        """
+        Estimativa (em segundos) do tempo de boot economizado ao adiar o item
+
+        Os programas de inicialização rodam em paralelo, então adiar um item
+        devolve ao boot a CPU e o disco que ele disputaria com os demais, e
+        não todo o seu tempo até ociosidade.
+        """
+        cpu_count = cpu_count or psutil.cpu_count() or 1
+        contention = result['cpu_seconds'] / cpu_count + result['io_bytes'] / self.io_bandwidth
+        wall = result['time_to_idle'] if result['time_to_idle'] is not None else self.timeout
+        return min(wall, contention)
+
+    def observe_running(self, entries):
+        """
+        Mede itens que já estão em execução (iniciados pelo boot)
+
+        Os valores são acumulados desde o início de cada processo; o tempo até
+        ociosidade não é conhecido nesse modo.
+
+        Returns:
+            list: Um resultado por entrada encontrada em execução
+        """
+        by_exe = {}
+        for entry in entries:
+            basename = command_basename(entry['command'])
+            if basename:
+                by_exe[basename] = entry
+
+        totals = {}
+        cpu_count = psutil.cpu_count() or 1
+        for proc in psutil.process_iter(['name', 'exe']):
+            # o nome pode diferir do executável (links simbólicos, scripts)
+            candidates = (os.path.basename(proc.info['exe'] or '').lower(), (proc.info['name'] or '').lower())
+            entry = next((by_exe[c] for c in candidates if c in by_exe), None)
+            if entry is None:
+                continue
+            sample = self._sample(proc)
+            if sample is None:
+                continue
+            total = totals.setdefault(entry['name'], {
+                'name': entry['name'], 'command': entry['command'], 'cpu_seconds': 0.0,
+                'memory_mb': 0.0, 'io_bytes': 0, 'processes': 0
+            })
+            total['cpu_seconds'] += sample[0]
+            total['memory_mb'] += sample[1] / MB
+            total['io_bytes'] += sample[2]
+            total['processes'] += 1
+
+        results = []
+        for total in totals.values():
+            total['time_to_idle'] = None
+            total['impact'] = classify_impact(total['cpu_seconds'], total['io_bytes'])
+            total['estimated_boot_savings'] = (
+                total['cpu_seconds'] / cpu_count + total['io_bytes'] / self.io_bandwidth
+            )
+            results.append(total)
+
+        return rank_by_impact(results)
+
+
+def rank_by_impact(results):
+    """Ordena os resultados do maior para o menor impacto estimado"""
+    valid = [r for r in results if 'error' not in r]
+    failed = [r for r in results if 'error' in r]
+    valid.sort(key=lambda r: (r['estimated_boot_savings'], r['cpu_seconds'], r['io_bytes']), reverse=True)
+    return valid + failed
+
+
+class StartupManager:
+    def __init__(self, sources=None, profiler=None):
+        """
+        Args:
+            sources (list): Fontes de programas de inicialização (padrão: as disponíveis no sistema)
+            profiler (StartupProfiler): Medidor de impacto
+        """
+        if sources is None:
+            sources = [s for s in (RegistryStartupSource(), XdgAutostartSource()) if s.available()]
+        self.sources = sources
+        self.profiler = profiler or StartupProfiler()
+
+    def get_startup_programs(self):
+        """
+        Lista os programas de inicialização de todas as fontes
+
+        Returns:
+            list: Dicts com name, command, location, enabled e source (e
+            profilable=False para itens de execução única)
+        """
+        programs = []
+        for source in self.sources:
+            try:
+                programs.extend(source.entries())
+            except Exception as e:
+                programs.append({'error': str(e), 'source': source.name})
+        return programs
+
+    def profile_startup(self, names=None, include_disabled=False, on_result=None):
+        """
+        Mede o impacto de cada programa executando-o isoladamente
+
+        Args:
+            names (list): Apenas estes programas (padrão: todos)
+            include_disabled (bool): Também mede itens desabilitados
+            on_result (callable): Chamado com cada resultado assim que medido
+
+        Returns:
+            dict: 'results' ordenados por impacto e 'total_estimated_savings'
+        """
+        wanted = {name.lower() for name in names} if names else None
+        results = []
+        for entry in self.get_startup_programs():
+            if 'error' in entry:
+                continue
+            if wanted is not None and entry['name'].lower() not in wanted:
+                continue
+            if not entry['enabled'] and not include_disabled:
+                continue
+
+            if not entry.get('profilable', True):
+                result = {
+                    'name': entry['name'],
+                    'command': entry['command'],
+                    'source': entry['source'],
+                    'error': 'Execução única (RunOnce): não medido para não repetir seus efeitos'
+                }
+                results.append(result)
+                if on_result:
+                    on_result(result)
+                continue
+
+            result = self.profiler.profile_command(entry['command'], name=entry['name'])
+            result['source'] = entry['source']
+            results.append(result)
+            if on_result:
+                on_result(result)
+
+        ranked = rank_by_impact(results)
+        return {
+            'results': ranked,
+            'total_estimated_savings': sum(r['estimated_boot_savings'] for r in ranked if 'error' not in r)
+        }
+
+    def observe_boot(self):
+        """Impacto acumulado dos programas de inicialização já em execução"""
+        entries = [e for e in self.get_startup_programs() if 'error' not in e and e['enabled']]
+        return self.profiler.observe_running(entries)
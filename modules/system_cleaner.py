@@ -7,11 +7,21 @@ import shutil
 import tempfile
 import glob
 from pathlib import Path
-import winreg
 from datetime import datetime, timedelta
 
+from backup_manager import is_store_path
+from profiler import tracer
+
 class SystemCleaner:
-    def __init__(self):
+    def __init__(self, quarantine=None, history=None):
+        """
+        Args:
+            quarantine (QuarantineStore): Quando informado, os arquivos são movidos
+                para a quarentena em vez de apagados, e podem ser restaurados
+            history (HistoryStore): Registra o resultado de cada limpeza completa
+        """
+        self.quarantine = quarantine
+        self.history = history
         self.temp_dirs = [
             os.path.join(os.environ.get('TEMP', ''), ''),
             os.path.join(os.environ.get('TMP', ''), ''),
@@ -40,12 +50,58 @@ class SystemCleaner:
             r'C:\Windows\System32\LogFiles',
             os.path.join(os.environ.get('LOCALAPPDATA', ''), 'Microsoft', 'Windows', 'WebCache')
         ]
+        
+        self.update_cache_dirs = [
+            r'C:\Windows\SoftwareDistribution\Download',
+            r'C:\Windows\System32\catroot2'
+        ]
+    
+    def _remove_file(self, file_path):
+        if self.quarantine is not None:
+            self.quarantine.quarantine(file_path)
+        else:
+            os.remove(file_path)
+    
+    def _remove_tree(self, directory):
+        if self._protected(directory):
+            return
+        if self.quarantine is not None:
+            self.quarantine.quarantine_tree(directory)
+        else:
+            shutil.rmtree(directory, ignore_errors=True)
+    
+    def _protected(self, path):
+        """Áreas de quarentena (inclusive de execuções anteriores) nunca são limpas"""
+        return is_store_path(path, [self.quarantine.root] if self.quarantine is not None else [])
+    
+    def _walk(self, directory):
+        """os.walk que não entra em áreas de quarentena"""
+        if self._protected(directory):
+            return
+        for root, dirs, files in os.walk(directory):
+            dirs[:] = [d for d in dirs if not self._protected(os.path.join(root, d))]
+            yield root, dirs, files
     
-    def get_directory_size(self, directory):
+    def begin_run(self, label='full_cleanup'):
+        """Agrupa os itens em quarentena das próximas etapas em uma execução"""
+        if self.quarantine is not None:
+            return self.quarantine.begin_run(label)
+        return None
+    
+    def get_directory_size(self, directory, count=True):
+        """
+        Tamanho total dos arquivos de um diretório
         
+        Args:
+            directory (str): Diretório a percorrer
+            count (bool): Soma os arquivos em cleanup.files_scanned; use False
+                quando outra passada já conta os mesmos arquivos
+        """
         total_size = 0
         try:
-            for dirpath, dirnames, filenames in os.walk(directory):
+            for dirpath, dirnames, filenames in self._walk(directory):
+                if count:
+                    tracer.count('cleanup.files_scanned', len(filenames))
                 for filename in filenames:
                     try:
                         filepath = os.path.join(dirpath, filename)
@@ -56,45 +112,61 @@ class SystemCleaner:
             pass
         return total_size
     
-    def clean_temp_files(self):
+    def clean_temp_files(self, dry_run=False):
         
         total_freed = 0
         files_deleted = 0
         errors = []
         
+        seen = set()
+        
         for temp_dir in self.temp_dirs:
             if not os.path.exists(temp_dir):
                 continue
+            # TEMP e TMP costumam apontar para o mesmo diretório
+            if self._normalize(temp_dir) in seen:
+                continue
+            seen.add(self._normalize(temp_dir))
                 
-            try:
-                size_before = self.get_directory_size(temp_dir)
-                
-                for root, dirs, files in os.walk(temp_dir):
-                    for file in files:
-                        try:
-                            file_path = os.path.join(root, file)
-                            
-                            if os.path.getmtime(file_path) < (datetime.now() - timedelta(days=1)).timestamp():
-                                os.remove(file_path)
-                                files_deleted += 1
-                        except (PermissionError, FileNotFoundError, OSError) as e:
-                            errors.append(f"Erro ao deletar {file_path}: {str(e)}")
-                    
+            with tracer.span('cleanup.temp_dir', path=temp_dir):
+                try:
+                    # os arquivos são contados na passada de remoção, que roda também em dry_run
+                    size_before = 0 if dry_run else self.get_directory_size(temp_dir, count=False)
                     
-                    for dir_name in dirs:
-                        try:
-                            dir_path = os.path.join(root, dir_name)
-                            if not os.listdir(dir_path):  
-                                os.rmdir(dir_path)
-                        except (PermissionError, FileNotFoundError, OSError):
+                    for root, dirs, files in self._walk(temp_dir):
+                        tracer.count('cleanup.files_scanned', len(files))
+                        for file in files:
+                            try:
+                                file_path = os.path.join(root, file)
+                                
+                                if os.path.getmtime(file_path) < (datetime.now() - timedelta(days=1)).timestamp():
+                                    if dry_run:
+                                        total_freed += os.path.getsize(file_path)
+                                    else:
+                                        self._remove_file(file_path)
+                                        tracer.count('cleanup.files_deleted')
+                                    files_deleted += 1
+                            except (PermissionError, FileNotFoundError, OSError) as e:
+                                errors.append(f"Erro ao deletar {file_path}: {str(e)}")
+                        
+                        if dry_run:
                             continue
-                
-                
-                size_after = self.get_directory_size(temp_dir)
-                total_freed += (size_before - size_after)
-                
-            except Exception as e:
-                errors.append(f"Erro ao limpar {temp_dir}: {str(e)}")
+                        
+                        for dir_name in dirs:
+                            try:
+                                dir_path = os.path.join(root, dir_name)
+                                if not os.listdir(dir_path):  
+                                    os.rmdir(dir_path)
+                            except (PermissionError, FileNotFoundError, OSError):
+                                continue
+                    
+                    
+                    if not dry_run:
+                        size_after = self.get_directory_size(temp_dir, count=False)
+                        total_freed += (size_before - size_after)
+                    
+                except Exception as e:
+                    errors.append(f"Erro ao limpar {temp_dir}: {str(e)}")
         
         return {
             'space_freed': self._bytes_to_readable(total_freed),
@@ -102,7 +174,7 @@ class SystemCleaner:
             'errors': errors
         }
     
-    def clean_browser_cache(self):
+    def clean_browser_cache(self, dry_run=False):
         
         total_freed = 0
         results = {}
@@ -111,28 +183,31 @@ class SystemCleaner:
             browser_freed = 0
             files_deleted = 0
             
-            for cache_dir in cache_dirs:
-                if '*' in cache_dir:
-                    expanded_dirs = glob.glob(cache_dir)
-                    for expanded_dir in expanded_dirs:
-                        if os.path.exists(expanded_dir):
-                            size_before = self.get_directory_size(expanded_dir)
+            with tracer.span('cleanup.browser', browser=browser):
+                for cache_dir in cache_dirs:
+                    if '*' in cache_dir:
+                        expanded_dirs = glob.glob(cache_dir)
+                        for expanded_dir in expanded_dirs:
+                            if os.path.exists(expanded_dir):
+                                size_before = self.get_directory_size(expanded_dir)
+                                try:
+                                    if not dry_run:
+                                        self._remove_tree(expanded_dir)
+                                    browser_freed += size_before
+                                    files_deleted += 1
+                                except Exception:
+                                    continue
+                    else:
+                        if os.path.exists(cache_dir):
+                            size_before = self.get_directory_size(cache_dir)
                             try:
-                                shutil.rmtree(expanded_dir, ignore_errors=True)
+                                if not dry_run:
+                                    self._remove_tree(cache_dir)
                                 browser_freed += size_before
                                 files_deleted += 1
                             except Exception:
                                 continue
-                else:
-                    if os.path.exists(cache_dir):
-                        size_before = self.get_directory_size(cache_dir)
-                        try:
-                            shutil.rmtree(cache_dir, ignore_errors=True)
-                            browser_freed += size_before
-                            files_deleted += 1
-                        except Exception:
-                            continue
-            
+                
             if browser_freed > 0:
                 results[browser] = {
                     'space_freed': self._bytes_to_readable(browser_freed),
@@ -143,7 +218,13 @@ class SystemCleaner:
         results['total_freed'] = self._bytes_to_readable(total_freed)
         return results
     
-    def clean_recycle_bin(self):
+    def clean_recycle_bin(self, dry_run=False):
+        
+        if dry_run:
+            return {
+                'space_freed': 'Desconhecido',
+                'success': True
+            }
         
         try:
             import winshell
@@ -182,7 +263,7 @@ class SystemCleaner:
                     'error': 'Não foi possível esvaziar a lixeira'
                 }
     
-    def clean_system_logs(self):
+    def clean_system_logs(self, dry_run=False):
         
         total_freed = 0
         files_deleted = 0
@@ -192,22 +273,25 @@ class SystemCleaner:
             if not os.path.exists(log_dir):
                 continue
                 
-            try:
-                for root, dirs, files in os.walk(log_dir):
-                    for file in files:
-                        if file.endswith(('.log', '.txt', '.etl')):
-                            try:
-                                file_path = os.path.join(root, file)
-                                if os.path.getmtime(file_path) < (datetime.now() - timedelta(days=7)).timestamp():
-                                    file_size = os.path.getsize(file_path)
-                                    os.remove(file_path)
-                                    total_freed += file_size
-                                    files_deleted += 1
-                            except (PermissionError, FileNotFoundError, OSError) as e:
-                                errors.append(f"Erro ao deletar {file_path}: {str(e)}")
-                                
-            except Exception as e:
-                errors.append(f"Erro ao acessar {log_dir}: {str(e)}")
+            with tracer.span('cleanup.log_dir', path=log_dir):
+                try:
+                    for root, dirs, files in self._walk(log_dir):
+                        for file in files:
+                            if file.endswith(('.log', '.txt', '.etl')):
+                                try:
+                                    file_path = os.path.join(root, file)
+                                    if os.path.getmtime(file_path) < (datetime.now() - timedelta(days=7)).timestamp():
+                                        file_size = os.path.getsize(file_path)
+                                        if not dry_run:
+                                            self._remove_file(file_path)
+                                            tracer.count('cleanup.files_deleted')
+                                        total_freed += file_size
+                                        files_deleted += 1
+                                except (PermissionError, FileNotFoundError, OSError) as e:
+                                    errors.append(f"Erro ao deletar {file_path}: {str(e)}")
+                                    
+                except Exception as e:
+                    errors.append(f"Erro ao acessar {log_dir}: {str(e)}")
         
         return {
             'space_freed': self._bytes_to_readable(total_freed),
@@ -215,7 +299,16 @@ class SystemCleaner:
             'errors': errors
         }
     
-    def clean_windows_update_cache(self):
+    def clean_windows_update_cache(self, dry_run=False):
+        
+        cache_dirs = self.update_cache_dirs
+        
+        if dry_run:
+            total_size = sum(self.get_directory_size(d) for d in cache_dirs if os.path.exists(d))
+            return {
+                'space_freed': self._bytes_to_readable(total_size),
+                'success': True
+            }
         
         try:
             import subprocess
@@ -229,17 +322,12 @@ class SystemCleaner:
                 except:
                     continue
             
-            cache_dirs = [
-                r'C:\Windows\SoftwareDistribution\Download',
-                r'C:\Windows\System32\catroot2'
-            ]
-            
             total_freed = 0
             for cache_dir in cache_dirs:
                 if os.path.exists(cache_dir):
                     try:
                         size_before = self.get_directory_size(cache_dir)
-                        shutil.rmtree(cache_dir, ignore_errors=True)
+                        self._remove_tree(cache_dir)
                         total_freed += size_before
                     except:
                         continue
@@ -263,26 +351,91 @@ class SystemCleaner:
                 'error': str(e)
             }
     
-    def full_cleanup(self):
+    def cleanup_steps(self):
+        """
+        Etapas independentes da limpeza completa
         
-        results = {}
+        Returns:
+            list: Tuplas (chave, mensagem, função que recebe dry_run)
+        """
+        return [
+            ('temp_files', "🧹 Limpando arquivos temporários...", self.clean_temp_files),
+            ('browser_cache', "🌐 Limpando cache dos navegadores...", self.clean_browser_cache),
+            ('recycle_bin', "🗑️ Esvaziando lixeira...", self.clean_recycle_bin),
+            ('system_logs', "📝 Limpando logs do sistema...", self.clean_system_logs),
+            ('windows_update', "🔄 Limpando cache do Windows Update...", self.clean_windows_update_cache),
+        ]
+    
+    def step_roots(self):
+        """Diretórios percorridos por cada etapa de cleanup_steps"""
+        return {
+            'temp_files': self.temp_dirs,
+            'browser_cache': [d for dirs in self.browser_cache_dirs.values() for d in dirs],
+            'recycle_bin': [],
+            'system_logs': self.log_dirs,
+            'windows_update': self.update_cache_dirs,
+        }
+    
+    def _normalize(self, path):
+        """Caminho absoluto, sem barra final e na caixa do sistema, para comparações"""
+        return os.path.normcase(os.path.abspath(path)).rstrip('\\/')
+    
+    def cleanup_groups(self):
+        """
+        Agrupa as etapas que percorrem diretórios sobrepostos
+        
+        Etapas de grupos diferentes podem rodar ao mesmo tempo; as de um mesmo
+        grupo devem rodar em sequência (ex.: arquivos temporários e Windows
+        Update percorrem SoftwareDistribution\\Download).
         
-        print("🧹 Limpando arquivos temporários...")
-        results['temp_files'] = self.clean_temp_files()
+        Returns:
+            list: Listas de etapas (como em cleanup_steps), na ordem original
+        """
+        def overlaps(a, b):
+            return a == b or a.startswith(b + os.sep) or b.startswith(a + os.sep)
         
-        print("🌐 Limpando cache dos navegadores...")
-        results['browser_cache'] = self.clean_browser_cache()
+        roots = {key: [self._normalize(p) for p in paths if p and p.strip()]
+                 for key, paths in self.step_roots().items()}
+        groups = []
+        for step in self.cleanup_steps():
+            mine = roots.get(step[0], [])
+            joined = [g for g in groups
+                      if any(overlaps(a, b) for other in g for a in roots.get(other[0], []) for b in mine)]
+            merged = [s for g in joined for s in g] + [step]
+            groups = [g for g in groups if g not in joined] + [merged]
         
-        print("🗑️ Esvaziando lixeira...")
-        results['recycle_bin'] = self.clean_recycle_bin()
+        order = [step[0] for step in self.cleanup_steps()]
+        for group in groups:
+            group.sort(key=lambda step: order.index(step[0]))
+        groups.sort(key=lambda group: order.index(group[0][0]))
+        return groups
+    
+    def full_cleanup(self, dry_run=False, verbose=True):
+        """
+        Executa todas as etapas de limpeza
         
-        print("📝 Limpando logs do sistema...")
-        results['system_logs'] = self.clean_system_logs()
+        Args:
+            dry_run (bool): Apenas calcula o espaço que seria liberado
+            verbose (bool): Exibe o progresso no terminal
+            
+        Returns:
+            dict: Resultado de cada etapa e o total liberado
+        """
+        results = {}
+        log = print if verbose else (lambda *args: None)
         
-        print("🔄 Limpando cache do Windows Update...")
-        results['windows_update'] = self.clean_windows_update_cache()
+        if not dry_run:
+            self.begin_run()
         
+        for key, message, step in self.cleanup_steps():
+            log(message)
+            with tracer.span(f"cleanup.{key}"):
+                results[key] = step(dry_run)
         
+        return self.summarize_cleanup(results, dry_run)
+    
+    def summarize_cleanup(self, results, dry_run=False):
+        """Acrescenta o total liberado e o horário ao resultado das etapas"""
         total_space = 0
         for category, data in results.items():
             if isinstance(data, dict) and 'space_freed' in data:
@@ -297,6 +450,17 @@ class SystemCleaner:
         
         results['total_space_freed'] = self._bytes_to_readable(total_space)
         results['cleanup_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        results['dry_run'] = dry_run
+        
+        if self.quarantine is not None and not dry_run:
+            # o espaço só é liberado de fato quando a quarentena expira
+            run = self.quarantine.current_run
+            results['quarantine_run'] = run
+            # a execução recém-terminada é a que o menu oferece para desfazer
+            results['quarantine'] = self.quarantine.enforce_budget(keep_runs=[run] if run else [])
+        
+        if self.history is not None:
+            self.history.record_cleanup(results)
         
         return results
     
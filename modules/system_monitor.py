@@ -1,12 +1,32 @@
 import psutil
 import platform
+import threading
 import time
 import json
 from datetime import datetime
 
+from process_registry import get_default_registry
+from profiler import tracer
+
 class SystemMonitor:
-    def __init__(self):
+    def __init__(self, disk_timeout=2.0, degraded_ttl=300, registry=None, history=None,
+                 snapshot=None, snapshot_max_age=5.0):
         self.start_time = time.time()
+        self.registry = registry if registry is not None else get_default_registry()
+        # HistoryStore opcional: as amostras são gravadas em segundo plano
+        self.history = history
+        # SnapshotReader opcional: reaproveita as amostras de um amostrador compartilhado
+        self.snapshot = snapshot
+        self.snapshot_max_age = snapshot_max_age
+        # último snapshot compartilhado já gravado no histórico
+        self._recorded_seq = None
+        self.disk_timeout = disk_timeout
+        self.degraded_ttl = degraded_ttl
+        # mountpoint -> instante em que deixa de ser considerado degradado
+        self._degraded_mounts = {}
+        # mountpoint -> sondagem ainda em andamento (thread possivelmente travada)
+        self._pending_probes = {}
+        self._probe_lock = threading.Lock()
     
     def get_system_info(self):
         """
@@ -24,7 +44,7 @@ class SystemMonitor:
             
             memory = psutil.virtual_memory()
             
-            disk = psutil.disk_usage('/')
+            disk = self._probe_disk_usage(['/']).get('/')
             
             return {
                 'Sistema': f"{uname.system} {uname.release}",
@@ -35,7 +55,7 @@ class SystemMonitor:
                 'CPU Lógica': f"{cpu_count_logical} threads",
                 'Frequência CPU': f"{cpu_freq.max:.0f} MHz" if cpu_freq else "N/A",
                 'RAM Total': f"{self._bytes_to_gb(memory.total):.1f} GB",
-                'Disco Total': f"{self._bytes_to_gb(disk.total):.1f} GB",
+                'Disco Total': f"{self._bytes_to_gb(disk.total):.1f} GB" if disk else "N/A",
                 'Uptime Sistema': self._get_uptime()
             }
         except Exception as e:
@@ -48,6 +68,15 @@ class SystemMonitor:
         Returns:
             dict: Estatísticas atuais
         """
+        shared = self._shared_snapshot()
+        if shared:
+            stats = shared['stats']
+            # cada snapshot é gravado uma vez, com o instante em que foi amostrado
+            if self.history is not None and shared['seq'] != self._recorded_seq:
+                self._recorded_seq = shared['seq']
+                self.history.record_stats(stats, ts=shared['timestamp'])
+            return stats
+        
         try:
             cpu_percent = psutil.cpu_percent(interval=1)
             cpu_per_core = psutil.cpu_percent(interval=1, percpu=True)
@@ -55,7 +84,7 @@ class SystemMonitor:
             memory = psutil.virtual_memory()
             swap = psutil.swap_memory()
             
-            disk = psutil.disk_usage('/')
+            disk = self._probe_disk_usage(['/']).get('/')
             disk_io = psutil.disk_io_counters()
             
             net_io = psutil.net_io_counters()
@@ -69,15 +98,18 @@ class SystemMonitor:
                 'memory_used': self._bytes_to_gb(memory.used),
                 'memory_available': self._bytes_to_gb(memory.available),
                 'swap': swap.percent,
-                'disk': disk.percent,
-                'disk_used': self._bytes_to_gb(disk.used),
-                'disk_free': self._bytes_to_gb(disk.free),
+                'disk': disk.percent if disk else 0.0,
+                'disk_used': self._bytes_to_gb(disk.used) if disk else 0.0,
+                'disk_free': self._bytes_to_gb(disk.free) if disk else 0.0,
                 'processes': process_count,
                 'network_sent': self._bytes_to_mb(net_io.bytes_sent),
                 'network_recv': self._bytes_to_mb(net_io.bytes_recv),
                 'timestamp': datetime.now().strftime('%H:%M:%S')
             }
             
+            if disk is None:
+                stats['disk_degraded'] = True
+            
             try:
                 temps = psutil.sensors_temperatures()
                 if temps:
@@ -88,15 +120,30 @@ class SystemMonitor:
             except:
                 pass
             
+            if self.history is not None:
+                self.history.record_stats(stats)
+            
             return stats
             
         except Exception as e:
             return {'error': str(e)}
     
+    def _shared_snapshot(self):
+        """Snapshot do amostrador compartilhado, se houver um recente"""
+        if self.snapshot is None:
+            return None
+        shared = self.snapshot.read()
+        if shared and shared['age'] <= self.snapshot_max_age:
+            return shared
+        return None
+    
     def get_top_processes(self, limit=10, sort_by='cpu'):
         """
         Obtém os processos que mais consomem recursos
         
+        Com um snapshot compartilhado recente que cubra `limit`, os processos
+        vêm dele (sem username/status) em vez de uma nova amostragem.
+        
         Args:
             limit (int): Número de processos a retornar
             sort_by (str): Critério de ordenação ('cpu', 'memory')
@@ -104,27 +151,60 @@ class SystemMonitor:
         Returns:
             list: Lista de processos
         """
+        shared = self._shared_snapshot() if sort_by in ('cpu', 'memory') else None
+        if shared and limit <= shared['top']:
+            key = 'cpu_percent' if sort_by == 'cpu' else 'memory_percent'
+            processes = sorted(shared['top_processes'], key=lambda p: p[key], reverse=True)[:limit]
+            if self.history is not None:
+                self.history.record_processes(processes, sort_by)
+            return processes
+        
         try:
-            processes = []
-            
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent', 'memory_info']):
-                try:
-                    pinfo = proc.info
-                    pinfo['memory_mb'] = pinfo['memory_info'].rss / 1024 / 1024
-                    processes.append(pinfo)
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
+            table = self.registry.table()
+            
+            if sort_by in ('cpu', 'memory'):
+                indices = table.top_k(sort_by, limit)
+            else:
+                indices = range(min(limit, len(table)))
+            
+            processes = self.registry.materialize(table, indices)
             
-            if sort_by == 'cpu':
-                processes.sort(key=lambda x: x['cpu_percent'], reverse=True)
-            elif sort_by == 'memory':
-                processes.sort(key=lambda x: x['memory_percent'], reverse=True)
+            if self.history is not None:
+                self.history.record_processes(processes, sort_by)
             
-            return processes[:limit]
+            return processes
             
         except Exception as e:
             return [{'error': str(e)}]
     
+    def get_history_summary(self, hours=24, pressure_threshold=85.0):
+        """
+        Resumo do histórico gravado
+        
+        Args:
+            hours (float): Janela do resumo em horas
+            pressure_threshold (float): % de memória considerado pressão
+            
+        Returns:
+            dict: Média/mín/máx das principais métricas, início da pressão de memória e processos frequentes
+        """
+        if self.history is None:
+            return {}
+        
+        try:
+            since = time.time() - hours * 3600
+            return {
+                'hours': hours,
+                'cpu': self.history.summary('cpu', since),
+                'memory': self.history.summary('memory', since),
+                'swap': self.history.summary('swap', since),
+                'disk': self.history.summary('disk', since),
+                'memory_pressure': self.history.first_crossing('memory', pressure_threshold, since, min_duration=300),
+                'top_processes': self.history.process_history(since, limit=5)
+            }
+        except Exception as e:
+            return {'error': str(e)}
+    
     def get_disk_usage_by_drive(self):
         """
         Obtém uso de disco por drive
@@ -135,25 +215,102 @@ class SystemMonitor:
         try:
             drives = {}
             partitions = psutil.disk_partitions()
+            usages = self._probe_disk_usage([p.mountpoint for p in partitions])
             
             for partition in partitions:
-                try:
-                    usage = psutil.disk_usage(partition.mountpoint)
-                    drives[partition.device] = {
-                        'total': self._bytes_to_gb(usage.total),
-                        'used': self._bytes_to_gb(usage.used),
-                        'free': self._bytes_to_gb(usage.free),
-                        'percent': (usage.used / usage.total) * 100,
-                        'filesystem': partition.fstype
-                    }
-                except PermissionError:
+                usage = usages.get(partition.mountpoint)
+                
+                if usage is None:
+                    if self._is_degraded(partition.mountpoint):
+                        drives[partition.device] = {
+                            'mountpoint': partition.mountpoint,
+                            'filesystem': partition.fstype,
+                            'degraded': True
+                        }
                     continue
+                
+                drives[partition.device] = {
+                    'total': self._bytes_to_gb(usage.total),
+                    'used': self._bytes_to_gb(usage.used),
+                    'free': self._bytes_to_gb(usage.free),
+                    'percent': (usage.used / usage.total) * 100 if usage.total else 0.0,
+                    'filesystem': partition.fstype
+                }
                     
             return drives
             
         except Exception as e:
             return {'error': str(e)}
     
+    def _probe_disk_usage(self, mountpoints, timeout=None):
+        """
+        Consulta o uso de disco de vários pontos de montagem em paralelo
+        
+        Cada ponto é sondado em uma thread própria. Pontos que não respondem
+        dentro do timeout são marcados como degradados e ignorados até
+        `degraded_ttl` expirar, sem bloquear os demais.
+        
+        Args:
+            mountpoints (list): Pontos de montagem a consultar
+            timeout (float): Tempo máximo de espera (padrão: disk_timeout)
+            
+        Returns:
+            dict: mountpoint -> resultado de psutil.disk_usage (ou None)
+        """
+        timeout = self.disk_timeout if timeout is None else timeout
+        results = {}
+        probes = {}
+        
+        with self._probe_lock:
+            for mountpoint in mountpoints:
+                if mountpoint in probes or self._is_degraded(mountpoint):
+                    continue
+                if mountpoint in self._pending_probes:
+                    # a sondagem anterior ainda não voltou: não empilha outra thread
+                    self._mark_degraded(mountpoint)
+                    continue
+                
+                probe = {'done': threading.Event(), 'usage': None}
+                self._pending_probes[mountpoint] = probe
+                probes[mountpoint] = probe
+                threading.Thread(target=self._run_probe, args=(mountpoint, probe), daemon=True).start()
+        
+        deadline = time.monotonic() + timeout
+        
+        for mountpoint, probe in probes.items():
+            if probe['done'].wait(max(0.0, deadline - time.monotonic())):
+                results[mountpoint] = probe['usage']
+            else:
+                with self._probe_lock:
+                    self._mark_degraded(mountpoint)
+        
+        return results
+    
+    def _run_probe(self, mountpoint, probe):
+        """Executa psutil.disk_usage para um ponto de montagem"""
+        try:
+            probe['usage'] = psutil.disk_usage(mountpoint)
+        except (PermissionError, OSError):
+            pass
+        finally:
+            with self._probe_lock:
+                if self._pending_probes.get(mountpoint) is probe:
+                    del self._pending_probes[mountpoint]
+            probe['done'].set()
+    
+    def _mark_degraded(self, mountpoint):
+        self._degraded_mounts[mountpoint] = time.monotonic() + self.degraded_ttl
+    
+    def _is_degraded(self, mountpoint):
+        """Verifica se o ponto de montagem está no cache de degradados"""
+        expires = self._degraded_mounts.get(mountpoint)
+        if expires is None:
+            return False
+        if expires <= time.monotonic():
+            self._degraded_mounts.pop(mountpoint, None)
+            return False
+        return True
+    
     def get_network_info(self):
         """
         Obtém informações de rede
@@ -220,6 +377,31 @@ class SystemMonitor:
         except:
             return "N/A"
     
+    def build_report(self):
+        """
+        Monta o relatório completo do sistema
+        
+        Returns:
+            dict: Relatório com informações, estatísticas, processos, discos e rede
+        """
+        report = {'timestamp': datetime.now().isoformat()}
+        sections = [
+            ('system_info', self.get_system_info),
+            ('real_time_stats', self.get_real_time_stats),
+            ('top_processes_cpu', lambda: self.get_top_processes(sort_by='cpu')),
+            ('top_processes_memory', lambda: self.get_top_processes(sort_by='memory')),
+            ('disk_usage', self.get_disk_usage_by_drive),
+            ('network_info', self.get_network_info)
+        ]
+        if self.history is not None:
+            sections.append(('history', lambda: self.get_history_summary(hours=24 * 7)))
+        
+        for section, collect in sections:
+            with tracer.span(f"report.{section}"):
+                report[section] = collect()
+        
+        return report
+    
     def export_report(self, filename=None):
         """
         Exporta um relatório completo do sistema
@@ -235,18 +417,12 @@ class SystemMonitor:
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 filename = f"system_report_{timestamp}.json"
             
-            report = {
-                'timestamp': datetime.now().isoformat(),
-                'system_info': self.get_system_info(),
-                'real_time_stats': self.get_real_time_stats(),
-                'top_processes_cpu': self.get_top_processes(sort_by='cpu'),
-                'top_processes_memory': self.get_top_processes(sort_by='memory'),
-                'disk_usage': self.get_disk_usage_by_drive(),
-                'network_info': self.get_network_info()
-            }
+            with tracer.span('report.build'):
+                report = self.build_report()
             
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(report, f, indent=2, ensure_ascii=False)
+            with tracer.span('report.write', filename=filename):
+                with open(filename, 'w', encoding='utf-8') as f:
+                    json.dump(report, f, indent=2, ensure_ascii=False)
             
             return filename
             
@@ -0,0 +1,356 @@
+"""
+Módulo de tweaks de performance verificados por benchmark
+
+Cada tweak guarda o valor anterior, roda um micro-benchmark antes e depois
+da alteração e só é mantido se o ganho medido superar tanto o ganho mínimo
+quanto o ruído das medições; caso contrário o valor anterior é restaurado.
+No Linux os tweaks são knobs sysctl lidos de uma raiz configurável (padrão
+/proc/sys); no Windows, valores do registro. Tweaks que só valem após
+reiniciar não podem ser medidos na hora: não são aplicados automaticamente,
+apenas listados como não verificáveis.
+"""
+
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MB = 1024 * 1024
+
+
+# micro-benchmarks: todos retornam uma taxa (maior é melhor)
+
+def bench_file_churn(directory=None, files=200, size=4096):
+    """Arquivos criados, gravados e apagados por segundo"""
+    directory = tempfile.mkdtemp(prefix='ioptimizer-bench-', dir=directory)
+    payload = b'\0' * size
+    try:
+        start = time.perf_counter()
+        for i in range(files):
+            path = os.path.join(directory, f"{i}.tmp")
+            with open(path, 'wb') as f:
+                f.write(payload)
+        for i in range(files):
+            os.remove(os.path.join(directory, f"{i}.tmp"))
+        return files / (time.perf_counter() - start)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def bench_memory_bandwidth(size=32 * MB, rounds=4):
+    """Bytes copiados por segundo entre dois buffers"""
+    source = bytearray(size)
+    target = bytearray(size)
+    view = memoryview(target)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        view[:] = source
+    return size * rounds / (time.perf_counter() - start)
+
+
+def bench_memory_under_cache_pressure(size=4 * MB, pressure=2, directory=None):
+    """
+    Bytes de memória anônima retocados por segundo após pressão de page cache
+
+    Um buffer é tocado, um arquivo `pressure` vezes maior é gravado e lido
+    (enchendo o page cache) e o buffer é percorrido de novo. Quanto mais o
+    kernel preferir levar páginas anônimas para o swap em vez de descartar
+    cache (vm.swappiness), mais lenta é a segunda passagem.
+    """
+    page = 4096
+    buffer = bytearray(size)
+    for offset in range(0, size, page):
+        buffer[offset] = 1
+
+    chunk = b'\0' * MB
+    fd, path = tempfile.mkstemp(prefix='ioptimizer-bench-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for _ in range(size * pressure // MB):
+                f.write(chunk)
+        with open(path, 'rb') as f:
+            while f.read(MB):
+                pass
+    finally:
+        os.remove(path)
+
+    start = time.perf_counter()
+    for offset in range(0, size, page):
+        buffer[offset] = 2
+    return size / (time.perf_counter() - start)
+
+
+def bench_process_spawn(count=5):
+    """Processos iniciados e finalizados por segundo"""
+    start = time.perf_counter()
+    for _ in range(count):
+        subprocess.run([sys.executable, '-S', '-c', 'pass'], stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, check=False)
+    return count / (time.perf_counter() - start)
+
+
+BENCHMARKS = {
+    'file_churn': bench_file_churn,
+    'memory_bandwidth': bench_memory_bandwidth,
+    'memory_under_cache_pressure': bench_memory_under_cache_pressure,
+    'process_spawn': bench_process_spawn,
+}
+
+
+class SysctlBackend:
+    """Knobs sysctl como arquivos sob uma raiz (padrão /proc/sys)"""
+
+    def __init__(self, root='/proc/sys'):
+        self.root = root
+
+    def _path(self, knob):
+        return os.path.join(self.root, *knob.split('.'))
+
+    def exists(self, knob):
+        return os.path.exists(self._path(knob))
+
+    def read(self, knob):
+        with open(self._path(knob), encoding='utf-8') as f:
+            return f.read().strip()
+
+    def write(self, knob, value):
+        with open(self._path(knob), 'w', encoding='utf-8') as f:
+            f.write(f"{value}\n")
+
+
+class RegistryBackend:
+    """Valores do registro do Windows no formato 'HIVE\\caminho\\valor'"""
+
+    def _split(self, knob):
+        import winreg
+
+        hive, _, rest = knob.partition('\\')
+        key_path, _, value_name = rest.rpartition('\\')
+        return winreg, getattr(winreg, hive), key_path, value_name
+
+    def exists(self, knob):
+        try:
+            self.read(knob)
+            return True
+        except OSError:
+            return False
+
+    def read(self, knob):
+        """Retorna (valor, tipo); o tipo é reaproveitado ao restaurar"""
+        winreg, hive, key_path, value_name = self._split(knob)
+        with winreg.OpenKey(hive, key_path) as key:
+            value, kind = winreg.QueryValueEx(key, value_name)
+        return (value, kind)
+
+    def write(self, knob, value):
+        winreg, hive, key_path, value_name = self._split(knob)
+        if isinstance(value, tuple):
+            value, kind = value
+        else:
+            kind = winreg.REG_SZ if isinstance(value, str) else winreg.REG_DWORD
+        with winreg.CreateKeyEx(hive, key_path, 0, winreg.KEY_SET_VALUE) as key:
+            winreg.SetValueEx(key, value_name, 0, kind, value)
+
+
+class Tweak:
+    def __init__(self, name, knob, value, benchmark, description='', requires_reboot=False, repeats=None):
+        """
+        Args:
+            name (str): Nome exibido
+            knob (str): Chave no backend (ex.: 'vm.swappiness')
+            value: Valor aplicado
+            benchmark (str): Benchmark de BENCHMARKS usado para verificar o ganho
+                (None se o efeito não puder ser medido logo após aplicar)
+            description (str): Descrição curta
+            requires_reboot (bool): Só tem efeito após reiniciar
+            repeats (int): Execuções do benchmark (padrão: o de SystemTweaks)
+        """
+        self.name = name
+        self.knob = knob
+        self.value = value
+        self.benchmark = None if requires_reboot else benchmark
+        self.description = description
+        self.requires_reboot = requires_reboot
+        self.repeats = repeats
+
+    @property
+    def verifiable(self):
+        return self.benchmark is not None
+
+
+LINUX_TWEAKS = [
+    Tweak('Reduzir uso de swap', 'vm.swappiness', 10, 'memory_under_cache_pressure',
+          "Mantém páginas de aplicativos na RAM por mais tempo", repeats=3),
+    Tweak('Manter cache de diretórios', 'vm.vfs_cache_pressure', 50, 'file_churn',
+          "Preserva dentries/inodes em cache"),
+    Tweak('Gravação em segundo plano antecipada', 'vm.dirty_background_ratio', 5, 'file_churn',
+          "Começa a descarregar páginas sujas mais cedo"),
+    Tweak('Limite de páginas sujas', 'vm.dirty_ratio', 10, 'file_churn',
+          "Evita pausas longas de gravação"),
+    Tweak('Desativar autogroup do agendador', 'kernel.sched_autogroup_enabled', 0, 'process_spawn',
+          "Agendamento por processo em vez de por sessão"),
+]
+
+# os valores do registro abaixo só são lidos na inicialização do sistema; ficam
+# listados como não verificáveis
+WINDOWS_TWEAKS = [
+    Tweak('Desativar atualização de último acesso (NTFS)',
+          r"HKEY_LOCAL_MACHINE\SYSTEM\CurrentControlSet\Control\FileSystem\NtfsDisableLastAccessUpdate",
+          1, None, "Evita uma gravação de metadados a cada leitura", requires_reboot=True),
+    Tweak('Responsividade do sistema',
+          r"HKEY_LOCAL_MACHINE\SOFTWARE\Microsoft\Windows NT\CurrentVersion\Multimedia\SystemProfile\SystemResponsiveness",
+          10, None, "Reserva menos CPU para tarefas multimídia em segundo plano", requires_reboot=True),
+    Tweak('Manter kernel na memória',
+          r"HKEY_LOCAL_MACHINE\SYSTEM\CurrentControlSet\Control\Session Manager\Memory Management\DisablePagingExecutive",
+          1, None, "Impede que drivers e kernel sejam paginados", requires_reboot=True),
+]
+
+
+class SystemTweaks:
+    def __init__(self, backend=None, tweaks=None, root=None, min_gain=0.03, repeats=5, benchmarks=None):
+        """
+        Args:
+            backend: Backend de leitura/escrita (padrão: registro no Windows, sysctl nos demais)
+            tweaks (list): Tweaks disponíveis (padrão: os do sistema atual)
+            root (str): Raiz dos knobs sysctl (ex.: uma árvore /proc/sys falsa)
+            min_gain (float): Ganho relativo mínimo para manter um tweak
+            repeats (int): Execuções de cada benchmark antes e depois
+            benchmarks (dict): Benchmarks por nome (padrão: BENCHMARKS)
+        """
+        if backend is None:
+            backend = RegistryBackend() if os.name == 'nt' else SysctlBackend(root or '/proc/sys')
+        if tweaks is None:
+            tweaks = WINDOWS_TWEAKS if os.name == 'nt' else LINUX_TWEAKS
+
+        self.backend = backend
+        self.tweaks = tweaks
+        self.min_gain = min_gain
+        self.repeats = repeats
+        self.benchmarks = benchmarks or BENCHMARKS
+        # knob -> valor anterior dos tweaks mantidos
+        self.applied = {}
+        self.history = []
+
+    def measure(self, benchmark, repeats=None):
+        """Executa um benchmark `repeats` vezes (padrão: o da instância) e retorna as amostras"""
+        func = self.benchmarks[benchmark]
+        func()  # aquecimento
+        return [func() for _ in range(repeats or self.repeats)]
+
+    def unverifiable_tweaks(self):
+        """Tweaks que não podem ser medidos na hora e por isso não são aplicados"""
+        return [tweak for tweak in self.tweaks if not tweak.verifiable]
+
+    def _noise(self, samples):
+        """Dispersão relativa das amostras (desvio padrão / mediana)"""
+        if len(samples) < 2:
+            return 0.0
+        return statistics.stdev(samples) / statistics.median(samples)
+
+    def apply_tweak(self, tweak):
+        """
+        Aplica um tweak e o mantém apenas se o benchmark mostrar ganho
+
+        Tweaks sem benchmark não são aplicados: o resultado sai com
+        'unverifiable' e o motivo em 'error'.
+
+        Returns:
+            dict: Valores anterior/novo, medições, ganho e se foi mantido ou revertido
+        """
+        result = {
+            'name': tweak.name,
+            'knob': tweak.knob,
+            'value': tweak.value,
+            'benchmark': tweak.benchmark,
+            'kept': False,
+            'reverted': False,
+            'unverifiable': not tweak.verifiable
+        }
+
+        try:
+            if not self.backend.exists(tweak.knob):
+                result['error'] = 'Configuração não disponível neste sistema'
+                return result
+
+            previous = self.backend.read(tweak.knob)
+            result['previous'] = previous
+            # o registro retorna (valor, tipo)
+            current = previous[0] if isinstance(previous, tuple) else previous
+            if str(current) == str(tweak.value):
+                result['error'] = 'Valor já aplicado'
+                return result
+
+            if not tweak.verifiable:
+                reason = 'só tem efeito após reiniciar' if tweak.requires_reboot else 'sem benchmark'
+                result['error'] = f"Não verificável ({reason}); não aplicado"
+                return result
+
+            before = self.measure(tweak.benchmark, tweak.repeats)
+            self.backend.write(tweak.knob, tweak.value)
+            try:
+                after = self.measure(tweak.benchmark, tweak.repeats)
+            except Exception:
+                self.backend.write(tweak.knob, previous)
+                raise
+
+            baseline = statistics.median(before)
+            gain = (statistics.median(after) - baseline) / baseline
+            threshold = max(self.min_gain, self._noise(before), self._noise(after))
+
+            result.update({
+                'before': baseline,
+                'after': statistics.median(after),
+                'gain': gain,
+                'threshold': threshold
+            })
+
+            if gain > threshold:
+                self.applied.setdefault(tweak.knob, previous)
+                result['kept'] = True
+            else:
+                self.backend.write(tweak.knob, previous)
+                result['reverted'] = True
+
+        except Exception as e:
+            result['error'] = str(e)
+
+        return result
+
+    def apply_performance_tweaks(self, on_result=None):
+        """
+        Aplica os tweaks disponíveis, mantendo apenas os que trazem ganho medido
+
+        Args:
+            on_result (callable): Chamado com o resultado detalhado de cada tweak
+
+        Returns:
+            dict: Nome do tweak -> True se foi mantido
+        """
+        results = {}
+        for tweak in self.tweaks:
+            result = self.apply_tweak(tweak)
+            self.history.append(result)
+            results[tweak.name] = result['kept']
+            if on_result:
+                on_result(result)
+        return results
+
+    def revert_all(self):
+        """
+        Restaura os valores anteriores de todos os tweaks mantidos
+
+        Returns:
+            dict: Knob -> True se restaurado
+        """
+        restored = {}
+        for knob, previous in list(self.applied.items()):
+            try:
+                self.backend.write(knob, previous)
+                del self.applied[knob]
+                restored[knob] = True
+            except Exception:
+                restored[knob] = False
+        return restored
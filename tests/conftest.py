@@ -0,0 +1,20 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, 'modules'))
+sys.path.append(os.path.join(ROOT, 'utils'))
+
+import pytest
+
+from profiler import tracer
+
+
+@pytest.fixture
+def traced():
+    """Tracer global ativado e zerado durante o teste"""
+    tracer.reset()
+    tracer.enable()
+    yield tracer
+    tracer.disable()
+    tracer.reset()
@@ -0,0 +1,66 @@
+import asyncio
+
+from async_core import AsyncOptimizer
+from profiler import tracer
+
+
+def test_spans_in_executor_threads_keep_their_parent(traced):
+    optimizer = AsyncOptimizer(monitor=object(), process_mgr=object())
+
+    def work(name):
+        with tracer.span(f"worker.{name}"):
+            return name
+
+    async def scenario():
+        async def phase(name, run):
+            with tracer.span(f"phase.{name}"):
+                return await run(work, name)
+
+        return await asyncio.gather(phase('fs', optimizer._fs), phase('psutil', optimizer._psutil))
+
+    assert asyncio.run(scenario()) == ['fs', 'psutil']
+    parents = {span['name']: span['parent'] for span in traced.spans}
+    assert parents['worker.fs'] == 'phase.fs'
+    assert parents['worker.psutil'] == 'phase.psutil'
+
+
+def test_cleanup_steps_with_overlapping_roots_run_in_sequence(tmp_path):
+    import threading
+    import time
+
+    from system_cleaner import SystemCleaner
+
+    cleaner = SystemCleaner()
+    cleaner.temp_dirs = [str(tmp_path / 'Windows')]
+    cleaner.update_cache_dirs = [str(tmp_path / 'Windows' / 'Download')]
+    cleaner.log_dirs = [str(tmp_path / 'Logs')]
+    cleaner.browser_cache_dirs = {}
+
+    lock = threading.Lock()
+    active = set()
+    overlaps = []
+
+    def fake(key):
+        def step(dry_run):
+            with lock:
+                active.add(key)
+                overlaps.append(set(active))
+            time.sleep(0.2 if key == 'temp_files' else 0.05)
+            with lock:
+                active.discard(key)
+            return {'space_freed': '0 B'}
+        return step
+
+    for key, name in [('temp_files', 'clean_temp_files'), ('browser_cache', 'clean_browser_cache'),
+                      ('recycle_bin', 'clean_recycle_bin'), ('system_logs', 'clean_system_logs'),
+                      ('windows_update', 'clean_windows_update_cache')]:
+        setattr(cleaner, name, fake(key))
+
+    optimizer = AsyncOptimizer(monitor=object(), cleaner=cleaner, process_mgr=object())
+    results = asyncio.run(optimizer.full_cleanup(dry_run=True))
+    optimizer.close()
+
+    assert list(results)[:5] == ['temp_files', 'browser_cache', 'recycle_bin', 'system_logs', 'windows_update']
+    assert not any({'temp_files', 'windows_update'} <= seen for seen in overlaps)
+    # as demais etapas continuam em paralelo
+    assert any(len(seen) > 1 for seen in overlaps)
@@ -0,0 +1,45 @@
+import os
+
+from backup_manager import QuarantineStore
+
+
+def _quarantine_copies(store, directory, names, content):
+    paths = []
+    for name in names:
+        path = directory / name
+        path.write_bytes(content)
+        store.quarantine(str(path))
+        paths.append(path)
+    return paths
+
+
+def test_shared_object_is_restored_as_copy(tmp_path):
+    store = QuarantineStore(root=str(tmp_path / 'q'), budget_bytes=None)
+    store.begin_run()
+    first, second = _quarantine_copies(store, tmp_path, ['a.txt', 'b.txt'], b'original')
+
+    store.restore(path=str(first))
+    with open(first, 'r+b') as f:
+        f.write(b'CHANGED!')
+
+    store.restore(path=str(second))
+    assert second.read_bytes() == b'original'
+    assert os.stat(first).st_ino != os.stat(second).st_ino
+    store.close()
+
+
+def test_budget_spares_current_run(tmp_path):
+    store = QuarantineStore(root=str(tmp_path / 'q'), budget_bytes=None)
+    old_run = store.begin_run()
+    _quarantine_copies(store, tmp_path, ['old.bin'], b'o' * 1000)
+    run = store.begin_run()
+    _quarantine_copies(store, tmp_path, ['new.bin'], b'n' * 1000)
+
+    result = store.enforce_budget(budget_bytes=10)
+
+    runs = {r['run'] for r in store.runs()}
+    assert run in runs and old_run not in runs
+    assert result['evicted_objects'] == 1
+    assert len(store.restore(run=run)['restored']) == 1
+    assert (tmp_path / 'new.bin').read_bytes() == b'n' * 1000
+    store.close()
@@ -0,0 +1,76 @@
+import json
+import os
+import shutil
+import subprocess
+import time
+
+import psutil
+import pytest
+from click.testing import CliRunner
+
+from cli import cli
+
+
+@pytest.fixture
+def runner():
+    return CliRunner()
+
+
+def test_stats_emits_json_and_ndjson(runner):
+    result = runner.invoke(cli, ['stats', '--no-shared'])
+    assert result.exit_code == 0
+    assert 0 <= json.loads(result.output)['memory'] <= 100
+
+    result = runner.invoke(cli, ['stats', '--no-shared', '--count', '2'])
+    assert result.exit_code == 0
+    lines = result.output.splitlines()
+    assert len(lines) == 2 and all('cpu' in json.loads(line) for line in lines)
+
+
+def test_top_emits_sorted_processes(runner):
+    result = runner.invoke(cli, ['top', '--no-shared', '--limit', '3', '--sort', 'memory'])
+    assert result.exit_code == 0
+    processes = json.loads(result.output)
+    assert 0 < len(processes) <= 3
+    memory = [proc['memory_percent'] for proc in processes]
+    assert memory == sorted(memory, reverse=True)
+
+    result = runner.invoke(cli, ['top', '--no-shared', '--limit', '2', '--ndjson'])
+    assert [json.loads(line)['pid'] for line in result.output.splitlines()]
+
+
+def test_clean_dry_run_deletes_nothing(runner, tmp_path, monkeypatch):
+    temp = tmp_path / 'temp'
+    temp.mkdir()
+    old = time.time() - 3 * 86400
+    for i in range(3):
+        path = temp / f"{i}.tmp"
+        path.write_bytes(b'x' * 1000)
+        os.utime(path, (old, old))
+    for variable in ('TEMP', 'TMP'):
+        monkeypatch.setenv(variable, str(temp))
+    for variable in ('LOCALAPPDATA', 'APPDATA'):
+        monkeypatch.setenv(variable, str(tmp_path / variable))
+
+    result = runner.invoke(cli, ['clean', '--dry-run'])
+
+    assert result.exit_code == 0
+    output = json.loads(result.output)
+    assert output['dry_run'] and output['temp_files']['files_deleted'] == 3
+    assert sorted(p.name for p in temp.iterdir()) == ['0.tmp', '1.tmp', '2.tmp']
+
+
+def test_kill_refuses_blocked_processes(runner, tmp_path):
+    # o nome do link vira o nome do processo
+    binary = tmp_path / 'explorer.exe'
+    binary.symlink_to(shutil.which('sleep'))
+    child = subprocess.Popen([str(binary), '30'])
+    try:
+        for target in (str(child.pid), 'explorer.exe'):
+            result = runner.invoke(cli, ['kill', target, '--timeout', '1'])
+            assert result.exit_code == 1
+            assert json.loads(result.output)['blocked'] == [child.pid]
+        assert psutil.Process(child.pid).is_running() and child.poll() is None
+    finally:
+        child.kill()
+        child.wait()
@@ -0,0 +1,129 @@
+import asyncio
+import socket
+
+from fleet import (
+    FleetAgent, FleetCollector, decode_payload, encode_frame, FRAME_HEADER, print_fleet_view, read_frame
+)
+
+
+class StaticMonitor:
+    """Monitor com valores fixos, para não esperar a medição de CPU do psutil"""
+
+    registry = None
+
+    def __init__(self, cpu, fail=False):
+        self.cpu = cpu
+        self.fail = fail
+
+    def get_real_time_stats(self):
+        if self.fail:
+            return {'error': 'sensor indisponível'}
+        return {'cpu': self.cpu, 'memory': 50.0, 'cpu_cores': [self.cpu]}
+
+    def get_top_processes(self, limit=10, sort_by='cpu'):
+        return [{'pid': 100 + i, 'name': f"proc{i}", 'cpu_percent': self.cpu - i, 'memory_mb': 10.0 * i}
+                for i in range(limit)]
+
+
+class StaticManager:
+    def get_resource_heavy_processes(self):
+        return [{'pid': 1, 'name': 'heavy', 'cpu_percent': 90.0, 'memory_mb': 512.0}]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _agent(cpu, **kwargs):
+    return FleetAgent(f"127.0.0.1:{_free_port()}", interval=0.05, monitor=StaticMonitor(cpu, **kwargs),
+                      manager=StaticManager())
+
+
+def test_frame_roundtrip_compresses_large_payloads():
+    message = {'op': 'snapshot', 'data': ['x' * 50] * 100}
+    frame = encode_frame(message)
+    size, flags = FRAME_HEADER.unpack(frame[:FRAME_HEADER.size])
+    assert flags == 1 and size == len(frame) - FRAME_HEADER.size
+    assert decode_payload(frame[FRAME_HEADER.size:], flags) == message
+
+
+def _collect(agents, mode, duration):
+    async def scenario():
+        for agent in agents:
+            await agent.start()
+        try:
+            collector = FleetCollector([f"127.0.0.1:{a.address[2]}" for a in agents], interval=0.05,
+                                       mode=mode, timeout=1.0)
+            return await collector.run(duration=duration)
+        finally:
+            for agent in agents:
+                await agent.stop()
+
+    return asyncio.run(scenario())
+
+
+def test_collector_aggregates_localhost_agents():
+    for mode in ('subscribe', 'poll'):
+        view = _collect([_agent(10.0), _agent(30.0), _agent(20.0)], mode, 0.5)
+        assert view['hosts_total'] == 3
+        assert view['hosts_online'] == 3
+        assert abs(view['avg_cpu'] - 20.0) < 1e-6
+        assert view['top_cpu'][0]['cpu_percent'] == 30.0
+        for host in view['hosts'].values():
+            assert host['heavy_count'] == 1
+            assert host['heavy'][0][1] == 'heavy'
+
+
+def test_zero_duration_returns():
+    view = _collect([_agent(5.0)], 'subscribe', 0)
+    assert view['hosts_total'] == 1
+
+
+def test_unreachable_and_failing_hosts_render(capsys):
+    failing = _agent(0.0, fail=True)
+
+    async def scenario():
+        await failing.start()
+        try:
+            collector = FleetCollector([f"127.0.0.1:{failing.address[2]}", f"127.0.0.1:{_free_port()}"],
+                                       interval=0.05, timeout=0.5)
+            return await collector.run(duration=0.5)
+        finally:
+            await failing.stop()
+
+    view = asyncio.run(scenario())
+    print_fleet_view(view)
+    output = capsys.readouterr().out
+    assert 'indisponível (sensor indisponível)' in output
+    assert 'offline' in output
+
+
+class BrokenMonitor(StaticMonitor):
+    def get_real_time_stats(self):
+        raise RuntimeError('psutil quebrou')
+
+
+def test_sampling_failure_reaches_clients():
+    agent = FleetAgent(f"127.0.0.1:{_free_port()}", interval=0.05, monitor=BrokenMonitor(0.0),
+                       manager=StaticManager())
+
+    async def scenario():
+        await agent.start()
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', agent.address[2])
+            writer.write(encode_frame({'op': 'snapshot'}))
+            await writer.drain()
+            reply = await asyncio.wait_for(read_frame(reader), 2.0)
+            writer.close()
+
+            collector = FleetCollector([f"127.0.0.1:{agent.address[2]}"], interval=0.05, timeout=0.5)
+            return reply, await collector.run(duration=0.3)
+        finally:
+            await agent.stop()
+
+    reply, view = asyncio.run(scenario())
+    assert reply['op'] == 'error' and reply['error'] == 'psutil quebrou'
+    host = next(iter(view['hosts'].values()))
+    assert not host['online'] and host['error'] == 'psutil quebrou'
@@ -0,0 +1,73 @@
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+import psutil
+
+import io_monitor
+from io_monitor import IoRateTracker
+from process_registry import ProcessRegistry
+
+WRITES = 100
+CHUNK = 4096
+# escreve WRITES blocos a cada linha recebida e sincroniza com o disco
+WRITER = f"""
+import os, sys
+fd = os.open(sys.argv[1], os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+for line in sys.stdin:
+    for _ in range({WRITES}):
+        os.write(fd, b'x' * {CHUNK})
+    os.fsync(fd)
+    os.write(1, b'ok\\n')
+"""
+
+
+def test_rates_follow_a_child_writing_known_bytes(tmp_path, monkeypatch):
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(io_monitor, 'time', SimpleNamespace(monotonic=lambda: clock.now, sleep=time.sleep))
+    child = subprocess.Popen([sys.executable, '-c', WRITER, str(tmp_path / 'out')],
+                             stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    try:
+        tracker = IoRateTracker(registry=ProcessRegistry(prime_interval=0.05, max_age=0))
+        tracker.rates(interval=0)
+
+        child.stdin.write(b'go\n')
+        child.stdin.flush()
+        assert child.stdout.readline() == b'ok\n'
+        clock.now += 1.0
+
+        rate = next(r for r in tracker.rates() if r['pid'] == child.pid)
+        # os blocos mais a resposta 'ok' no stdout
+        assert WRITES <= rate['write_ops_per_sec'] <= WRITES + 5
+        assert rate['write_bytes_per_sec'] >= WRITES * CHUNK
+    finally:
+        child.kill()
+        child.wait()
+
+
+def _conn(pid, status):
+    return SimpleNamespace(pid=pid, status=status)
+
+
+def test_connection_counts_group_by_pid(monkeypatch):
+    connections = [
+        _conn(10, psutil.CONN_ESTABLISHED),
+        _conn(10, psutil.CONN_ESTABLISHED),
+        _conn(10, psutil.CONN_LISTEN),
+        _conn(20, psutil.CONN_TIME_WAIT),
+        _conn(None, psutil.CONN_ESTABLISHED),
+    ]
+    monkeypatch.setattr(psutil, 'net_connections', lambda kind='inet': connections)
+    tracker = IoRateTracker(registry=object())
+
+    assert tracker.connection_counts() == {
+        10: {'connections': 3, 'established': 2, 'listening': 1},
+        20: {'connections': 1, 'established': 0, 'listening': 0},
+    }
+
+    def denied(kind='inet'):
+        raise psutil.AccessDenied()
+
+    monkeypatch.setattr(psutil, 'net_connections', denied)
+    assert tracker.connection_counts() == {}
@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+
+import pytest
+
+import leak_detector
+from leak_detector import LeakDetector
+from process_table import ProcessTable
+
+MB = 1024 * 1024
+
+
+class FakeRegistry:
+    """Registro cujas linhas (pid, nome, create_time, MB) são definidas pelo teste"""
+
+    def __init__(self):
+        self.rows = []
+
+    def table(self, max_age=None):
+        table = ProcessTable()
+        for pid, name, create_time, mb in self.rows:
+            table.append(pid, name, 0.0, int(mb * MB), 0.0, create_time)
+        return table
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # cada amostra avança 0,1 h no relógio do detector
+    state = SimpleNamespace(now=0.0)
+    monkeypatch.setattr(leak_detector, 'time', SimpleNamespace(time=lambda: state.now))
+    return state
+
+
+def _sample(detector, clock, registry, rows):
+    registry.rows = rows
+    detector.sample()
+    clock.now += 360
+
+
+def _trend(detector, pid):
+    return next(t for t in detector.trends() if t['pid'] == pid)
+
+
+def test_window_wraps_and_report_applies_thresholds(clock):
+    registry = FakeRegistry()
+    detector = LeakDetector(registry=registry, window=5, min_samples=5, min_slope_mb_h=50, min_r2=0.9)
+    noise = [0, 30, 5, 40, 10, 50, 0, 80, 10, 100]
+
+    for i in range(10):
+        # o vazamento começa só na metade: a janela deve esquecer a parte plana
+        leaking = 100 if i < 5 else 100 + 10 * (i - 4)
+        _sample(detector, clock, registry, [
+            (1, 'leaky', 1.0, leaking),
+            (2, 'stable', 2.0, 200),
+            (3, 'noisy', 3.0, 300 + noise[i]),
+        ])
+
+    leaky = _trend(detector, 1)
+    assert leaky['samples'] == 5
+    assert leaky['slope_mb_h'] == pytest.approx(100.0)
+    assert leaky['r2'] == pytest.approx(1.0)
+    assert leaky['current_mb'] == pytest.approx(150.0)
+    assert leaky['span_h'] == pytest.approx(0.4)
+
+    stable = _trend(detector, 2)
+    assert stable['slope_mb_h'] == pytest.approx(0.0, abs=1e-6) and stable['r2'] == 0.0
+
+    noisy = _trend(detector, 3)
+    assert noisy['slope_mb_h'] >= 50 and noisy['r2'] < 0.9
+
+    assert [t['pid'] for t in detector.report()] == [1]
+
+
+def test_slot_of_exited_process_is_reused_from_scratch(clock):
+    registry = FakeRegistry()
+    detector = LeakDetector(registry=registry, window=4, min_samples=3)
+
+    for i in range(4):
+        _sample(detector, clock, registry, [(1, 'old', 1.0, 1000 + 100 * i)])
+    slot = detector._slots[(1, 1.0)]
+
+    # o processo saiu; depois outro recebeu o mesmo pid
+    _sample(detector, clock, registry, [])
+    assert detector._slots == {} and detector._free == [slot]
+    for i in range(2):
+        _sample(detector, clock, registry, [(1, 'new', 9.0, 50)])
+    assert detector._slots == {(1, 9.0): slot}
+    assert detector.trends() == []
+
+    _sample(detector, clock, registry, [(1, 'new', 9.0, 50)])
+    trend = _trend(detector, 1)
+    assert trend['name'] == 'new' and trend['samples'] == 3
+    assert trend['slope_mb_h'] == pytest.approx(0.0, abs=1e-6)
+    assert trend['current_mb'] == pytest.approx(50.0)
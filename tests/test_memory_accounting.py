@@ -0,0 +1,58 @@
+import shutil
+import subprocess
+import time
+
+import psutil
+import pytest
+
+from memory_accounting import MemoryAccountant
+from process_registry import ProcessRegistry
+from process_table import ProcessTable
+
+APP_NAME = 'iopt-app'
+# o pai e os filhos executam o mesmo link, então todos têm o mesmo nome
+TREE = '"$0" -c "while :; do sleep 1; done" & "$0" -c "while :; do sleep 1; done" & wait'
+
+
+@pytest.fixture
+def app_tree(tmp_path):
+    binary = tmp_path / APP_NAME
+    binary.symlink_to(shutil.which('sh'))
+    parent = subprocess.Popen([str(binary), '-c', TREE])
+    yield parent
+    for child in psutil.Process(parent.pid).children(recursive=True):
+        child.kill()
+    parent.kill()
+    parent.wait()
+
+
+def test_same_name_children_form_one_group(app_tree):
+    registry = ProcessRegistry(prime_interval=0.05, max_age=0)
+    accountant = MemoryAccountant(registry=registry)
+
+    applications = []
+    for _ in range(50):
+        applications = accountant.application_memory(names=[APP_NAME])
+        if applications and applications[0]['process_count'] == 3:
+            break
+        time.sleep(0.1)
+
+    assert len(applications) == 1
+    application = applications[0]
+    assert application['root_pid'] == app_tree.pid and application['process_count'] == 3
+    assert application['accurate']
+    assert 0 < application['uss_mb'] <= application['rss_mb']
+
+
+def test_ppid_cycles_and_missing_pss():
+    table = ProcessTable()
+    # pids reutilizados podem apontar um para o outro como pais
+    table.append(10, 'app', 0.0, 4096, 0.1, 100.0, ppid=11)
+    table.append(11, 'app', 0.0, 4096, 0.1, 100.0, ppid=10)
+    accountant = MemoryAccountant(registry=object())
+    accountant._read_full_info = lambda key: {'uss': 1024, 'pss': None, 'swap': None}
+
+    applications = accountant.application_memory(table=table)
+
+    assert sum(app['process_count'] for app in applications) == 2
+    assert all(app['pss_mb'] is None for app in applications)
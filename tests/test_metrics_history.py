@@ -0,0 +1,91 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from metrics_history import HOUR, HistoryStore
+
+
+@pytest.fixture
+def history(tmp_path):
+    store = HistoryStore(path=str(tmp_path / 'history.db'), flush_interval=0.05)
+    yield store
+    store.close()
+
+
+def test_first_crossing_skips_short_episodes(history):
+    start = 1_000_000.0
+    # acima do limite em 10-11 (curto) e de 20 a 40 (longo)
+    values = [50] * 10 + [90] * 2 + [50] * 8 + [95] * 21 + [50] * 5
+    for i, value in enumerate(values):
+        history.record('memory', value, ts=start + i)
+    history.flush()
+
+    episode = history.first_crossing('memory', 85, start, start + len(values), min_duration=5)
+    assert episode == {'start': start + 20, 'end': start + 40, 'peak': 95}
+    assert history.first_crossing('memory', 85, start, start + len(values))['start'] == start + 10
+    assert history.first_crossing('memory', 99, start, start + len(values)) is None
+    assert history.first_crossing('nope', 1) is None
+
+
+def test_retention_keeps_one_snapshot_per_hour_per_sort_key(history):
+    now = time.time()
+    old = (now - 3 * 24 * HOUR) // HOUR * HOUR
+    for offset in (0, 60, 120):
+        history.record_processes([{'pid': 1, 'name': 'cpu-hog', 'cpu_percent': 90.0}], 'cpu', ts=old + offset)
+        history.record_processes([{'pid': 2, 'name': 'mem-hog', 'memory_percent': 40.0}], 'memory',
+                                 ts=old + offset + 30)
+    history.flush()
+
+    history.apply_retention(now=now)
+
+    kept = history._reader().execute('SELECT sort_by, ts FROM process_snapshots ORDER BY ts').fetchall()
+    assert kept == [('cpu', old), ('memory', old + 30)]
+
+
+def test_writer_survives_unexpected_errors(history, monkeypatch):
+    write_batch = history._write_batch
+    calls = []
+
+    def failing_once(connection, batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise RuntimeError('boom')
+        write_batch(connection, batch)
+
+    monkeypatch.setattr(history, '_write_batch', failing_once)
+    history.record('cpu', 1.0, ts=10.0)
+    assert history.flush(timeout=5)
+    history.record('cpu', 2.0, ts=20.0)
+    assert history.flush(timeout=5)
+
+    assert history._writer.is_alive()
+    assert history.dropped == 1
+    assert [point['value'] for point in history.query('cpu', 0, 100)] == [2.0]
+
+
+def test_close_releases_reader_connections(tmp_path):
+    store = HistoryStore(path=str(tmp_path / 'history.db'), flush_interval=0.05)
+    store.record('cpu', 1.0, ts=10.0)
+    store.flush()
+    connections = []
+
+    def read():
+        store.query('cpu', 0, 100)
+        connections.append(store._reader())
+
+    worker = threading.Thread(target=read)
+    worker.start()
+    worker.join()
+    read()
+
+    plan = store._reader().execute(
+        'EXPLAIN QUERY PLAN SELECT ts FROM samples WHERE metric_id = 1 AND ts >= 0'
+    ).fetchall()
+    assert any('samples_metric_ts' in row[-1] for row in plan)
+
+    store.close()
+    for connection in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            connection.execute('SELECT 1')
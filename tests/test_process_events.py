@@ -0,0 +1,49 @@
+import subprocess
+
+import psutil
+
+from process_events import ProcessEventStream
+
+
+def test_short_lived_child_lifetime_uses_create_time():
+    stream = ProcessEventStream()
+    stream.poll()
+
+    child = subprocess.Popen(['sleep', '0.2'])
+    started = [e for e in stream.poll() if e['pid'] == child.pid]
+    child.wait()
+    exited = [e for e in stream.poll() if e['pid'] == child.pid]
+
+    assert [e['type'] for e in started] == ['started']
+    assert exited[0]['type'] == 'exited'
+    assert 0.15 < exited[0]['lifetime'] < 0.6
+
+
+def test_reused_pid_reports_exit_and_start(monkeypatch):
+    stream = ProcessEventStream(verify_every=2)
+    processes = {4242: ('worker', 100.0)}
+    resolved = []
+
+    def key(pid):
+        resolved.append(pid)
+        return (pid, processes[pid][1])
+
+    monkeypatch.setattr(psutil, 'pids', lambda: list(processes))
+    monkeypatch.setattr(stream, '_key', key)
+    monkeypatch.setattr(stream, '_name', lambda pid: processes[pid][0])
+
+    assert stream.poll() == []
+    # entre duas leituras o processo saiu e outro recebeu o mesmo pid
+    processes[4242] = ('other', 105.0)
+    processes[4343] = ('new', 106.0)
+    # leitura comum: só o pid novo é resolvido, o conhecido não é relido
+    resolved.clear()
+    assert [e['pid'] for e in stream.poll()] == [4343]
+    assert resolved == [4343]
+
+    events = sorted(stream.poll(), key=lambda e: e['type'])
+
+    assert [(e['type'], e['name'], e['create_time']) for e in events] == [
+        ('exited', 'worker', 100.0),
+        ('started', 'other', 105.0),
+    ]
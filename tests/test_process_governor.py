@@ -0,0 +1,167 @@
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import time
+
+import psutil
+import pytest
+
+from process_governor import GovernorPolicy, ProcessGovernor
+from process_registry import ProcessRegistry
+
+BURNER_NAME = 'iopt-burner'
+# laço ocupado do shell: o binário é executável por qualquer usuário
+SHELL = shutil.which('sh')
+BURN = 'while :; do :; done'
+
+
+@pytest.fixture
+def burner(tmp_path):
+    # o nome do link vira o nome do processo, para a política não casar com o próprio pytest
+    binary = tmp_path / BURNER_NAME
+    binary.symlink_to(SHELL)
+    children = []
+
+    def spawn(count):
+        for _ in range(count):
+            children.append(subprocess.Popen([str(binary), '-c', BURN]))
+        return children[-count:]
+
+    yield spawn
+
+    for child in children:
+        child.kill()
+        child.wait()
+
+
+def _governor(registry, **policy):
+    policy = GovernorPolicy('burners', match_names=[BURNER_NAME], cpu_above=20, nice=10, calm_ticks=2, **policy)
+    return ProcessGovernor([policy], registry=registry, interval=0.3)
+
+
+def _tick_until(governor, condition, attempts=20):
+    for _ in range(attempts):
+        governor.tick()
+        if condition():
+            return True
+        time.sleep(0.3)
+    return False
+
+
+def test_applies_to_burners_even_when_another_consumer_refreshes(burner):
+    registry = ProcessRegistry(prime_interval=0.2, max_age=0)
+    governor = _governor(registry)
+    governor.tick()
+
+    children = burner(2)
+    time.sleep(0.3)
+    # outro consumidor atualiza o registro compartilhado e "consome" o diff de inícios
+    registry.refresh()
+
+    assert _tick_until(governor, lambda: len(governor.governed()) == 2)
+    for child in children:
+        assert psutil.Process(child.pid).nice() == 10
+    assert all(a['action'] == 'applied' for a in governor.actions)
+
+    # processos que saem antes de ficarem calmos somem do governador
+    children[0].kill()
+    children[0].wait()
+    registry.refresh()
+    assert _tick_until(governor, lambda: len(governor.governed()) == 1)
+
+
+def test_restores_when_usage_calms_down(burner):
+    registry = ProcessRegistry(prime_interval=0.2, max_age=0)
+    governor = _governor(registry)
+    governor.tick()
+    children = burner(1)
+    assert _tick_until(governor, lambda: len(governor.governed()) == 1)
+
+    # processo parado: uso de CPU zero
+    os.kill(children[0].pid, signal.SIGSTOP)
+    try:
+        assert _tick_until(governor, lambda: not governor.governed())
+    finally:
+        os.kill(children[0].pid, signal.SIGCONT)
+
+    if governor.unrestored():
+        # sem CAP_SYS_NICE o nice não pode voltar a 0: a falha é reportada
+        assert os.geteuid() != 0
+        assert 'nice' in governor.unrestored()[0]['original']
+        assert governor.actions[-1]['action'] == 'restore_denied'
+    else:
+        assert psutil.Process(children[0].pid).nice() == 0
+        assert governor.actions[-1]['action'] == 'restored'
+
+
+def _denied_restore_scenario():
+    """Governa um burner próprio e tenta restaurar o nice sem CAP_SYS_NICE"""
+    directory = tempfile.mkdtemp()
+    binary = os.path.join(directory, BURNER_NAME)
+    os.symlink(SHELL, binary)
+    child = subprocess.Popen([binary, '-c', BURN])
+    try:
+        governor = _governor(ProcessRegistry(prime_interval=0.2, max_age=0))
+        if not _tick_until(governor, lambda: len(governor.governed()) == 1):
+            return False
+        os.kill(child.pid, signal.SIGSTOP)
+        if not _tick_until(governor, lambda: not governor.governed()):
+            return False
+        unrestored = governor.unrestored()
+        return (len(unrestored) == 1 and unrestored[0]['pid'] == child.pid
+                and governor.actions[-1]['action'] == 'restore_denied'
+                and len(governor.stop()) == 1)
+    finally:
+        child.kill()
+        child.wait()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+@pytest.mark.skipif(not hasattr(os, 'geteuid') or os.geteuid() != 0, reason="precisa de root para abrir mão de privilégios")
+def test_denied_restore_is_reported():
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            # usuário comum: pode aumentar o nice dos próprios processos, mas não reduzi-lo
+            os.setgroups([])
+            os.setresgid(65534, 65534, 65534)
+            os.setresuid(65534, 65534, 65534)
+            status = 0 if _denied_restore_scenario() else 2
+        finally:
+            os._exit(status)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+
+
+def test_invalid_affinity_keeps_partial_original(burner):
+    registry = ProcessRegistry(prime_interval=0.2, max_age=0)
+    policy = GovernorPolicy('burners', match_names=[BURNER_NAME], nice=10, cpu_affinity=[99999])
+    governor = ProcessGovernor([policy], registry=registry)
+    governor.tick()
+    children = burner(1)
+
+    assert _tick_until(governor, lambda: len(governor.governed()) == 1)
+    assert psutil.Process(children[0].pid).nice() == 10
+    assert governor.governed()[0]['original'] == {'nice': 0}
+    assert [a['action'] for a in governor.actions] == ['error', 'applied']
+
+
+class _BrokenRegistry:
+    def table(self):
+        raise RuntimeError('tabela indisponível')
+
+
+def test_background_errors_are_logged():
+    governor = ProcessGovernor([], registry=_BrokenRegistry(), interval=0.05)
+    governor.start()
+    deadline = time.time() + 5
+    while not governor.actions and time.time() < deadline:
+        time.sleep(0.05)
+    governor.stop()
+
+    assert governor.actions[0]['action'] == 'error'
+    assert 'tabela indisponível' in governor.actions[0]['detail']
@@ -0,0 +1,123 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import psutil
+
+from process_manager import ProcessManager
+from process_registry import ProcessRegistry
+
+
+def test_zero_duration_monitoring_returns_immediately():
+    manager = ProcessManager(registry=ProcessRegistry(prime_interval=0))
+
+    result = manager.monitor_process_performance(duration=0, interval=0)
+    assert result['samples'] == []
+    assert list(manager.iter_process_performance(duration=0, interval=0)) == []
+
+    async def collect():
+        return [s async for s in manager.aiter_process_performance(duration=0, interval=0)]
+
+    assert asyncio.run(collect()) == []
+
+
+def _children(count, ignore_term=False):
+    code = 'import signal, time\n'
+    if ignore_term:
+        code += 'signal.signal(signal.SIGTERM, signal.SIG_IGN)\n'
+    code += 'print(flush=True)\ntime.sleep(60)\n'
+    children = [subprocess.Popen([sys.executable, '-c', code], stdout=subprocess.PIPE) for _ in range(count)]
+    for child in children:
+        child.stdout.readline()  # handlers instalados
+    return children
+
+
+def _reap(children):
+    for child in children:
+        if child.poll() is None:
+            child.kill()
+        child.wait()
+        child.stdout.close()
+
+
+def test_terminate_processes_shares_one_deadline():
+    manager = ProcessManager(registry=ProcessRegistry(prime_interval=0))
+    children = _children(3) + _children(2, ignore_term=True)
+    try:
+        start = time.monotonic()
+        result = manager.terminate_processes([c.pid for c in children], timeout=5, grace=1)
+        elapsed = time.monotonic() - start
+
+        assert sorted(result['terminated']) == sorted(c.pid for c in children)
+        assert result['failed'] == [] and result['blocked'] == []
+        # um único grace para o lote inteiro, não um por processo
+        assert elapsed < 3
+    finally:
+        _reap(children)
+
+
+def test_force_waits_for_exit_before_reporting():
+    manager = ProcessManager(registry=ProcessRegistry(prime_interval=0))
+    children = _children(3, ignore_term=True)
+    try:
+        # grace não se aplica ao SIGKILL: a espera usa o restante do prazo
+        result = manager.terminate_processes([c.pid for c in children], timeout=5, force=True, grace=0)
+        assert sorted(result['terminated']) == sorted(c.pid for c in children)
+        assert result['failed'] == []
+        assert not any(psutil.pid_exists(c.pid) for c in children)
+    finally:
+        _reap(children)
+
+
+def test_stale_create_time_does_not_signal_current_process():
+    manager = ProcessManager(registry=ProcessRegistry(prime_interval=0))
+    children = _children(1)
+    try:
+        child = children[0]
+        create_time = psutil.Process(child.pid).create_time()
+
+        # mesmo pid, outro processo: o alvo do snapshot já não existe
+        result = manager.terminate_processes([(child.pid, create_time - 10)], timeout=2)
+        assert result['terminated'] == [child.pid]
+        assert child.poll() is None
+
+        result = manager.terminate_processes([(child.pid, create_time)], timeout=2)
+        assert result['terminated'] == [child.pid]
+        assert child.wait(timeout=2) is not None
+    finally:
+        _reap(children)
+
+
+def test_details_deadline_is_per_pid_and_hung_threads_are_not_reused():
+    manager = ProcessManager(registry=ProcessRegistry(prime_interval=0))
+    release = threading.Event()
+    real = manager.get_process_details
+
+    def details(pid, fields=None):
+        if pid < 0:
+            release.wait()  # chamada travada (ex.: /proc em um disco de rede parado)
+            return {'pid': pid}
+        time.sleep(0.05)
+        return real(os.getpid(), fields)
+
+    manager.get_process_details = details
+    try:
+        # 2 workers, 2 pids travados na frente: os demais ainda recebem seu próprio prazo
+        start = time.monotonic()
+        result = manager.get_processes_details([-1, -2] + list(range(1, 7)), fields=['name'],
+                                               timeout=0.3, max_workers=2)
+        assert result[-1]['error'] == result[-2]['error'] == 'Tempo esgotado'
+        assert all('name' in result[pid] for pid in range(1, 7))
+        assert time.monotonic() - start < 2
+
+        # os pids ainda travados não recebem outra thread; o lote seguinte não espera por eles
+        start = time.monotonic()
+        result = manager.get_processes_details([-1, 1, 2], fields=['name'], timeout=0.3, max_workers=2)
+        assert result[-1]['error'] == 'Tempo esgotado'
+        assert 'name' in result[1] and 'name' in result[2]
+        assert time.monotonic() - start < 0.3
+    finally:
+        release.set()
@@ -0,0 +1,58 @@
+import os
+
+from process_registry import ProcessRegistry
+from process_table import ProcessTable
+
+
+def _table(rows):
+    table = ProcessTable()
+    for pid, name, cpu, rss in rows:
+        table.append(pid, name, cpu, rss, rss / 1000, 100.0 + pid, ppid=1)
+    return table
+
+
+def test_top_k_ties_and_k_larger_than_table():
+    table = _table([(1, 'a', 5.0, 10), (2, 'b', 9.0, 30), (3, 'c', 5.0, 20), (4, 'd', 0.0, 40)])
+
+    assert table.top_k('cpu', 1) == [1]
+    # empates mantêm a ordem das linhas
+    assert table.top_k('cpu', 3) == [1, 0, 2]
+    assert table.top_k('memory', 10) == [3, 1, 2, 0]
+    assert table.top_k('cpu', 2, indices=[0, 2, 3]) == [0, 2]
+    assert _table([]).top_k('cpu', 5) == []
+
+
+def test_filters_are_exclusive_at_the_limit():
+    table = _table([(1, 'a', 5.0, 100), (2, 'b', 5.1, 99), (3, 'c', 1.0, 101)])
+
+    assert table.filter(cpu_above=5.0) == [1]
+    assert table.filter(rss_above=100) == [2]
+    assert table.filter(memory_percent_above=0.1) == [2]
+    assert table.filter(cpu_above=5.0, rss_above=100) == []
+    assert table.filter(cpu_above=5.0, rss_above=100, any_of=True) == [1, 2]
+    assert table.filter(name='B') == [1]
+    assert table.filter() == [0, 1, 2]
+
+
+def test_group_by_name_folds_case():
+    table = _table([(1, 'Chrome.exe', 1.0, 10), (2, 'chrome.exe', 2.0, 20), (3, 'code', 3.0, 30)])
+
+    groups = table.group_by_name()
+    assert set(groups) == {'chrome.exe', 'code'}
+    assert groups['chrome.exe']['count'] == 2 and groups['chrome.exe']['pids'] == [1, 2]
+    assert groups['chrome.exe']['cpu_percent'] == 3.0 and groups['chrome.exe']['rss'] == 30
+
+    assert set(table.group_by_name(lower=False)) == {'Chrome.exe', 'chrome.exe', 'code'}
+
+
+def test_registry_builds_dicts_from_the_table():
+    registry = ProcessRegistry(prime_interval=0)
+    table = registry.table()
+    i = table.pid.index(os.getpid())
+
+    info = registry.get(os.getpid())
+    assert info == registry.materialize(table, [i])[0]
+    assert info['name'] == table.name[i] and info['status'] is not None
+    assert info['username'] is not None
+    assert registry.get(-1) is None
+    assert len(registry.processes()) == len(table)
@@ -0,0 +1,23 @@
+import os
+
+from profiler import Tracer
+
+
+def test_summary_reports_process_syscalls(traced, tmp_path):
+    path = tmp_path / 'data'
+    with traced.span('io'):
+        for _ in range(50):
+            with open(path, 'wb', buffering=0) as f:
+                f.write(b'x')
+            traced.count('files.written')
+
+    summary = traced.summary()
+
+    assert summary['counters'] == {'files.written': 50}
+    assert summary['process']['syscalls.write'] >= 50
+    assert 'processo.syscalls.write' in traced.format_summary()
+    assert os.path.getsize(path) == 1
+
+
+def test_disabled_tracer_reports_no_process_counters():
+    assert Tracer().summary()['process'] == {}
@@ -0,0 +1,164 @@
+import os
+import struct
+import threading
+
+import pytest
+
+from shared_snapshot import (
+    SEQ_OFFSET, STATS_FIELDS, SnapshotPublisher, SnapshotReader, default_snapshot_path
+)
+
+
+def _stats(value):
+    return {field: float(value) for field in STATS_FIELDS if field != 'disk_degraded'}
+
+
+@pytest.fixture
+def segment(tmp_path):
+    return str(tmp_path / 'segment')
+
+
+def test_concurrent_reads_are_never_torn(segment):
+    publisher = SnapshotPublisher(path=segment, monitor=object())
+    publisher.publish(_stats(0))
+    reader = SnapshotReader(segment)
+    stop = threading.Event()
+
+    def write():
+        i = 0
+        while not stop.is_set():
+            i += 1
+            publisher.publish(_stats(i), [{'pid': i, 'name': f"p{i}", 'cpu_percent': float(i)}])
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        last_seq = 0
+        for _ in range(2000):
+            snapshot = reader.read()
+            if snapshot is None:
+                continue
+            assert snapshot['seq'] % 2 == 0 and snapshot['seq'] >= last_seq
+            last_seq = snapshot['seq']
+            values = {snapshot['stats'][field] for field in ('cpu', 'memory', 'swap', 'disk', 'temperature')}
+            assert len(values) == 1
+            value = values.pop()
+            for proc in snapshot['top_processes']:
+                assert proc['pid'] == proc['cpu_percent'] == value
+    finally:
+        stop.set()
+        writer.join()
+        reader.close()
+        publisher.close()
+
+
+def test_odd_sequence_is_rejected(segment):
+    publisher = SnapshotPublisher(path=segment, monitor=object())
+    publisher.publish(_stats(1))
+    reader = SnapshotReader(segment)
+
+    struct.pack_into('<Q', publisher._map, SEQ_OFFSET, publisher.seq + 1)
+    assert reader.read(max_retries=3) is None
+    assert reader.retries == 3
+
+    struct.pack_into('<Q', publisher._map, SEQ_OFFSET, publisher.seq)
+    assert reader.read()['stats']['cpu'] == 1.0
+    reader.close()
+    publisher.close()
+
+
+class _ChangesWhileCopied(bytearray):
+    """Buffer cuja sequência avança durante a cópia, como se o escritor tivesse gravado"""
+
+    def __getitem__(self, key):
+        data = super().__getitem__(key)
+        (seq,) = struct.unpack_from('<Q', self, SEQ_OFFSET)
+        struct.pack_into('<Q', self, SEQ_OFFSET, seq + 2)
+        return data
+
+
+def test_copy_overlapping_a_write_is_rejected(segment):
+    publisher = SnapshotPublisher(path=segment, monitor=object())
+    publisher.publish(_stats(1))
+    reader = SnapshotReader(segment)
+    reader._map, mapped = _ChangesWhileCopied(reader._map[:]), reader._map
+
+    assert reader.read(max_retries=5) is None
+    assert reader.retries == 5
+
+    reader._map = mapped
+    reader.close()
+    publisher.close()
+
+
+def test_restart_continues_sequence_for_open_readers(segment):
+    first = SnapshotPublisher(path=segment, monitor=object())
+    first.publish(_stats(1))
+    first.publish(_stats(2))
+    reader = SnapshotReader(segment)
+    seq = reader.read()['seq']
+    first.close(unlink=False)
+
+    second = SnapshotPublisher(path=segment, monitor=object())
+    assert second.seq == seq
+    second.publish(_stats(3))
+
+    snapshot = reader.read()
+    assert snapshot['seq'] > seq and snapshot['stats']['cpu'] == 3.0
+    reader.close()
+    second.close()
+
+
+def test_default_path_is_per_user():
+    assert default_snapshot_path().endswith(f"-{os.geteuid()}")
+
+
+def test_planted_links_are_refused(tmp_path, segment):
+    victim = tmp_path / 'victim'
+    victim.write_bytes(b'keep')
+
+    os.symlink(victim, segment)
+    with pytest.raises(OSError):
+        SnapshotPublisher(path=segment, monitor=object())
+    os.remove(segment)
+
+    os.link(victim, segment)
+    with pytest.raises(ValueError):
+        SnapshotPublisher(path=segment, monitor=object())
+    assert SnapshotReader.open_existing(segment) is None
+    assert victim.read_bytes() == b'keep'
+
+
+def test_reader_follows_a_recreated_segment(segment):
+    first = SnapshotPublisher(path=segment, monitor=object())
+    first.publish(_stats(1))
+    reader = SnapshotReader(segment, stale_after=0.0)
+    first.close(unlink=True)
+
+    second = SnapshotPublisher(path=segment, monitor=object())
+    second.publish(_stats(2))
+
+    assert reader.read()['stats']['cpu'] == 2.0
+    assert reader.reopens == 1
+    assert reader.read()['stats']['cpu'] == 2.0
+    assert reader.reopens == 1
+    reader.close()
+    second.close()
+
+
+def test_second_publisher_is_rejected(segment):
+    first = SnapshotPublisher(path=segment, monitor=object())
+    first.publish(_stats(1))
+    seq = first.seq
+
+    with pytest.raises(RuntimeError):
+        SnapshotPublisher(path=segment, monitor=object())
+
+    reader = SnapshotReader(segment)
+    assert reader.read()['seq'] == seq
+    reader.close()
+    first.close(unlink=False)
+
+    second = SnapshotPublisher(path=segment, monitor=object())
+    assert second.seq == seq
+    second.close()
@@ -0,0 +1,178 @@
+import os
+import shutil
+import subprocess
+import textwrap
+
+import psutil
+import pytest
+
+from startup_manager import (StartupManager, StartupProfiler, XdgAutostartSource, command_basename,
+                             command_executable, split_command)
+
+
+def _desktop(directory, filename, body):
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / filename).write_text(textwrap.dedent(body), encoding='utf-8')
+
+
+def _script(path, body):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text('#!/bin/sh\n' + textwrap.dedent(body))
+    path.chmod(0o755)
+    return path
+
+
+@pytest.fixture
+def autostart(tmp_path):
+    user = tmp_path / 'home' / 'autostart'
+    system = tmp_path / 'etc' / 'autostart'
+    apps = tmp_path / 'my apps'
+
+    burner = _script(apps / 'burner.sh', """\
+        i=0
+        while [ $i -lt 400000 ]; do i=$((i + 1)); done
+        sleep 30
+    """)
+    quiet = _script(apps / 'quiet.sh', 'sleep 30\n')
+
+    _desktop(user, 'burner.desktop', f"""\
+        [Desktop Entry]
+        Name=Burner
+        Exec="{burner}" %U
+    """)
+    _desktop(user, 'quiet.desktop', f"""\
+        [Desktop Entry]
+        Name=Quiet
+        Exec="{quiet}"
+    """)
+    # sobreposto pelo arquivo de mesmo nome no diretório do usuário
+    _desktop(system, 'quiet.desktop', """\
+        [Desktop Entry]
+        Name=System Quiet
+        Exec=/bin/false
+    """)
+    _desktop(system, 'hidden.desktop', """\
+        [Desktop Entry]
+        Name=Hidden
+        Exec=/bin/true
+        Hidden=true
+    """)
+    _desktop(system, 'gnome-off.desktop', """\
+        [Desktop Entry]
+        Name=Gnome Off
+        Exec=/bin/true
+        X-GNOME-Autostart-enabled=false
+    """)
+    _desktop(system, 'no-exec.desktop', """\
+        [Desktop Entry]
+        Name=No Exec
+    """)
+    (system / 'notes.txt').write_text('ignorado')
+
+    return XdgAutostartSource([str(user), str(system)], desktops=[])
+
+
+def test_xdg_entries_follow_priority_and_flags(autostart):
+    entries = {e['name']: e for e in autostart.entries()}
+
+    assert set(entries) == {'Burner', 'Quiet', 'Hidden', 'Gnome Off'}
+    assert not entries['Hidden']['enabled'] and not entries['Gnome Off']['enabled']
+    assert entries['Burner']['enabled']
+    # o código de campo %U sai e o caminho com espaço continua citado
+    assert split_command(entries['Burner']['command'], windows=False)[-1].endswith('burner.sh')
+    assert command_basename(entries['Quiet']['command'], windows=False) == 'quiet.sh'
+
+
+def test_windows_run_commands_keep_quotes_for_popen_and_expand_vars(monkeypatch):
+    monkeypatch.setenv('APPROOT', r"C:\Program Files\App")
+    quoted = r'"C:\Program Files\App\app.exe" --min'
+
+    assert split_command(quoted, windows=True) == quoted
+    assert command_executable(quoted, windows=True) == r"C:\Program Files\App\app.exe"
+    assert command_basename(r'"%APPROOT%\App.exe" /background', windows=True) == 'app.exe'
+    assert command_basename(r"C:\Program Files\App\Tray.exe -s", windows=True) == 'tray.exe'
+    assert command_basename(r"%APPROOT%\Tray.exe", windows=True) == 'tray.exe'
+
+
+def test_profile_ranks_burner_and_stops_the_tree(autostart):
+    profiler = StartupProfiler(idle_window=0.3, timeout=10, interval=0.05)
+    manager = StartupManager(sources=[autostart], profiler=profiler)
+
+    before = set(psutil.pids())
+    report = manager.profile_startup()
+    results = report['results']
+
+    assert [r['name'] for r in results] == ['Burner', 'Quiet']
+    burner, quiet = results
+    assert 'error' not in burner and 'error' not in quiet
+    assert burner['cpu_seconds'] > 0.3 and quiet['cpu_seconds'] < 0.3
+    assert 0.2 < burner['time_to_idle'] < 5
+    assert quiet['time_to_idle'] < 1
+    assert burner['processes'] >= 2  # o shell e o sleep filho
+    assert report['total_estimated_savings'] >= burner['estimated_boot_savings']
+
+    leftovers = [p for p in psutil.process_iter(['cmdline']) if p.pid not in before
+                 and any('my apps' in arg for arg in p.info['cmdline'] or ())]
+    assert leftovers == []
+
+
+def test_profile_reports_launch_errors(tmp_path):
+    result = StartupProfiler(timeout=1).profile_command(f'"{tmp_path / "missing"}" --flag', name='Missing')
+    assert result['name'] == 'Missing' and 'error' in result
+
+
+def test_observe_running_matches_quoted_commands(tmp_path):
+    app = tmp_path / 'Tray App' / 'iopt-tray'
+    app.parent.mkdir()
+    app.symlink_to(shutil.which('sleep'))
+    child = subprocess.Popen([str(app), '30'])
+    try:
+        entries = [{'name': 'Tray', 'command': f'"{app}" 30', 'enabled': True, 'source': 'xdg'}]
+        results = StartupProfiler().observe_running(entries)
+        assert [r['name'] for r in results] == ['Tray']
+        assert results[0]['processes'] == 1
+    finally:
+        child.kill()
+        child.wait()
+
+
+def test_xdg_honors_session_keys(tmp_path):
+    directory = tmp_path / 'autostart'
+    for filename, extra in [
+        ('kde-only.desktop', 'OnlyShowIn=KDE;'),
+        ('gnome-only.desktop', 'OnlyShowIn=GNOME;Unity;'),
+        ('not-gnome.desktop', 'NotShowIn=GNOME;'),
+        ('missing-tryexec.desktop', f"TryExec={tmp_path / 'nope'}"),
+        ('tryexec-in-path.desktop', 'TryExec=sh'),
+    ]:
+        _desktop(directory, filename, f"""\
+            [Desktop Entry]
+            Name={filename[:-8]}
+            Exec=/bin/true
+            {extra}
+        """)
+
+    entries = {e['name']: e['enabled'] for e in XdgAutostartSource([str(directory)], desktops=['GNOME']).entries()}
+
+    assert entries == {'kde-only': False, 'gnome-only': True, 'not-gnome': False, 'tryexec-in-path': True}
+
+
+class RunOnceSource:
+    name = 'registry'
+
+    def __init__(self, marker):
+        self.marker = marker
+
+    def entries(self):
+        return [{'name': 'Installer', 'command': f'touch "{self.marker}"', 'location': 'RunOnce',
+                 'enabled': True, 'profilable': False, 'source': self.name}]
+
+
+def test_run_once_entries_are_not_executed(tmp_path):
+    marker = tmp_path / 'ran'
+    manager = StartupManager(sources=[RunOnceSource(marker)], profiler=StartupProfiler(timeout=2))
+
+    results = manager.profile_startup()['results']
+
+    assert [r['name'] for r in results] == ['Installer'] and 'error' in results[0]
+    assert not marker.exists()
@@ -0,0 +1,72 @@
+import os
+import time
+
+import pytest
+
+from system_cleaner import SystemCleaner
+
+
+def _old_files(directory, count):
+    old = time.time() - 3 * 86400
+    for i in range(count):
+        path = directory / f"{i}.tmp"
+        path.write_bytes(b'x' * 100)
+        os.utime(path, (old, old))
+
+
+@pytest.mark.parametrize('dry_run', [True, False])
+def test_temp_files_are_scanned_once(tmp_path, traced, dry_run):
+    _old_files(tmp_path, 5)
+    cleaner = SystemCleaner()
+    cleaner.temp_dirs = [str(tmp_path)]
+
+    result = cleaner.clean_temp_files(dry_run=dry_run)
+
+    assert result['files_deleted'] == 5
+    assert traced.counters['cleanup.files_scanned'] == 5
+
+
+def test_volume_store_inside_temp_dir_is_never_cleaned(tmp_path, monkeypatch):
+    import backup_manager
+    from backup_manager import QuarantineStore
+
+    temp = tmp_path / 'tmp'
+    temp.mkdir()
+    store = QuarantineStore(root=str(tmp_path / 'q'), budget_bytes=None)
+    # o diretório temporário como raiz do próprio volume (ex.: /tmp em tmpfs)
+    store._stores.clear()
+    monkeypatch.setattr(backup_manager, '_mount_point', lambda path: str(temp))
+
+    cleaner = SystemCleaner(quarantine=store)
+    cleaner.temp_dirs = [str(temp)]
+    _old_files(temp, 3)
+
+    first = cleaner.full_cleanup(verbose=False)
+    assert first['temp_files']['files_deleted'] == 3
+    assert (temp / backup_manager.VOLUME_STORE_NAME).is_dir()
+
+    second = cleaner.full_cleanup(verbose=False)
+    assert second['temp_files']['files_deleted'] == 0
+    assert second['temp_files']['errors'] == []
+
+    restored = store.restore(run=first['quarantine_run'])
+    assert restored['failed'] == [] and len(restored['restored']) == 3
+    assert (temp / '0.tmp').read_bytes() == b'x' * 100
+    store.close()
+
+
+def test_quarantine_refuses_its_own_objects(tmp_path):
+    from backup_manager import QuarantineStore
+
+    store = QuarantineStore(root=str(tmp_path / 'q'))
+    path = tmp_path / 'a.tmp'
+    path.write_bytes(b'data')
+    store.quarantine(str(path))
+    stored = next((tmp_path / 'q' / 'objects').rglob('*'))
+    while stored.is_dir():
+        stored = next(stored.iterdir())
+
+    with pytest.raises(PermissionError):
+        store.quarantine(str(stored))
+    assert stored.exists()
+    store.close()
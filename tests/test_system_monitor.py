@@ -0,0 +1,125 @@
+import threading
+import time
+
+import psutil
+import pytest
+
+from process_registry import ProcessRegistry
+from shared_snapshot import STATS_FIELDS, SnapshotPublisher, SnapshotReader
+from system_monitor import SystemMonitor
+
+
+class FakeHistory:
+    def __init__(self):
+        self.stats = []
+        self.processes = []
+
+    def record_stats(self, stats, ts=None):
+        self.stats.append(ts)
+
+    def record_processes(self, processes, sort_by='cpu', ts=None):
+        self.processes.append((sort_by, [p['pid'] for p in processes]))
+
+
+class NoSampling:
+    """Registro que falha se o monitor tentar reamostrar os processos"""
+
+    def table(self, max_age=None):
+        raise AssertionError('reamostrou o psutil')
+
+
+@pytest.fixture
+def shared(tmp_path):
+    publisher = SnapshotPublisher(path=str(tmp_path / 'segment'), monitor=object())
+    processes = [
+        {'pid': 1, 'name': 'cpu', 'cpu_percent': 90.0, 'memory_percent': 1.0},
+        {'pid': 2, 'name': 'mem', 'cpu_percent': 1.0, 'memory_percent': 60.0},
+        {'pid': 3, 'name': 'both', 'cpu_percent': 50.0, 'memory_percent': 30.0},
+    ]
+    stats = {field: 1.0 for field in STATS_FIELDS if field != 'disk_degraded'}
+    publisher.publish(stats, processes, top=2)
+    reader = SnapshotReader(publisher.path)
+    yield publisher, reader
+    reader.close()
+    publisher.close()
+
+
+def test_snapshot_stats_are_recorded_once_per_snapshot(shared):
+    publisher, reader = shared
+    history = FakeHistory()
+    monitor = SystemMonitor(registry=NoSampling(), history=history, snapshot=reader)
+
+    assert monitor.get_real_time_stats()['cpu'] == 1.0
+    monitor.get_real_time_stats()
+    assert history.stats == [reader.read()['timestamp']]
+
+
+def test_top_processes_come_from_a_fresh_snapshot(shared):
+    publisher, reader = shared
+    history = FakeHistory()
+    monitor = SystemMonitor(registry=NoSampling(), history=history, snapshot=reader)
+
+    assert [p['pid'] for p in monitor.get_top_processes(limit=2, sort_by='cpu')] == [1, 3]
+    assert [p['pid'] for p in monitor.get_top_processes(limit=2, sort_by='memory')] == [2, 3]
+    assert history.processes == [('cpu', [1, 3]), ('memory', [2, 3])]
+    # o snapshot não garante mais que `top` processos por critério
+    assert 'error' in monitor.get_top_processes(limit=3)[0]
+
+
+class PublishingMonitor:
+    def __init__(self):
+        self.registry = ProcessRegistry(prime_interval=0.05)
+
+    def get_real_time_stats(self):
+        return {'cpu': 1.0}
+
+
+def test_publisher_covers_both_sort_orders(tmp_path):
+    monitor = PublishingMonitor()
+    publisher = SnapshotPublisher(path=str(tmp_path / 'segment'), monitor=monitor, top=3)
+    assert publisher.sample_and_publish()
+
+    reader = SnapshotReader(publisher.path)
+    snapshot = reader.read()
+    table = monitor.registry.table()
+    published = {p['pid'] for p in snapshot['top_processes']}
+    assert snapshot['top'] == 3
+    for column in ('cpu', 'memory'):
+        top = {table.pid[i] for i in table.top_k(column, 3)}
+        assert top <= published
+    reader.close()
+    publisher.close()
+
+
+def test_hanging_mount_is_skipped_until_ttl_expires(monkeypatch):
+    release = threading.Event()
+    calls = []
+    disk_usage = psutil.disk_usage
+
+    def fake_disk_usage(mountpoint):
+        calls.append(mountpoint)
+        if mountpoint == '/slow':
+            # simula um compartilhamento de rede que não responde
+            release.wait(10)
+            return disk_usage('/')
+        return disk_usage(mountpoint)
+
+    monkeypatch.setattr(psutil, 'disk_usage', fake_disk_usage)
+    monitor = SystemMonitor(registry=NoSampling(), disk_timeout=0.2, degraded_ttl=0.5)
+    try:
+        started = time.monotonic()
+        usages = monitor._probe_disk_usage(['/', '/slow'])
+        assert time.monotonic() - started < 0.2 + 0.15
+        assert usages['/'] is not None and '/slow' not in usages
+        assert monitor._is_degraded('/slow')
+
+        # até o TTL expirar o ponto lento nem é sondado de novo
+        assert monitor._probe_disk_usage(['/', '/slow']).keys() == {'/'}
+        assert calls.count('/slow') == 1
+
+        release.set()
+        time.sleep(0.6)
+        assert monitor._probe_disk_usage(['/slow'])['/slow'] is not None
+        assert calls.count('/slow') == 2
+    finally:
+        release.set()
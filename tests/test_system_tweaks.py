@@ -0,0 +1,105 @@
+import pytest
+
+from system_tweaks import SysctlBackend, SystemTweaks, Tweak
+
+
+@pytest.fixture
+def proc_sys(tmp_path):
+    (tmp_path / 'vm').mkdir()
+    (tmp_path / 'vm' / 'swappiness').write_text('60\n')
+    return tmp_path
+
+
+def _knob_rate(proc_sys, rates):
+    """Benchmark falso cuja taxa depende do valor atual do knob"""
+    def bench():
+        return rates[(proc_sys / 'vm' / 'swappiness').read_text().strip()]
+    return bench
+
+
+def _tweaks(proc_sys, rates, **kwargs):
+    return SystemTweaks(
+        backend=SysctlBackend(str(proc_sys)),
+        tweaks=[Tweak('swap', 'vm.swappiness', 10, 'fake', **kwargs)],
+        benchmarks={'fake': _knob_rate(proc_sys, rates)},
+        repeats=3
+    )
+
+
+def test_tweak_with_gain_is_kept_and_revertible(proc_sys):
+    tweaks = _tweaks(proc_sys, {'60': 100.0, '10': 150.0})
+
+    result = tweaks.apply_tweak(tweaks.tweaks[0])
+
+    assert result['kept'] and result['previous'] == '60'
+    assert result['gain'] == pytest.approx(0.5)
+    assert (proc_sys / 'vm' / 'swappiness').read_text() == '10\n'
+    assert tweaks.revert_all() == {'vm.swappiness': True}
+    assert (proc_sys / 'vm' / 'swappiness').read_text() == '60\n'
+
+
+def test_tweak_without_gain_is_reverted(proc_sys):
+    tweaks = _tweaks(proc_sys, {'60': 100.0, '10': 101.0})
+
+    result = tweaks.apply_tweak(tweaks.tweaks[0])
+
+    assert result['reverted'] and not result['kept']
+    assert (proc_sys / 'vm' / 'swappiness').read_text() == '60\n'
+    assert tweaks.applied == {}
+
+
+def test_already_applied_and_missing_knobs_are_skipped(proc_sys):
+    (proc_sys / 'vm' / 'swappiness').write_text('10\n')
+    tweaks = _tweaks(proc_sys, {})
+
+    assert tweaks.apply_tweak(tweaks.tweaks[0])['error'] == 'Valor já aplicado'
+    missing = tweaks.apply_tweak(Tweak('x', 'vm.nope', 1, 'fake'))
+    assert 'error' in missing and not missing['kept']
+
+
+def test_reboot_tweak_is_listed_but_not_applied(proc_sys):
+    tweaks = _tweaks(proc_sys, {}, requires_reboot=True)
+
+    result = tweaks.apply_tweak(tweaks.tweaks[0])
+
+    assert result['unverifiable'] and not result['kept'] and 'error' in result
+    assert (proc_sys / 'vm' / 'swappiness').read_text() == '60\n'
+    assert tweaks.applied == {}
+    assert tweaks.unverifiable_tweaks() == tweaks.tweaks
+
+
+def test_tweak_repeats_override_instance_default(proc_sys):
+    calls = []
+    tweaks = SystemTweaks(
+        backend=SysctlBackend(str(proc_sys)),
+        tweaks=[Tweak('swap', 'vm.swappiness', 10, 'fake', repeats=2)],
+        benchmarks={'fake': lambda: calls.append(1) or 100.0},
+        repeats=5
+    )
+
+    tweaks.apply_tweak(tweaks.tweaks[0])
+    # aquecimento + 2 execuções, antes e depois
+    assert len(calls) == 6
+
+
+class TupleBackend:
+    """Backend no formato do registro: read retorna (valor, tipo)"""
+
+    def __init__(self, value):
+        self.values = {'knob': (value, 4)}
+
+    def exists(self, knob):
+        return knob in self.values
+
+    def read(self, knob):
+        return self.values[knob]
+
+    def write(self, knob, value):
+        self.values[knob] = value if isinstance(value, tuple) else (value, 4)
+
+
+def test_registry_value_is_compared_without_its_type():
+    tweaks = SystemTweaks(backend=TupleBackend(1),
+                          tweaks=[Tweak('t', 'knob', 1, None, requires_reboot=True)])
+
+    assert tweaks.apply_tweak(tweaks.tweaks[0])['error'] == 'Valor já aplicado'
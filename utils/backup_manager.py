@@ -0,0 +1,545 @@
+"""
+Quarentena endereçada por conteúdo para limpezas reversíveis
+
+Em vez de apagar, o limpador move os arquivos para uma área de quarentena
+no mesmo volume (rename, sem cópia de dados). Arquivos com o mesmo conteúdo
+são guardados uma única vez. Um manifesto compacto, só de acréscimos,
+permite restaurar por caminho, período ou execução de limpeza, e a
+quarentena expira sozinha por idade e por orçamento de espaço (LRU).
+"""
+
+import bisect
+import errno
+import hashlib
+import json
+import os
+import shutil
+import stat
+import threading
+import time
+import uuid
+
+MB = 1024 * 1024
+GB = 1024 * MB
+
+MANIFEST_NAME = 'manifest.jsonl'
+# nome da área de quarentena criada na raiz de outros volumes
+VOLUME_STORE_NAME = '.ioptimizer-quarantine'
+
+
+def default_quarantine_root():
+    base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    return os.path.join(base, 'iOptimizer', 'quarantine')
+
+
+def _mount_point(path):
+    path = os.path.abspath(path)
+    while not os.path.ismount(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def is_store_path(path, roots=()):
+    """
+    Indica se um caminho está dentro de uma área de quarentena
+
+    Args:
+        path (str): Caminho verificado
+        roots (iterable): Raízes de quarentena além das áreas por volume
+    """
+    path = os.path.normcase(os.path.abspath(path))
+    if os.path.normcase(VOLUME_STORE_NAME) in path.split(os.sep):
+        return True
+    for root in roots:
+        root = os.path.normcase(os.path.abspath(root))
+        if path == root or path.startswith(root.rstrip(os.sep) + os.sep):
+            return True
+    return False
+
+
+def _move(source, destination):
+    """Rename quando possível; cópia apenas se os caminhos estiverem em volumes diferentes"""
+    try:
+        os.replace(source, destination)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(source, destination)
+
+
+class QuarantineStore:
+    def __init__(self, root=None, budget_bytes=2 * GB, max_age_days=30, hash_limit=64 * MB):
+        """
+        Args:
+            root (str): Diretório da quarentena principal
+            budget_bytes (int): Espaço máximo ocupado pela quarentena
+            max_age_days (float): Idade máxima de um item (None para não expirar)
+            hash_limit (int): Arquivos maiores não são deduplicados, para não ler
+                grandes volumes de dados durante a limpeza
+        """
+        self.root = os.path.abspath(root or default_quarantine_root())
+        self.budget_bytes = budget_bytes
+        self.max_age_days = max_age_days
+        self.hash_limit = hash_limit
+
+        self._lock = threading.RLock()
+        # id -> entrada do manifesto (chaves curtas: p, k, v, s, t, r, m)
+        self._entries = {}
+        self._by_path = {}
+        self._by_run = {}
+        # ordem temporal para buscas por período
+        self._times = []
+        self._ids = []
+        # (área, hash) -> {'size', 'refs', 'last_used'}
+        self._objects = {}
+        self._runs = {}
+        # st_dev -> raiz da área de quarentena naquele volume (None = sem área própria)
+        self._stores = {}
+        self._next_id = 1
+        self._dead = 0
+        self.current_run = None
+
+        os.makedirs(self.root, exist_ok=True)
+        self._stores[os.stat(self.root).st_dev] = self.root
+        self._manifest_path = os.path.join(self.root, MANIFEST_NAME)
+        self._load()
+        self._manifest = open(self._manifest_path, 'a', encoding='utf-8')
+
+    # manifesto
+
+    def _load(self):
+        try:
+            f = open(self._manifest_path, encoding='utf-8')
+        except FileNotFoundError:
+            return
+
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if 'x' in record:
+                    self._forget(record['x'])
+                elif 'run' in record:
+                    self._runs[record['run']] = {'label': record.get('label'), 'time': record['t']}
+                else:
+                    self._index(record)
+
+    def _write(self, record):
+        self._manifest.write(json.dumps(record, separators=(',', ':'), ensure_ascii=False) + '\n')
+        self._manifest.flush()
+
+    def _index(self, entry):
+        entry_id = entry['i']
+        self._entries[entry_id] = entry
+        self._by_path.setdefault(os.path.normcase(entry['p']), []).append(entry_id)
+        self._by_run.setdefault(entry['r'], []).append(entry_id)
+        self._times.append(entry['t'])
+        self._ids.append(entry_id)
+        self._next_id = max(self._next_id, entry_id + 1)
+
+        key = (entry.get('v'), entry['k'])
+        obj = self._objects.get(key)
+        if obj is None:
+            obj = self._objects[key] = {'size': entry['s'], 'refs': 0, 'last_used': entry['t']}
+        obj['refs'] += 1
+        obj['last_used'] = max(obj['last_used'], entry['t'])
+
+    def _forget(self, entry_id):
+        """Remove a entrada dos índices e a devolve"""
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return None
+        self._dead += 1
+
+        path_ids = self._by_path.get(os.path.normcase(entry['p']))
+        if path_ids:
+            path_ids.remove(entry_id)
+            if not path_ids:
+                del self._by_path[os.path.normcase(entry['p'])]
+        run_ids = self._by_run.get(entry['r'])
+        if run_ids:
+            run_ids.remove(entry_id)
+            if not run_ids:
+                del self._by_run[entry['r']]
+
+        key = (entry.get('v'), entry['k'])
+        obj = self._objects.get(key)
+        if obj is not None:
+            obj['refs'] -= 1
+            if obj['refs'] <= 0:
+                del self._objects[key]
+        return entry
+
+    def _drop(self, entry_id):
+        entry = self._forget(entry_id)
+        if entry is not None:
+            self._write({'x': entry_id})
+        return entry
+
+    def compact(self):
+        """Reescreve o manifesto apenas com as entradas vivas"""
+        with self._lock:
+            temp_path = self._manifest_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                for run_id, run in self._runs.items():
+                    if run_id in self._by_run or run_id == self.current_run:
+                        f.write(json.dumps({'run': run_id, 'label': run['label'], 't': run['time']},
+                                           separators=(',', ':'), ensure_ascii=False) + '\n')
+                for entry in self._entries.values():
+                    f.write(json.dumps(entry, separators=(',', ':'), ensure_ascii=False) + '\n')
+
+            self._manifest.close()
+            os.replace(temp_path, self._manifest_path)
+            self._manifest = open(self._manifest_path, 'a', encoding='utf-8')
+            self._runs = {
+                run_id: run for run_id, run in self._runs.items()
+                if run_id in self._by_run or run_id == self.current_run
+            }
+
+            live = set(self._entries)
+            pairs = [(t, i) for t, i in zip(self._times, self._ids) if i in live]
+            self._times = [t for t, _ in pairs]
+            self._ids = [i for _, i in pairs]
+            self._dead = 0
+
+    def _maybe_compact(self):
+        if self._dead > 1000 and self._dead > len(self._entries):
+            self.compact()
+
+    # armazenamento
+
+    def _store_for(self, path, device):
+        """Área de quarentena no mesmo volume do arquivo, criada sob demanda"""
+        if device in self._stores:
+            return self._stores[device]
+
+        store = os.path.join(_mount_point(path), VOLUME_STORE_NAME)
+        try:
+            os.makedirs(store, exist_ok=True)
+            if os.stat(store).st_dev != device:
+                store = None
+        except OSError:
+            store = None
+        self._stores[device] = store
+        return store
+
+    def contains(self, path):
+        """Indica se o caminho pertence a esta quarentena ou a uma área por volume"""
+        return is_store_path(path, [self.root])
+
+    def _object_path(self, store, key):
+        return os.path.join(store or self.root, 'objects', key[:2], key)
+
+    def _digest(self, path):
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def begin_run(self, label=None):
+        """
+        Inicia uma execução de limpeza; os itens seguintes ficam associados a ela
+
+        Returns:
+            str: Identificador da execução
+        """
+        with self._lock:
+            now = time.time()
+            run_id = time.strftime('%Y%m%d-%H%M%S', time.localtime(now)) + f"-{uuid.uuid4().hex[:6]}"
+            self._runs[run_id] = {'label': label, 'time': now}
+            self._write({'run': run_id, 'label': label, 't': now})
+            self.current_run = run_id
+            return run_id
+
+    def quarantine(self, path, run=None):
+        """
+        Move um arquivo para a quarentena
+
+        Args:
+            path (str): Arquivo a remover
+            run (str): Execução de limpeza (padrão: a atual)
+
+        Returns:
+            int: Identificador da entrada no manifesto
+        """
+        path = os.path.abspath(path)
+        # um objeto da própria quarentena removido pela deduplicação perderia
+        # os dados de todas as entradas que apontam para ele
+        if self.contains(path):
+            raise PermissionError(errno.EPERM, 'Arquivo pertence à quarentena', path)
+        st = os.lstat(path)
+        regular = stat.S_ISREG(st.st_mode)
+
+        # o hash é calculado fora do lock; arquivos grandes ou especiais recebem
+        # uma chave única e não são deduplicados
+        if regular and st.st_size <= self.hash_limit:
+            key = self._digest(path)
+        else:
+            key = 'u' + uuid.uuid4().hex
+
+        with self._lock:
+            if run is None:
+                run = self.current_run or self.begin_run()
+            store = self._store_for(path, st.st_dev)
+            if store == self.root:
+                store = None
+            obj = self._objects.get((store, key))
+
+            if obj is not None and obj['size'] == st.st_size:
+                os.remove(path)
+            else:
+                if obj is not None:
+                    key = 'u' + uuid.uuid4().hex
+                object_path = self._object_path(store, key)
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                _move(path, object_path)
+
+            entry = {
+                'i': self._next_id, 'p': path, 'k': key, 's': st.st_size,
+                't': time.time(), 'r': run, 'm': st.st_mtime
+            }
+            if store is not None:
+                entry['v'] = store
+            self._index(entry)
+            self._write(entry)
+            return entry['i']
+
+    def quarantine_tree(self, directory, run=None):
+        """
+        Move todos os arquivos de um diretório para a quarentena e remove as pastas vazias
+
+        Returns:
+            tuple: (bytes, arquivos, erros)
+        """
+        total = 0
+        count = 0
+        errors = []
+        if self.contains(directory):
+            return total, count, errors
+        for root, dirs, files in os.walk(directory, topdown=False):
+            if self.contains(root):
+                continue
+            for name in files:
+                file_path = os.path.join(root, name)
+                try:
+                    size = os.lstat(file_path).st_size
+                    self.quarantine(file_path, run)
+                    total += size
+                    count += 1
+                except OSError as e:
+                    errors.append(f"Erro ao mover {file_path}: {str(e)}")
+            for name in dirs:
+                if self.contains(os.path.join(root, name)):
+                    continue
+                try:
+                    os.rmdir(os.path.join(root, name))
+                except OSError:
+                    continue
+        try:
+            os.rmdir(directory)
+        except OSError:
+            pass
+        return total, count, errors
+
+    # consulta e restauração
+
+    def _select(self, path=None, run=None, since=None, until=None):
+        if path is not None:
+            ids = self._by_path.get(os.path.normcase(os.path.abspath(path)), [])
+            # por caminho, apenas a versão mais recente
+            ids = ids[-1:]
+        elif run is not None:
+            ids = list(self._by_run.get(run, []))
+        else:
+            start = bisect.bisect_left(self._times, since) if since is not None else 0
+            end = bisect.bisect_right(self._times, until) if until is not None else len(self._times)
+            ids = [i for i in self._ids[start:end] if i in self._entries]
+
+        entries = [self._entries[i] for i in ids]
+        if since is not None:
+            entries = [e for e in entries if e['t'] >= since]
+        if until is not None:
+            entries = [e for e in entries if e['t'] <= until]
+        return entries
+
+    def entries(self, path=None, run=None, since=None, until=None):
+        """
+        Itens em quarentena filtrados por caminho, execução ou período (timestamps)
+
+        Returns:
+            list: Dicts com id, path, size, time, run
+        """
+        with self._lock:
+            return [
+                {'id': e['i'], 'path': e['p'], 'size': e['s'], 'time': e['t'], 'run': e['r']}
+                for e in self._select(path, run, since, until)
+            ]
+
+    def restore(self, path=None, run=None, since=None, until=None, overwrite=False):
+        """
+        Restaura itens para o caminho original
+
+        Objetos compartilhados por várias entradas são restaurados por cópia:
+        um hardlink deixaria uma gravação posterior no arquivo do usuário
+        alterar o objeto das demais entradas. A última referência é restaurada
+        com rename.
+
+        Returns:
+            dict: 'restored' (caminhos) e 'failed' (caminho e erro)
+        """
+        restored = []
+        failed = []
+
+        with self._lock:
+            for entry in self._select(path, run, since, until):
+                destination = entry['p']
+                if os.path.lexists(destination) and not overwrite:
+                    failed.append({'path': destination, 'error': 'Arquivo já existe'})
+                    continue
+
+                store = entry.get('v')
+                object_path = self._object_path(store, entry['k'])
+                obj = self._objects.get((store, entry['k']))
+                try:
+                    os.makedirs(os.path.dirname(destination), exist_ok=True)
+                    if obj is not None and obj['refs'] > 1:
+                        if os.path.lexists(destination):
+                            os.remove(destination)
+                        shutil.copy2(object_path, destination)
+                        obj['last_used'] = time.time()
+                    else:
+                        _move(object_path, destination)
+                    os.utime(destination, (entry['m'], entry['m']))
+                except OSError as e:
+                    failed.append({'path': destination, 'error': str(e)})
+                    continue
+
+                self._drop(entry['i'])
+                restored.append(destination)
+
+            self._maybe_compact()
+
+        return {'restored': restored, 'failed': failed}
+
+    def runs(self):
+        """Execuções de limpeza com itens em quarentena, da mais recente para a mais antiga"""
+        with self._lock:
+            summary = []
+            for run_id, ids in self._by_run.items():
+                run = self._runs.get(run_id, {})
+                summary.append({
+                    'run': run_id,
+                    'label': run.get('label'),
+                    'time': run.get('time', self._entries[ids[0]]['t']),
+                    'files': len(ids),
+                    'bytes': sum(self._entries[i]['s'] for i in ids)
+                })
+            summary.sort(key=lambda r: r['time'], reverse=True)
+            return summary
+
+    # expiração
+
+    def _delete_object(self, key):
+        store, digest = key
+        try:
+            os.remove(self._object_path(store, digest))
+        except FileNotFoundError:
+            pass
+
+    def purge(self, run=None, before=None):
+        """
+        Remove definitivamente itens de uma execução ou anteriores a um instante
+
+        Sem argumentos, esvazia a quarentena.
+
+        Returns:
+            int: Bytes liberados
+        """
+        freed = 0
+        with self._lock:
+            for entry in self._select(run=run, until=before):
+                key = (entry.get('v'), entry['k'])
+                self._drop(entry['i'])
+                if key not in self._objects:
+                    self._delete_object(key)
+                    freed += entry['s']
+            self._maybe_compact()
+        return freed
+
+    def enforce_budget(self, budget_bytes=None, max_age_days=None, keep_runs=None):
+        """
+        Expira itens antigos e, acima do orçamento, remove os objetos menos usados recentemente
+
+        Args:
+            budget_bytes (int): Orçamento (padrão: o da quarentena)
+            max_age_days (float): Idade máxima (padrão: a da quarentena)
+            keep_runs (iterable): Execuções cujos objetos nunca são removidos pelo
+                orçamento (padrão: a execução atual, que ainda pode ser desfeita)
+
+        Returns:
+            dict: 'expired_bytes', 'evicted_bytes' e 'evicted_objects'
+        """
+        budget_bytes = self.budget_bytes if budget_bytes is None else budget_bytes
+        max_age_days = self.max_age_days if max_age_days is None else max_age_days
+        if keep_runs is None:
+            keep_runs = [self.current_run] if self.current_run else []
+
+        expired = 0
+        if max_age_days is not None:
+            expired = self.purge(before=time.time() - max_age_days * 86400)
+
+        evicted = 0
+        evicted_objects = 0
+        with self._lock:
+            stored = sum(obj['size'] for obj in self._objects.values())
+            if budget_bytes is not None and stored > budget_bytes:
+                protected = {
+                    (self._entries[i].get('v'), self._entries[i]['k'])
+                    for run in keep_runs for i in self._by_run.get(run, ())
+                }
+                victims = sorted(self._objects.items(), key=lambda item: item[1]['last_used'])
+                victim_keys = set()
+                for key, obj in victims:
+                    if stored <= budget_bytes:
+                        break
+                    if key in protected:
+                        continue
+                    victim_keys.add(key)
+                    stored -= obj['size']
+                    evicted += obj['size']
+                    evicted_objects += 1
+
+                for entry in list(self._entries.values()):
+                    if (entry.get('v'), entry['k']) in victim_keys:
+                        self._drop(entry['i'])
+                for key in victim_keys:
+                    self._delete_object(key)
+
+            self._maybe_compact()
+
+        return {'expired_bytes': expired, 'evicted_bytes': evicted, 'evicted_objects': evicted_objects}
+
+    def stats(self):
+        with self._lock:
+            stored = sum(obj['size'] for obj in self._objects.values())
+            logical = sum(entry['s'] for entry in self._entries.values())
+            return {
+                'entries': len(self._entries),
+                'objects': len(self._objects),
+                'stored_bytes': stored,
+                'logical_bytes': logical,
+                'deduplicated_bytes': logical - stored,
+                'budget_bytes': self.budget_bytes,
+                'runs': len(self._by_run)
+            }
+
+    def close(self):
+        with self._lock:
+            if not self._manifest.closed:
+                self._manifest.close()
@@ -0,0 +1,438 @@
+"""
+Histórico durável de métricas em SQLite
+
+As amostras são enfileiradas e gravadas em lotes por uma thread própria
+(SQLite em modo WAL), então quem amostra nunca espera pelo disco. A
+retenção reduz a resolução com o tempo: amostras brutas por 24 h, médias de
+1 minuto por 30 dias e médias de 1 hora para sempre.
+"""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+RAW = 0
+MINUTE = 60
+HOUR = 3600
+
+# (resolução de origem, resolução de destino, idade em segundos a partir da qual agrega)
+DEFAULT_RETENTION = (
+    (RAW, MINUTE, 24 * HOUR),
+    (MINUTE, HOUR, 30 * 24 * HOUR),
+)
+
+# campos numéricos de SystemMonitor.get_real_time_stats gravados como métricas
+STATS_METRICS = (
+    'cpu', 'memory', 'memory_used', 'memory_available', 'swap', 'disk', 'disk_used',
+    'disk_free', 'processes', 'network_sent', 'network_recv', 'temperature'
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS samples (
+    metric_id INTEGER NOT NULL,
+    resolution INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    value REAL NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (metric_id, resolution, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS samples_resolution_ts ON samples (resolution, ts);
+CREATE INDEX IF NOT EXISTS samples_metric_ts ON samples (metric_id, ts);
+CREATE TABLE IF NOT EXISTS process_snapshots (
+    ts REAL NOT NULL,
+    sort_by TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    name TEXT,
+    cpu_percent REAL,
+    memory_percent REAL
+);
+CREATE INDEX IF NOT EXISTS process_snapshots_ts ON process_snapshots (ts);
+CREATE INDEX IF NOT EXISTS process_snapshots_name_ts ON process_snapshots (name, ts);
+CREATE TABLE IF NOT EXISTS cleanup_runs (
+    ts REAL NOT NULL,
+    dry_run INTEGER NOT NULL,
+    total_space_freed TEXT,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cleanup_runs_ts ON cleanup_runs (ts);
+"""
+
+
+def default_history_path():
+    base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    return os.path.join(base, 'iOptimizer', 'history.db')
+
+
+class HistoryStore:
+    def __init__(self, path=None, batch_size=500, flush_interval=1.0, max_pending=100000,
+                 retention=DEFAULT_RETENTION, maintenance_interval=300):
+        """
+        Args:
+            path (str): Arquivo do banco
+            batch_size (int): Máximo de registros por transação
+            flush_interval (float): Espera máxima antes de gravar um lote incompleto
+            max_pending (int): Registros na fila; acima disso novas amostras são descartadas
+            retention (tuple): Regras (origem, destino, idade) de redução de resolução
+            maintenance_interval (float): Intervalo entre execuções da retenção
+        """
+        self.path = path or default_history_path()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention = retention
+        self.maintenance_interval = maintenance_interval
+        self.dropped = 0
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._queue = queue.Queue(max_pending)
+        self._metric_ids = {}
+        self._stop = threading.Event()
+        self._read_local = threading.local()
+        # todas as conexões de leitura abertas, para serem fechadas em close()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        connection.commit()
+        connection.close()
+
+        self._writer = threading.Thread(target=self._run, name='history-writer', daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def _reader(self):
+        """Conexão de leitura por thread; no modo WAL leituras não bloqueiam o escritor"""
+        connection = getattr(self._read_local, 'connection', None)
+        if connection is None:
+            connection = self._read_local.connection = self._connect()
+            with self._readers_lock:
+                self._readers.append(connection)
+        return connection
+
+    # gravação
+
+    def _enqueue(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def record(self, metric, value, ts=None):
+        """Enfileira uma amostra de uma métrica"""
+        if value is None:
+            return
+        self._enqueue(('sample', ts or time.time(), metric, float(value)))
+
+    def record_stats(self, stats, ts=None):
+        """Enfileira as métricas de um resultado de get_real_time_stats"""
+        if 'error' in stats:
+            return
+        ts = ts or time.time()
+        for metric in STATS_METRICS:
+            value = stats.get(metric)
+            if isinstance(value, (int, float)):
+                self._enqueue(('sample', ts, metric, float(value)))
+        for core, value in enumerate(stats.get('cpu_cores') or ()):
+            self._enqueue(('sample', ts, f"cpu.core{core}", float(value)))
+
+    def record_processes(self, processes, sort_by='cpu', ts=None):
+        """Enfileira um retrato dos processos mais pesados"""
+        ts = ts or time.time()
+        for proc in processes:
+            if 'error' in proc:
+                continue
+            self._enqueue((
+                'process', ts, sort_by, proc.get('pid'), proc.get('name'),
+                proc.get('cpu_percent'), proc.get('memory_percent')
+            ))
+
+    def record_cleanup(self, results, ts=None):
+        """Enfileira o resultado de uma limpeza"""
+        self._enqueue((
+            'cleanup', ts or time.time(), int(bool(results.get('dry_run'))),
+            results.get('total_space_freed'), json.dumps(results, ensure_ascii=False, default=str)
+        ))
+
+    def _metric_id(self, connection, name):
+        metric_id = self._metric_ids.get(name)
+        if metric_id is None:
+            connection.execute('INSERT OR IGNORE INTO metrics (name) VALUES (?)', (name,))
+            metric_id = connection.execute('SELECT id FROM metrics WHERE name = ?', (name,)).fetchone()[0]
+            self._metric_ids[name] = metric_id
+        return metric_id
+
+    def _write_batch(self, connection, batch):
+        samples = []
+        processes = []
+        cleanups = []
+        for item in batch:
+            kind = item[0]
+            if kind == 'sample':
+                _, ts, metric, value = item
+                samples.append((self._metric_id(connection, metric), RAW, ts, value, value, value, 1))
+            elif kind == 'process':
+                processes.append(item[1:])
+            elif kind == 'cleanup':
+                cleanups.append(item[1:])
+
+        with connection:
+            if samples:
+                connection.executemany(
+                    'INSERT OR REPLACE INTO samples VALUES (?, ?, ?, ?, ?, ?, ?)', samples
+                )
+            if processes:
+                connection.executemany('INSERT INTO process_snapshots VALUES (?, ?, ?, ?, ?, ?)', processes)
+            if cleanups:
+                connection.executemany('INSERT INTO cleanup_runs VALUES (?, ?, ?, ?)', cleanups)
+
+    def _run(self):
+        connection = self._connect()
+        next_maintenance = time.monotonic() + self.maintenance_interval
+
+        while True:
+            batch = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+                batch.append(item)
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            flush_events = [item[1] for item in batch if item[0] == 'flush']
+            batch = [item for item in batch if item[0] != 'flush']
+            # qualquer exceção que escapasse encerraria a thread e as gravações
+            # seguintes seriam perdidas em silêncio
+            if batch:
+                try:
+                    self._write_batch(connection, batch)
+                except Exception:
+                    self.dropped += len(batch)
+                    logger.exception("Falha ao gravar %d registros no histórico", len(batch))
+            for event in flush_events:
+                event.set()
+
+            if time.monotonic() >= next_maintenance:
+                try:
+                    self.apply_retention(connection=connection)
+                except Exception:
+                    logger.exception("Falha ao aplicar a retenção do histórico")
+                next_maintenance = time.monotonic() + self.maintenance_interval
+
+            if self._stop.is_set() and self._queue.empty():
+                break
+
+        connection.close()
+
+    def flush(self, timeout=10):
+        """Aguarda a gravação de tudo que já foi enfileirado"""
+        event = threading.Event()
+        self._queue.put(('flush', event))
+        return event.wait(timeout)
+
+    def close(self):
+        self._stop.set()
+        self._writer.join()
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+        for connection in readers:
+            connection.close()
+
+    # retenção
+
+    def apply_retention(self, now=None, connection=None):
+        """
+        Agrega amostras antigas na resolução seguinte e remove as originais
+
+        Os cortes são alinhados à resolução de destino, então cada intervalo é
+        agregado de uma vez só; agregados repetidos são combinados por média
+        ponderada.
+
+        Returns:
+            dict: Linhas agregadas por resolução de origem
+        """
+        own = connection is None
+        connection = connection or self._connect()
+        now = now or time.time()
+        aggregated = {}
+
+        try:
+            with connection:
+                for source, target, age in self.retention:
+                    cutoff = (now - age) // target * target
+                    rows = connection.execute(
+                        """
+                        INSERT INTO samples (metric_id, resolution, ts, value, min, max, count)
+                        SELECT metric_id, ?, CAST(ts / ? AS INTEGER) * ?,
+                               SUM(value * count) / SUM(count), MIN(min), MAX(max), SUM(count)
+                        FROM samples WHERE resolution = ? AND ts < ?
+                        GROUP BY metric_id, CAST(ts / ? AS INTEGER)
+                        ON CONFLICT (metric_id, resolution, ts) DO UPDATE SET
+                            value = (value * count + excluded.value * excluded.count) / (count + excluded.count),
+                            min = MIN(min, excluded.min),
+                            max = MAX(max, excluded.max),
+                            count = count + excluded.count
+                        """,
+                        (target, target, target, source, cutoff, target)
+                    ).rowcount
+                    connection.execute('DELETE FROM samples WHERE resolution = ? AND ts < ?', (source, cutoff))
+                    aggregated[source] = rows
+
+                # retratos de processos com mais de 24 h: apenas o primeiro de cada
+                # hora para cada critério de ordenação
+                cutoff = (now - 24 * HOUR) // HOUR * HOUR
+                connection.execute(
+                    """
+                    DELETE FROM process_snapshots WHERE ts < ? AND (sort_by, ts) NOT IN (
+                        SELECT sort_by, MIN(ts) FROM process_snapshots WHERE ts < ?
+                        GROUP BY sort_by, CAST(ts / ? AS INTEGER)
+                    )
+                    """,
+                    (cutoff, cutoff, HOUR)
+                )
+        finally:
+            if own:
+                connection.close()
+
+        return aggregated
+
+    # consultas
+
+    def metrics(self):
+        return [row[0] for row in self._reader().execute('SELECT name FROM metrics ORDER BY name')]
+
+    def _resolve(self, metric):
+        row = self._reader().execute('SELECT id FROM metrics WHERE name = ?', (metric,)).fetchone()
+        return row[0] if row else None
+
+    def query(self, metric, start=None, end=None, resolution=None):
+        """
+        Série de uma métrica em um intervalo de tempo
+
+        Args:
+            metric (str): Nome da métrica (ex.: 'memory')
+            start (float): Início (timestamp; padrão: sem limite)
+            end (float): Fim (timestamp; padrão: agora)
+            resolution (int): Apenas uma resolução (0, 60 ou 3600); padrão: todas
+
+        Returns:
+            list: Dicts com ts, value, min, max, count e resolution, em ordem de tempo
+        """
+        metric_id = self._resolve(metric)
+        if metric_id is None:
+            return []
+
+        sql = 'SELECT ts, value, min, max, count, resolution FROM samples WHERE metric_id = ? AND ts >= ? AND ts <= ?'
+        params = [metric_id, start or 0, end or time.time()]
+        if resolution is not None:
+            sql += ' AND resolution = ?'
+            params.append(resolution)
+        sql += ' ORDER BY ts'
+
+        return [
+            {'ts': ts, 'value': value, 'min': low, 'max': high, 'count': count, 'resolution': res}
+            for ts, value, low, high, count, res in self._reader().execute(sql, params)
+        ]
+
+    def summary(self, metric, start=None, end=None):
+        """
+        Média, mínimo e máximo de uma métrica no intervalo
+
+        Returns:
+            dict: avg, min, max e samples (None se não houver dados)
+        """
+        metric_id = self._resolve(metric)
+        if metric_id is None:
+            return None
+
+        row = self._reader().execute(
+            """
+            SELECT SUM(value * count) / SUM(count), MIN(min), MAX(max), SUM(count)
+            FROM samples WHERE metric_id = ? AND ts >= ? AND ts <= ?
+            """,
+            (metric_id, start or 0, end or time.time())
+        ).fetchone()
+        if not row or row[3] is None:
+            return None
+        return {'avg': row[0], 'min': row[1], 'max': row[2], 'samples': row[3]}
+
+    def first_crossing(self, metric, threshold, start=None, end=None, min_duration=0):
+        """
+        Primeiro instante em que a métrica passou a ficar acima do limite
+
+        Responde perguntas como "quando a pressão de memória começou": retorna
+        o início do primeiro trecho em que o valor ficou >= threshold por pelo
+        menos min_duration segundos.
+
+        Os trechos são montados no próprio SQLite (cada ponto abaixo do limite
+        inicia um novo grupo), sem carregar a série no Python.
+
+        Returns:
+            dict: 'start', 'end' e 'peak' do trecho, ou None
+        """
+        metric_id = self._resolve(metric)
+        if metric_id is None:
+            return None
+
+        row = self._reader().execute(
+            """
+            WITH points AS (
+                SELECT ts, ts + resolution AS end_ts, max, value >= ? AS above,
+                       SUM(value < ?) OVER (ORDER BY ts, resolution ROWS UNBOUNDED PRECEDING) AS episode
+                FROM samples WHERE metric_id = ? AND ts >= ? AND ts <= ?
+            )
+            SELECT MIN(ts), MAX(end_ts), MAX(max) FROM points WHERE above
+            GROUP BY episode HAVING MAX(end_ts) - MIN(ts) >= ?
+            ORDER BY MIN(ts) LIMIT 1
+            """,
+            (threshold, threshold, metric_id, start or 0, end or time.time(), min_duration)
+        ).fetchone()
+        if row is None:
+            return None
+        return {'start': row[0], 'end': row[1], 'peak': row[2]}
+
+    def process_history(self, start=None, end=None, limit=10):
+        """
+        Processos que mais apareceram nos retratos do intervalo
+
+        Returns:
+            list: Dicts com name, appearances, avg_cpu e max_memory_percent
+        """
+        rows = self._reader().execute(
+            """
+            SELECT name, COUNT(*), AVG(cpu_percent), MAX(memory_percent)
+            FROM process_snapshots WHERE ts >= ? AND ts <= ?
+            GROUP BY name ORDER BY COUNT(*) DESC, AVG(cpu_percent) DESC LIMIT ?
+            """,
+            (start or 0, end or time.time(), limit)
+        )
+        return [
+            {'name': name, 'appearances': count, 'avg_cpu': cpu, 'max_memory_percent': memory}
+            for name, count, cpu, memory in rows
+        ]
+
+    def cleanup_history(self, start=None, end=None):
+        rows = self._reader().execute(
+            'SELECT ts, dry_run, total_space_freed FROM cleanup_runs WHERE ts >= ? AND ts <= ? ORDER BY ts',
+            (start or 0, end or time.time())
+        )
+        return [{'ts': ts, 'dry_run': bool(dry_run), 'total_space_freed': freed} for ts, dry_run, freed in rows]
@@ -0,0 +1,284 @@
+"""
+Instrumentação leve: spans de tempo aninhados, contadores e cProfile
+
+Desativado por padrão (ou ative com a variável IOPTIMIZER_TRACE=1). Quando
+desativado, `span()` devolve um contexto vazio compartilhado e `count()`
+retorna imediatamente, então o custo é praticamente zero.
+
+Os contadores de `count()` são lógicos (arquivos, processos). O resumo traz
+também os contadores de chamadas de sistema do processo lidos pelo psutil
+desde `enable()`/`reset()`: chamadas de leitura e escrita (syscr/syscw no
+Linux) e trocas de contexto. São totais do processo inteiro, inclusive de
+outras threads, e não cobrem chamadas como stat/open/unlink; não há contagem
+de syscalls por span.
+
+Uso:
+    from profiler import tracer
+
+    with tracer.span('cleanup.temp_files'):
+        ...
+        tracer.count('files.deleted')
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# pilha de spans ativos; contextvars mantém pilhas separadas por thread e por
+# tarefa asyncio, então spans concorrentes no mesmo event loop não se misturam
+_active_spans = contextvars.ContextVar('ioptimizer_active_spans', default=())
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'attrs', 'start', 'parent', 'depth', '_token')
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        stack = _active_spans.get()
+        self.parent = stack[-1].name if stack else None
+        self.depth = len(stack)
+        self._token = _active_spans.set(stack + (self,))
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        _active_spans.reset(self._token)
+        self.tracer._record(self, duration, exc_type)
+        return False
+
+
+def process_counters():
+    """
+    Contadores de chamadas de sistema do processo atual
+
+    Returns:
+        dict: nome -> valor acumulado (vazio se o psutil não estiver disponível)
+    """
+    try:
+        import psutil
+    except ImportError:
+        return {}
+
+    proc = psutil.Process()
+    counters = {}
+    try:
+        io = proc.io_counters()
+        counters['syscalls.read'] = io.read_count
+        counters['syscalls.write'] = io.write_count
+        if hasattr(io, 'other_count'):
+            counters['syscalls.other'] = io.other_count
+    except (AttributeError, psutil.Error):
+        pass
+    try:
+        switches = proc.num_ctx_switches()
+        counters['ctx_switches.voluntary'] = switches.voluntary
+        counters['ctx_switches.involuntary'] = switches.involuntary
+    except psutil.Error:
+        pass
+    return counters
+
+
+class Tracer:
+    def __init__(self, enabled=False, max_spans=100000):
+        self.enabled = enabled
+        self.max_spans = max_spans
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self.spans = []
+        self.counters = defaultdict(int)
+        self.dropped = 0
+        # contadores do processo no início da medição
+        self._baseline = process_counters() if enabled else None
+
+    def enable(self):
+        self.enabled = True
+        if self._baseline is None:
+            self._baseline = process_counters()
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.spans = []
+            self.counters = defaultdict(int)
+            self.dropped = 0
+            self._origin = time.perf_counter()
+            self._baseline = process_counters() if self.enabled else None
+
+    def process_deltas(self):
+        """Chamadas de sistema e trocas de contexto do processo desde enable()/reset()"""
+        if self._baseline is None:
+            return {}
+        current = process_counters()
+        return {name: current[name] - value for name, value in self._baseline.items() if name in current}
+
+    def span(self, name, **attrs):
+        """Contexto que mede o tempo de uma etapa (aninhável)"""
+        if not self.enabled:
+            return NULL_SPAN
+        return _Span(self, name, attrs)
+
+    def count(self, name, amount=1):
+        """Incrementa um contador (arquivos, processos, chamadas...)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] += amount
+
+    def _record(self, span, duration, exc_type):
+        with self._lock:
+            if len(self.spans) >= self.max_spans:
+                self.dropped += 1
+                return
+            self.spans.append({
+                'name': span.name,
+                'parent': span.parent,
+                'depth': span.depth,
+                'start': span.start - self._origin,
+                'duration': duration,
+                'thread': threading.get_ident(),
+                'error': exc_type.__name__ if exc_type else None,
+                'attrs': span.attrs,
+            })
+
+    def summary(self):
+        """
+        Agrega os spans por nome
+
+        Returns:
+            dict: {'spans': {nome: {count, total, mean, max, depth}}, 'counters': {...},
+            'process': {...}}
+        """
+        aggregated = {}
+        with self._lock:
+            for record in self.spans:
+                item = aggregated.get(record['name'])
+                if item is None:
+                    item = aggregated[record['name']] = {
+                        'count': 0, 'total': 0.0, 'max': 0.0,
+                        'depth': record['depth'], 'first_start': record['start']
+                    }
+                item['count'] += 1
+                item['total'] += record['duration']
+                item['max'] = max(item['max'], record['duration'])
+                item['depth'] = min(item['depth'], record['depth'])
+                item['first_start'] = min(item['first_start'], record['start'])
+            counters = dict(self.counters)
+
+        for item in aggregated.values():
+            item['mean'] = item['total'] / item['count']
+
+        return {'spans': aggregated, 'counters': counters, 'process': self.process_deltas(),
+                'dropped': self.dropped}
+
+    def format_summary(self):
+        """Tabela de tempos por etapa, na ordem em que começaram"""
+        summary = self.summary()
+        lines = [f"{'Etapa':<48} {'N':>6} {'Total (s)':>10} {'Média (ms)':>11} {'Máx (ms)':>10}"]
+        lines.append('-' * len(lines[0]))
+
+        ordered = sorted(summary['spans'].items(), key=lambda item: item[1]['first_start'])
+        for name, item in ordered:
+            label = ('  ' * item['depth'] + name)[:48]
+            lines.append(
+                f"{label:<48} {item['count']:>6} {item['total']:>10.3f} "
+                f"{item['mean'] * 1000:>11.2f} {item['max'] * 1000:>10.2f}"
+            )
+
+        if summary['counters']:
+            lines.append('')
+            for name, value in sorted(summary['counters'].items()):
+                lines.append(f"{name:<48} {value:>6}")
+
+        if summary['process']:
+            lines.append('')
+            for name, value in sorted(summary['process'].items()):
+                lines.append(f"{('processo.' + name):<48} {value:>6}")
+
+        return '\n'.join(lines)
+
+    def to_trace(self):
+        """
+        Spans no formato Trace Event (chrome://tracing, Perfetto)
+
+        Returns:
+            dict: {'traceEvents': [...]}
+        """
+        pid = os.getpid()
+        with self._lock:
+            events = [
+                {
+                    'name': record['name'],
+                    'ph': 'X',
+                    'ts': record['start'] * 1e6,
+                    'dur': record['duration'] * 1e6,
+                    'pid': pid,
+                    'tid': record['thread'],
+                    'args': dict(record['attrs'], error=record['error']) if record['error'] else record['attrs'],
+                }
+                for record in self.spans
+            ]
+            counters = dict(self.counters)
+
+        return {'traceEvents': events, 'counters': counters}
+
+    def export_trace(self, filename):
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.to_trace(), f, ensure_ascii=False, default=str)
+        return filename
+
+    @contextmanager
+    def profile(self, filename=None, sort='cumulative', limit=30):
+        """
+        Captura um perfil cProfile do bloco
+
+        Args:
+            filename (str): Salva as estatísticas (pstats) neste arquivo
+            sort (str): Critério de ordenação do relatório
+            limit (int): Linhas do relatório
+
+        Yields:
+            dict: Preenchido com 'report' (texto) ao final do bloco
+        """
+        import cProfile
+        import io
+        import pstats
+
+        result = {}
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield result
+        finally:
+            profiler.disable()
+            if filename:
+                profiler.dump_stats(filename)
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats(sort).print_stats(limit)
+            result['report'] = stream.getvalue()
+
+
+tracer = Tracer(enabled=os.environ.get('IOPTIMIZER_TRACE', '') not in ('', '0'))
@@ -0,0 +1,216 @@
+"""
+Estatísticas em fluxo com memória constante
+
+Usadas pelo monitoramento contínuo de processos: média, máximo e quantis
+(algoritmo P² de Jain & Chlamtac) sem guardar todas as amostras, além de
+séries temporais em buffer circular.
+"""
+
+from array import array
+
+
+class P2Quantile:
+    """Estimador de quantil P² (5 marcadores, memória O(1))"""
+
+    def __init__(self, p=0.95):
+        self.p = p
+        self.count = 0
+        self._heights = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self._increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, value):
+        self.count += 1
+        heights = self._heights
+
+        if self.count <= 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        if value < heights[0]:
+            heights[0] = value
+            k = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            k = 3
+        else:
+            k = 0
+            while value >= heights[k + 1]:
+                k += 1
+
+        positions = self._positions
+        for i in range(k + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        for i in range(1, 4):
+            d = self._desired[i] - positions[i]
+            if (d >= 1 and positions[i + 1] - positions[i] > 1) or (d <= -1 and positions[i - 1] - positions[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = self._linear(i, d)
+                heights[i] = height
+                positions[i] += d
+
+    def _parabolic(self, i, d):
+        q, n = self._heights, self._positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _linear(self, i, d):
+        q, n = self._heights, self._positions
+        return q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+
+    def value(self):
+        """Estimativa atual do quantil (None sem amostras)"""
+        if not self._heights:
+            return None
+        if self.count <= 5:
+            index = min(len(self._heights) - 1, int(round(self.p * (len(self._heights) - 1))))
+            return self._heights[index]
+        return self._heights[2]
+
+
+class RunningSummary:
+    """Contagem, média, mínimo, máximo e p95 incrementais"""
+
+    __slots__ = ('count', 'mean', 'min', 'max', '_p95')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.min = None
+        self.max = None
+        self._p95 = P2Quantile(0.95)
+
+    def add(self, value):
+        self.count += 1
+        self.mean += (value - self.mean) / self.count
+        self.min = value if self.min is None or value < self.min else self.min
+        self.max = value if self.max is None or value > self.max else self.max
+        self._p95.add(value)
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'min': self.min,
+            'max': self.max,
+            'p95': self._p95.value(),
+        }
+
+
+class RingSeries:
+    """Série temporal de tamanho fixo em arrays compactos"""
+
+    __slots__ = ('capacity', 'times', 'values', '_next', '_size')
+
+    def __init__(self, capacity, typecode='f'):
+        self.capacity = capacity
+        self.times = array('d', [0.0]) * capacity
+        self.values = array(typecode, [0]) * capacity
+        self._next = 0
+        self._size = 0
+
+    def append(self, timestamp, value):
+        self.times[self._next] = timestamp
+        self.values[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def __len__(self):
+        return self._size
+
+    def items(self):
+        """Pares (timestamp, valor) do mais antigo para o mais recente"""
+        start = (self._next - self._size) % self.capacity
+        return [
+            (self.times[(start + i) % self.capacity], self.values[(start + i) % self.capacity])
+            for i in range(self._size)
+        ]
+
+
+class SeriesTracker:
+    """
+    Acompanha várias métricas para um conjunto limitado de chaves
+
+    Cada chave guarda um RunningSummary e uma RingSeries por métrica. Quando
+    `max_keys` é atingido, as chaves inativas (e depois as de menor média na
+    métrica principal) são descartadas, mantendo a memória constante.
+    """
+
+    def __init__(self, metrics, history=60, max_keys=100):
+        self.metrics = tuple(metrics)
+        self.history = history
+        self.max_keys = max_keys
+        self.entries = {}
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def update(self, key, label, timestamp, values):
+        """
+        Registra uma amostra para a chave
+
+        Args:
+            key: Identificador estável (ex.: (pid, create_time))
+            label (str): Nome exibido
+            timestamp (float): Instante da amostra
+            values (dict): métrica -> valor
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            if len(self.entries) >= self.max_keys:
+                self._evict()
+            entry = self.entries[key] = {
+                'label': label,
+                'active': True,
+                'summaries': {m: RunningSummary() for m in self.metrics},
+                'series': {m: RingSeries(self.history) for m in self.metrics},
+            }
+
+        entry['active'] = True
+        for metric, value in values.items():
+            entry['summaries'][metric].add(value)
+            entry['series'][metric].append(timestamp, value)
+
+    def mark_inactive(self, keys):
+        for key in keys:
+            entry = self.entries.get(key)
+            if entry:
+                entry['active'] = False
+
+    def _evict(self):
+        primary = self.metrics[0]
+        victim = min(
+            self.entries,
+            key=lambda k: (self.entries[k]['active'], self.entries[k]['summaries'][primary].mean)
+        )
+        del self.entries[victim]
+
+    def summary(self, include_series=False):
+        """
+        Resumo de todas as chaves acompanhadas
+
+        Returns:
+            list: Um dict por chave com o rótulo e estatísticas por métrica
+        """
+        result = []
+        for key, entry in self.entries.items():
+            item = {
+                'key': key,
+                'label': entry['label'],
+                'active': entry['active'],
+            }
+            for metric in self.metrics:
+                item[metric] = entry['summaries'][metric].as_dict()
+                if include_series:
+                    item[f"{metric}_series"] = entry['series'][metric].items()
+            result.append(item)
+        return result